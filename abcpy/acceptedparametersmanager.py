@@ -24,6 +24,10 @@ class AcceptedParametersManager:
         # saves the current parameters relevant to each kernel
         self.kernel_parameters_bds = None
 
+        # the columns of the accepted parameters belonging to each model, computed once for the graph
+        self._model_columns = None
+        self._column_indices = {}
+
     def broadcast(self, backend, observations):
         """Broadcasts the observations to observations_bds using the specified backend.
 
@@ -119,10 +123,47 @@ class AcceptedParametersManager:
 
         return [mapping, index]
 
+    def get_column_indices(self, models):
+        """
+        Returns the columns of the accepted parameters that belong to the specified models. The depth-first search
+        mapping of the graph is computed only once, and the columns of each list of models are cached.
+
+        Parameters
+        ----------
+        models: list
+            Contains the probabilistic models for which the columns should be returned
+
+        Returns
+        -------
+        tuple
+            The list of columns, and an index selecting these columns from a numpy array. The index is a slice if the
+            columns are contiguous, such that the selection is a view, and an integer array otherwise.
+        """
+
+        key = tuple(models)
+        if key not in self._column_indices:
+            if self._model_columns is None:
+                mapping, mapping_index = self.get_mapping(self.model)
+                self._model_columns = {}
+                for prob_model, index in mapping:
+                    self._model_columns.setdefault(prob_model, []).append(index)
+
+            columns = [index for model in models for index in self._model_columns.get(model, [])]
+            if columns and columns == list(range(columns[0], columns[-1] + 1)):
+                column_index = slice(columns[0], columns[-1] + 1)
+            else:
+                column_index = np.array(columns, dtype=int)
+            self._column_indices[key] = (columns, column_index)
+
+        return self._column_indices[key]
+
     def get_accepted_parameters_bds_values(self, models):
         """
         Returns the accepted bds values for the specified models.
 
+        If the accepted parameters are a numerical numpy array, the values are returned as a column slice of it,
+        which is a view whenever the columns of the models are contiguous.
+
         Parameters
         ----------
         models: list
@@ -131,21 +172,18 @@ class AcceptedParametersManager:
         Returns
         -------
         list:
-            The accepted_parameters_bds values of all the probabilistic models specified in models.
+            The accepted_parameters_bds values of all the probabilistic models specified in models, one entry per
+            accepted parameter.
         """
 
-        # Get the enumerated recursive depth-first search ordering
-        mapping, mapping_index = self.get_mapping(self.model)
+        columns, column_index = self.get_column_indices(models)
+        accepted_parameters = self.accepted_parameters_bds.value()
+
+        if isinstance(accepted_parameters, np.ndarray) and accepted_parameters.ndim == 2 and accepted_parameters.dtype != object:
+            return accepted_parameters[:, column_index]
 
         # The self.accepted_parameters_bds.value() list has dimensions d x n_steps, where d is the number of free parameters
-        accepted_bds_values = [[] for i in range(len(self.accepted_parameters_bds.value()))]
-        # Add all columns that correspond to desired parameters to the list that is returned
-        for model in models:
-            for prob_model, index in mapping:
-                if(model==prob_model):
-                    for i in range(len(self.accepted_parameters_bds.value())):
-                        accepted_bds_values[i].append(self.accepted_parameters_bds.value()[i][index])
-        accepted_bds_values = [np.array(x).reshape(-1, ) for x in accepted_bds_values]
+        accepted_bds_values = [np.array([row[index] for index in columns]).reshape(-1, ) for row in accepted_parameters]
         return accepted_bds_values
 
     def _reset_flags(self, models=None):
@@ -47,6 +47,27 @@ class Approx_likelihood(metaclass = ABCMeta):
         
         raise NotImplemented
 
+    def loglikelihood(self, y_obs, y_sim):
+        """Computes the logarithm of the approximate likelihood. The default
+        implementation takes the logarithm of likelihood(); sub-classes should
+        overwrite it whenever the log can be computed without underflow.
+
+        Parameters
+        ----------
+        y_obs: Python list
+            Observed data set.
+        y_sim: Python list
+            Simulated data set from model at the parameter value.
+
+        Returns
+        -------
+        float
+            Computed logarithm of the approximate likelihood.
+        """
+
+        with np.errstate(divide='ignore'):
+            return np.log(self.likelihood(y_obs, y_sim))
+
 
 class SynLiklihood(Approx_likelihood):
     """This class implements the approximate likelihood function which computes the approximate
@@ -67,7 +88,9 @@ class SynLiklihood(Approx_likelihood):
 
 
     def likelihood(self, y_obs, y_sim):
-        # print("DEBUG: SynLiklihood.likelihood().")
+        return np.exp(self.loglikelihood(y_obs, y_sim))
+
+    def loglikelihood(self, y_obs, y_sim):
         if not isinstance(y_obs, list):
             raise TypeError('Observed data is not of allowed types')
 
@@ -82,18 +105,15 @@ class SynLiklihood(Approx_likelihood):
         # Extract summary statistics from the simulated data
         stat_sim = self.statistics_calc.statistics(y_sim)
 
-        # Compute the mean, robust precision matrix and determinant of precision matrix
-        # print("DEBUG: meansim computation.")
+        # Compute the mean, robust precision matrix and log-determinant of precision matrix
         mean_sim = np.mean(stat_sim,0)
-        # print("DEBUG: robust_precision_sim computation.")
         lw_cov_, _ = ledoit_wolf(stat_sim)
         robust_precision_sim = np.linalg.inv(lw_cov_)
-        # print("DEBUG: robust_precision_sim_det computation..")
-        robust_precision_sim_det = np.linalg.det(robust_precision_sim)
-        # print("DEBUG: combining.")
-        result = pow(np.sqrt((1/(2*np.pi))*robust_precision_sim_det),self.stat_obs.shape[0])\
-        *np.exp(np.sum(-0.5*np.sum(np.array(self.stat_obs-mean_sim)* \
-        np.array(np.matrix(robust_precision_sim)*np.matrix(self.stat_obs-mean_sim).T).T, axis = 1)))
+        _, robust_precision_sim_logdet = np.linalg.slogdet(robust_precision_sim)
+
+        diff = np.array(self.stat_obs-mean_sim)
+        quadratic_form = np.sum(diff.dot(robust_precision_sim)*diff)
+        result = 0.5*self.stat_obs.shape[0]*(robust_precision_sim_logdet-np.log(2*np.pi)) - 0.5*quadratic_form
 
         return result
 
@@ -149,6 +169,9 @@ class PenLogReg(Approx_likelihood, GraphTools):
 
         
     def likelihood(self, y_obs, y_sim):
+        return np.exp(self.loglikelihood(y_obs, y_sim))
+
+    def loglikelihood(self, y_obs, y_sim):
         if not isinstance(y_obs, list):
             raise TypeError('Observed data is not of allowed types')
         
@@ -168,7 +191,7 @@ class PenLogReg(Approx_likelihood, GraphTools):
         X = np.array(np.concatenate((stat_sim,self.ref_data_stat),axis=0))
         m = LogitNet(alpha = 1, n_splits = self.n_folds, max_iter = self.max_iter, random_state= self.seed)
         m = m.fit(X, y)
-        result = np.exp(-np.sum((m.intercept_+np.sum(np.multiply(m.coef_,self.stat_obs),axis=1)),axis=0))
+        result = -np.sum((m.intercept_+np.sum(np.multiply(m.coef_,self.stat_obs),axis=1)),axis=0)
         
         return result
 
@@ -12,3 +12,11 @@ def BackendMPITestHelper(*args,**kwargs):
 def BackendSpark(*args,**kwargs):
     from  abcpy.backends.spark import BackendSpark
     return BackendSpark(*args,**kwargs)
+
+def BackendMultiprocessing(*args,**kwargs):
+    from abcpy.backends.multiprocessing import BackendMultiprocessing
+    return BackendMultiprocessing(*args,**kwargs)
+
+def BackendThreads(*args,**kwargs):
+    from abcpy.backends.threads import BackendThreads
+    return BackendThreads(*args,**kwargs)
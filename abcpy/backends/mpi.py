@@ -1,11 +1,141 @@
 import numpy as np
 import cloudpickle
+import hashlib
+import io
 import time
 import pickle
+import sys
+from collections import OrderedDict
 
 from mpi4py import MPI
 from abcpy.backends import Backend, PDS, BDS
 
+
+class FunctionCache:
+    """Keeps track of the functions shipped to the slaves
+
+    The mapped functions are usually bound methods of inference schemes, thus
+    serializing them serializes the whole scheme. The master and every slave
+    hold an instance of this class, which are updated identically with every
+    map, such that the master knows what the slaves have cached:
+
+    * Large numpy arrays in the serialized function, like observations and
+      their statistics, are replaced by the hash of their content and are
+      sent to the slaves only once.
+    * The remaining serialized function is identified by the hash of its
+      content. If it was shipped before, only the hash is sent.
+
+    The slaves cache the serialized function rather than the function itself,
+    such that every map works on a fresh copy of the function, as if it had
+    been sent anew.
+    """
+
+    def __init__(self, max_functions=8, min_array_size=4096):
+        """
+        Parameters
+        ----------
+        max_functions: Integer
+            number of serialized functions kept in the cache. When it is
+            full, the least recently used function is removed.
+        min_array_size: Integer
+            size in bytes from which on numpy arrays are cached separately
+            from the function.
+        """
+        self.max_functions = max_functions
+        self.min_array_size = min_array_size
+
+        #digest of the function -> (serialized function, digests of its arrays)
+        self.functions = OrderedDict()
+        #digest of an array -> array. On the master, the values are None
+        self.arrays = {}
+
+
+    def pack(self, func):
+        """Serializes a function on the master
+
+        Parameters
+        ----------
+        func: Python func
+            The function to be shipped to the slaves
+
+        Returns
+        -------
+        tuple
+            (digest, function_packed, new_arrays), where function_packed is
+            None if the slaves have cached the function already and new_arrays
+            is a dictionary of the arrays the slaves have not cached yet.
+        """
+
+        found_arrays = {}
+
+        def persistent_id(obj):
+            if isinstance(obj, np.ndarray) and obj.dtype != object and obj.nbytes >= self.min_array_size:
+                array_digest = self.__array_digest(obj)
+                found_arrays[array_digest] = obj
+                return array_digest
+            return None
+
+        buffer = io.BytesIO()
+        pickler = cloudpickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = persistent_id
+        pickler.dump(func)
+        function_packed = buffer.getvalue()
+        digest = hashlib.blake2b(function_packed, digest_size=16).hexdigest()
+
+        if digest in self.functions:
+            self.functions.move_to_end(digest)
+            return digest, None, {}
+
+        new_arrays = {key: value for key, value in found_arrays.items() if key not in self.arrays}
+        self.__store(digest, function_packed, {key: None for key in found_arrays})
+        return digest, function_packed, new_arrays
+
+
+    def unpack(self, digest, function_packed, new_arrays):
+        """Deserializes a function on a slave
+
+        Parameters
+        ----------
+        digest, function_packed, new_arrays:
+            The values returned by pack on the master.
+
+        Returns
+        -------
+        Python func
+            The function shipped by the master
+        """
+
+        if function_packed is None:
+            self.functions.move_to_end(digest)
+            function_packed = self.functions[digest][0]
+        else:
+            for array in new_arrays.values():
+                array.flags.writeable = False
+            self.__store(digest, function_packed, new_arrays)
+
+        unpickler = pickle.Unpickler(io.BytesIO(function_packed))
+        unpickler.persistent_load = self.arrays.__getitem__
+        return unpickler.load()
+
+
+    def __store(self, digest, function_packed, arrays):
+        self.arrays.update(arrays)
+        self.functions[digest] = (function_packed, set(arrays))
+
+        if len(self.functions) > self.max_functions:
+            self.functions.popitem(last=False)
+            #Drop the arrays no cached function refers to anymore
+            used_arrays = set().union(*(array_digests for _, array_digests in self.functions.values()))
+            self.arrays = {key: value for key, value in self.arrays.items() if key in used_arrays}
+
+
+    def __array_digest(self, array):
+        hash_array = hashlib.blake2b(digest_size=16)
+        hash_array.update(str((array.dtype.str, array.shape)).encode())
+        hash_array.update(np.ascontiguousarray(array).data)
+        return hash_array.hexdigest()
+
+
 class BackendMPIMaster(Backend):
     """Defines the behavior of the master process
 
@@ -28,7 +158,7 @@ class BackendMPIMaster(Backend):
             overwhelmed with work.
 
         chunk_size: Integer
-            size of one block of data to be sent to free
+            minimum size of one block of data to be sent to free
             executors
        """
         self.comm = MPI.COMM_WORLD
@@ -51,6 +181,17 @@ class BackendMPIMaster(Backend):
 
         self.chunk_size = chunk_size
 
+        #Bounds of the factor by which the chunks of a worker are scaled
+        #with its speed relative to the other workers
+        self.min_speed, self.max_speed = 0.5, 2.0
+
+        #Mirrors the cache of shipped functions on the slaves
+        self.function_cache = FunctionCache()
+
+        #Size in bytes from which on the buffers of broadcast values, like
+        #the data of numpy arrays, are sent separately from the pickle
+        self.min_buffer_size = 4096
+
 
     def __command_slaves(self, command, data):
         """Tell slaves to enter relevant execution block
@@ -73,18 +214,13 @@ class BackendMPIMaster(Backend):
 
         elif command == self.OP_MAP:
             #In map we receive data as (pds_id,pds_id_new,func)
-            #Use cloudpickle to dump the function into a string.
-            # function_packed = self.__sanitize_and_pack_func()
-            function_packed = cloudpickle.dumps(data[2],pickle.HIGHEST_PROTOCOL)
-            data_packet = (command, data[0], data[1], function_packed)
+            #Use the function cache to send only what the slaves don't have yet
+            function_cached = self.function_cache.pack(data[2])
+            data_packet = (command, data[0], data[1]) + function_cached
 
         elif command == self.OP_BROADCAST:
             data_packet = (command, data[0])
 
-        elif command == self.OP_COLLECT:
-            #In collect we receive data as (pds_id)
-            data_packet = (command, data[0])
-
         elif command == self.OP_DELETEPDS or command == self.OP_DELETEBDS:
             #In deletepds we receive data as (pds_id) or bds_id
             data_packet = (command, data[0])
@@ -159,21 +295,48 @@ class BackendMPIMaster(Backend):
 
         return pds
 
-    def orchestrate_map(self,pds_id):
+    def orchestrate_map(self,pds_id,pds_id_new):
         """Orchestrates the slaves/workers to perform a map function
         
         This works by keeping track of the workers who haven't finished executing,
         waiting for them to request the next chunk of data when they are free,
         responding to them with the data and then sending them a Sentinel
-        signalling that they can exit.
+        signalling that they can exit. The workers request their next chunk
+        before they process the current one, such that the master serves
+        them ahead.
+
+        The workers send the results of their previous chunk along with every
+        request, and a last message with their final results once they got the
+        Sentinel. The results are put in place by their index as they arrive and
+        stored under pds_id_new, thus each worker holds the results of at most
+        two chunks and nothing has to be gathered and sorted at the end.
+
+        The chunks are guided: a worker gets a share of the remaining items, such
+        that the chunks are large at the beginning and shrink as the data drains.
+        The share is scaled by how fast the worker processed its previous chunk
+        compared to the other workers, by a factor between min_speed and
+        max_speed, and never exceeds the fair share of the remaining items of a
+        worker. Chunks never get smaller than chunk_size.
         """
         is_map_done = [True if i in self.master_node_ranks else False for i in range(self.size)]
+        num_workers = max(1, self.size - len(self.master_node_ranks))
         status = MPI.Status()
 
         #Copy it to the pending. This is so when master accesses
         #the PDS data it's not empty.
         self.pds_pending_store[pds_id] = list(self.pds_store[pds_id])
 
+        #Preallocate the results, which are filled in by index
+        results = [None] * len(self.pds_pending_store[pds_id])
+
+        #Seconds per item the workers measured for their previous chunk
+        item_times = {}
+
+        #The chunks are sent without blocking, since a worker receives its next
+        #chunk only once it knows the size. Each buffer is kept until its send
+        #has completed
+        chunk_sends, chunk_buffers = [], []
+
         #While we have some ranks that haven't finished
         while sum(is_map_done)<self.size:
             #Wait for a reqest from anyone
@@ -184,9 +347,31 @@ class BackendMPIMaster(Backend):
             )
             request_from_rank = status.source
 
-            if data_request!=pds_id:
+            #Release the buffers of the chunks that have been sent in the meantime
+            if chunk_sends:
+                completed = MPI.Request.Testsome(chunk_sends)
+                if completed:
+                    completed = set(completed)
+                    chunk_sends = [send for index, send in enumerate(chunk_sends) if index not in completed]
+                    chunk_buffers = [buffer for index, buffer in enumerate(chunk_buffers) if index not in completed]
+
+            #Requests are of the form (pds_id, seconds per item of the previous
+            #chunk, results of the previous chunk, whether a chunk is requested)
+            request_pds_id, item_time, chunk_results, chunk_requested = data_request
+            if request_pds_id!=pds_id:
                 print("Ignoring stale PDS data request from",
-                    request_from_rank,":",data_request,"/",pds_id)
+                    request_from_rank,":",request_pds_id,"/",pds_id)
+                continue
+
+            for data_index, result in chunk_results:
+                results[data_index - 1] = result
+
+            if item_time is not None:
+                item_times[request_from_rank] = item_time
+
+            #The worker got the Sentinel and sent its final results
+            if not chunk_requested:
+                is_map_done[request_from_rank] = True
                 continue
 
             #Pointer so we don't have to keep doing dict lookups
@@ -194,18 +379,58 @@ class BackendMPIMaster(Backend):
             num_current_pds_items = len(current_pds_items)
 
             #Everyone's already exhausted all the data.
-            # Send a sentinel and mark the node as finished
+            # Send a sentinel, the node answers with its final results
             if num_current_pds_items == 0:
                 self.comm.send(None, dest=request_from_rank, tag=pds_id)
-                is_map_done[request_from_rank] = True
             else:
-                #Create the chunk of data to send. Pop off items and tag them with an id.
-                # so we can sort them later
-                chunk_to_send = []
-                for i in range(self.chunk_size):
-                    chunk_to_send+=[(num_current_pds_items-i,current_pds_items.pop())]
+                chunk_size = self._guided_chunk_size(num_current_pds_items, num_workers,
+                                                     item_times, request_from_rank)
+
+                #Create the chunk of data to send. Take items off the end and tag them
+                #with an id so we can sort them later
+                chunk_start = num_current_pds_items - chunk_size
+                chunk_to_send = list(zip(range(chunk_start + 1, num_current_pds_items + 1),
+                                         current_pds_items[chunk_start:]))
+                del current_pds_items[chunk_start:]
 
-                    self.comm.send(chunk_to_send, dest=request_from_rank, tag=pds_id)
+                #Send the size of the chunk first, such that the worker can receive
+                #it into a buffer of the right size while it is still busy
+                chunk_packed = pickle.dumps(chunk_to_send, pickle.HIGHEST_PROTOCOL)
+                self.comm.send(len(chunk_packed), dest=request_from_rank, tag=pds_id)
+                chunk_sends.append(self.comm.Isend([chunk_packed, MPI.BYTE], dest=request_from_rank, tag=pds_id))
+                chunk_buffers.append(chunk_packed)
+
+        MPI.Request.Waitall(chunk_sends)
+
+        del self.pds_pending_store[pds_id]
+        self.pds_store[pds_id_new] = results
+
+    def _guided_chunk_size(self, num_items, num_workers, item_times, rank):
+        """Returns the size of the next chunk for the worker of the given rank
+
+        A worker gets half its fair share of the num_items remaining items,
+        scaled by its speed relative to the other workers. The speed is bounded
+        by min_speed and max_speed, such that a single slow or stalled chunk
+        does not hand one worker all the data, and the chunk never exceeds the
+        fair share.
+
+        Parameters
+        ----------
+        num_items: Integer
+            The number of items not yet sent to any worker
+        num_workers: Integer
+            The number of workers
+        item_times: Python dictionary
+            The seconds per item the workers measured for their previous chunk, by rank
+        rank: Integer
+            The rank of the worker which requested the chunk
+        """
+        chunk_size = num_items / (2 * num_workers)
+        if rank in item_times and item_times[rank] > 0:
+            speed = np.mean(list(item_times.values())) / item_times[rank]
+            chunk_size *= min(max(speed, self.min_speed), self.max_speed)
+        chunk_size = min(np.ceil(chunk_size), np.ceil(num_items / num_workers))
+        return int(min(max(chunk_size, self.chunk_size), num_items))
 
     def map(self, func, pds):
         """
@@ -236,7 +461,7 @@ class BackendMPIMaster(Backend):
         data = (pds_id, pds_id_new, func)
         self.__command_slaves(self.OP_MAP, data)
 
-        self.orchestrate_map(pds_id)
+        self.orchestrate_map(pds_id, pds_id_new)
 
         pds_res = PDSMPI([], pds_id_new, self)
 
@@ -245,8 +470,9 @@ class BackendMPIMaster(Backend):
 
     def collect(self, pds):
         """
-        Gather the pds from all the workers,
-            send it to the master and return it as a standard Python list.
+        Returns the pds as a standard Python list. The results of a map are
+        streamed to the master while the map runs, thus they are already in
+        place and nothing has to be gathered from the workers.
 
         Parameters
         ----------
@@ -259,25 +485,7 @@ class BackendMPIMaster(Backend):
             all elements of pds as a list
         """
 
-        # Tell the slaves to enter collect with the pds's pds_id
-        self.__command_slaves(self.OP_COLLECT, (pds.pds_id,))
-
-        all_data = self.comm.gather(pds.python_list, root=0)
-
-        #Initialize lists to accumulate results
-        all_data_indices,all_data_items = [],[]
-
-        for node_data in all_data:
-            for item in node_data:
-                all_data_indices+=[item[0]]
-                all_data_items+=[item[1]]
-
-        #Sort the accumulated data according to the indices we tagged
-        #them with when distributing 
-        rdd_sorted = [all_data_items[i] for i in np.argsort(all_data_indices)]
-
-
-        return rdd_sorted
+        return self.pds_store[pds.pds_id]
 
 
     def broadcast(self, value):
@@ -285,7 +493,26 @@ class BackendMPIMaster(Backend):
         bds_id = self.__generate_new_bds_id()
         self.__command_slaves(self.OP_BROADCAST, (bds_id,))
 
-        _ = self.comm.bcast(value, root=0)
+        #Out-of-band buffers need pickle protocol 5, before Python 3.8 the
+        #value is sent as a whole
+        if sys.version_info < (3, 8):
+            _ = self.comm.bcast(value, root=0)
+            return BDSMPI(value, bds_id, self)
+
+        #Pickle the value with out-of-band buffers, such that large numpy
+        #arrays are sent as raw bytes instead of being copied into the pickle
+        buffers = []
+
+        def buffer_callback(buffer):
+            if buffer.raw().nbytes < self.min_buffer_size:
+                return True
+            buffers.append(buffer)
+            return False
+
+        value_packed = pickle.dumps(value, protocol=5, buffer_callback=buffer_callback)
+        _ = self.comm.bcast((value_packed, [buffer.raw().nbytes for buffer in buffers]), root=0)
+        for buffer in buffers:
+            self.comm.Bcast([buffer.raw(), MPI.BYTE], root=0)
 
         bds = BDSMPI(value, bds_id, self)
         return bds
@@ -303,6 +530,8 @@ class BackendMPIMaster(Backend):
         """
 
         if  not self.finalized:
+            #The master deallocates it's PDS data as well
+            self.pds_store.pop(pds_id, None)
             self.__command_slaves(self.OP_DELETEPDS, (pds_id,))
 
 
@@ -364,6 +593,9 @@ class BackendMPISlave(Backend):
         #Initialize a BDS store for both master & slave.
         self.bds_store = {}
 
+        #Cache of the functions shipped by the master
+        self.function_cache = FunctionCache()
+
         #Go into an infinite loop waiting for commands from the user.
         self.slave_run()
 
@@ -383,8 +615,7 @@ class BackendMPISlave(Backend):
         and the rest are conditional on the operation.
 
         (op,pds_id) where op == OP_PARALLELIZE for parallelize
-        (op,pds_id, pds_id_result,func) where op == OP_MAP for map.
-        (op,pds_id) where op == OP_COLLECT for a collect operation
+        (op,pds_id, pds_id_result,digest,function_packed,new_arrays) where op == OP_MAP for map.
         (op,pds_id) where op == OP_DELETEPDS for a delete of the remote PDS on slaves
         (op,) where op==OP_FINISH for the slave to break out of the loop and terminate
         """
@@ -404,11 +635,11 @@ class BackendMPISlave(Backend):
 
 
             elif op == self.OP_MAP:
-                pds_id, pds_id_result, function_packed = data[1:]
+                pds_id, pds_id_result = data[1:3]
                 self.__rec_pds_id, self.__rec_pds_id_result = pds_id, pds_id_result
 
-                #Use cloudpickle to convert back function string to a function
-                func = cloudpickle.loads(function_packed)
+                #Rebuild the function from what was sent and what is cached
+                func = self.function_cache.unpack(*data[3:])
 
                 #Enter the map so we can grab data and perform the func.
                 #Func sent before and not during for performance reasons
@@ -421,14 +652,6 @@ class BackendMPISlave(Backend):
                 self.__bds_id = data[1]
                 self.broadcast(None)
 
-            elif op == self.OP_COLLECT:
-                pds_id = data[1]
-
-                # Access an existing PDS from data store
-                pds = self.pds_store[pds_id]
-
-                self.collect(pds)
-
             elif op == self.OP_DELETEPDS:
                 pds_id = data[1]
                 del self.pds_store[pds_id]
@@ -479,50 +702,135 @@ class BackendMPISlave(Backend):
         pds_id, pds_id_new = self.__get_received_pds_id()
 
         rdd = []
-        while True:
-            #Ask for a chunk of data since it's free
-            data_chunks = self.comm.sendrecv(pds_id, 0, pds_id)
+        item_time = None
+
+        #Ask for the first chunk of data
+        data_chunks = ChunkRequest(self.comm, pds_id, item_time, rdd).wait()
 
-            #If it receives a sentinel, it's done and it can exit
-            if data_chunks is None:
-                break
+        #If it receives a sentinel, it's done and it can exit
+        while data_chunks is not None:
+            #Ask for the next chunk before processing the current one, such that the
+            #master's answer arrives while we compute. Report how long the items of
+            #the last processed chunk took and send their results
+            next_chunk_request = ChunkRequest(self.comm, pds_id, item_time, rdd)
 
             #Accumulate the indicess and *processed* chunks
+            rdd = []
+            chunk_start = time.time()
             for chunk in data_chunks:
                 data_index,data_item = chunk
                 rdd+=[(data_index,func(data_item))]
+                next_chunk_request.progress()
+            item_time = (time.time() - chunk_start) / len(data_chunks)
+
+            data_chunks = next_chunk_request.wait()
+
+        #Send the results of the last chunk
+        self.comm.send((pds_id, item_time, rdd, False), dest=0, tag=pds_id)
 
-        pds_res = PDSMPI(rdd, pds_id_new, self)
+        pds_res = PDSMPI([], pds_id_new, self)
 
         return pds_res
 
 
     def collect(self, pds):
         """
-        Gather the pds from all the workers,
-        send it to the master and return it as a standard Python list.
+        Nothing to do for the slaves. They send the results of a map to the
+        master while the map runs.
+        """
+        pass
+
+
+    def broadcast(self, value):
+        """
+        Value is ignored for the slaves. We get data from master
+        """
+        if sys.version_info < (3, 8):
+            self.bds_store[self.__bds_id] = self.comm.bcast(None, root=0)
+            return
+
+        value_packed, buffer_sizes = self.comm.bcast(None, root=0)
+
+        #Receive the out-of-band buffers directly into the memory the
+        #unpickled numpy arrays are going to use
+        buffers = [bytearray(size) for size in buffer_sizes]
+        for buffer in buffers:
+            self.comm.Bcast([buffer, MPI.BYTE], root=0)
+
+        value = pickle.loads(value_packed, buffers=buffers)
+        self.bds_store[self.__bds_id] = value
+
+
+class ChunkRequest:
+    """Nonblocking request of a slave for the next chunk of data of a map
+
+    The request is sent to the master on creation, together with the results
+    of the last processed chunk. The master answers with the size of the
+    chunk, followed by the pickled chunk itself.
+    """
 
+    def __init__(self, comm, pds_id, item_time, chunk_results):
+        """
         Parameters
         ----------
-        pds: PDS class
-            a parallel data set
+        comm: mpi4py.MPI.Comm
+            The communicator to use.
+        pds_id: int
+            The pds_id of the data set the map works on.
+        item_time: float
+            Seconds per item of the last processed chunk, None if there is none.
+        chunk_results: Python list
+            The results of the last processed chunk as (index, result) tuples.
+        """
+        self.comm = comm
+        self.tag = pds_id
+
+        #Post the receive first, such that the answer has a place to go
+        self.size_request = self.comm.irecv(source=0, tag=self.tag)
+        self.comm.isend((pds_id, item_time, chunk_results, True), dest=0, tag=self.tag).wait()
+
+        self.size_received = False
+        self.chunk_request = None
+
+
+    def progress(self):
+        """
+        Posts the receive of the chunk as soon as its size has arrived. Call
+        this regularly while the request is pending.
+        """
+
+        if not self.size_received:
+            self.size_received, size = self.size_request.test()
+            if self.size_received:
+                self.__receive_chunk(size)
+
+
+    def wait(self):
+        """
+        Waits for the chunk.
 
         Returns
         -------
         Python list
-            all elements of pds as a list
+            The chunk, a list of (index, item) tuples, or None if there is no data left.
         """
 
-        #Send the data we have back to the master
-        _ = self.comm.gather(pds.python_list, root=0)
+        if not self.size_received:
+            self.size_received = True
+            self.__receive_chunk(self.size_request.wait())
 
+        if self.chunk_request is None:
+            return None
 
-    def broadcast(self, value):
-        """
-        Value is ignored for the slaves. We get data from master
-        """
-        value = self.comm.bcast(None, root=0)
-        self.bds_store[self.__bds_id] = value
+        self.chunk_request.Wait()
+        return pickle.loads(self.chunk_packed)
+
+
+    def __receive_chunk(self, size):
+        #The master sends no chunk but a size of None once the data is exhausted
+        if size is not None:
+            self.chunk_packed = bytearray(size)
+            self.chunk_request = self.comm.Irecv([self.chunk_packed, MPI.BYTE], source=0, tag=self.tag)
 
 
 class BackendMPI(BackendMPIMaster if MPI.COMM_WORLD.Get_rank() == 0 else BackendMPISlave):
@@ -535,7 +843,19 @@ class BackendMPI(BackendMPIMaster if MPI.COMM_WORLD.Get_rank() == 0 else Backend
     and the slaves.
     """
 
-    def __init__(self, master_node_ranks=[0]):
+    def __init__(self, master_node_ranks=[0], chunk_size=1):
+        """
+        Parameters
+        ----------
+        master_node_ranks: Python list
+            list of ranks computation should not happen on.
+            Should include the master so it doesn't get
+            overwhelmed with work.
+
+        chunk_size: Integer
+            minimum size of one block of data to be sent to free
+            executors
+        """
         self.comm = MPI.COMM_WORLD
         self.size = self.comm.Get_size()
         self.rank = self.comm.Get_rank()
@@ -550,7 +870,7 @@ class BackendMPI(BackendMPIMaster if MPI.COMM_WORLD.Get_rank() == 0 else Backend
 
         #Call the appropriate constructors and pass the required data
         if self.rank == 0:
-            super().__init__(master_node_ranks)
+            super().__init__(master_node_ranks, chunk_size)
         else:
             super().__init__()
             raise Exception("Slaves exitted main loop.")
@@ -0,0 +1,312 @@
+import multiprocessing
+import os
+import pickle
+
+import cloudpickle
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+from abcpy.backends import Backend, PDS, BDS
+
+
+class BackendMultiprocessing(Backend):
+    """
+    A parallelization backend for a single machine. Functions are mapped on a persistent pool of worker processes,
+    which is created once and reused for all maps.
+
+    NumPy arrays that are broadcast, as for example the accepted parameters, weights and covariance matrices, are
+    placed in shared memory once, such that the workers read them without copying. The results of a map are returned
+    in the order of the parallelized list, independent of which worker processed which element.
+    """
+
+    def __init__(self, num_processes=None, chunk_size=None, start_method=None):
+        """
+        Parameters
+        ----------
+        num_processes: int, optional
+            The number of worker processes. The default value is None, meaning the number of CPUs of the machine.
+        chunk_size: int, optional
+            The number of elements of a parallel data set sent to a worker at once. The default value is None,
+            meaning the elements are split into four chunks per worker process.
+        start_method: string, optional
+            The method used to start the worker processes, one of 'fork', 'spawn' and 'forkserver'. The default value
+            is None, meaning the default method of the platform.
+        """
+
+        self.num_processes = num_processes if num_processes is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+
+        # The workers have to share the resource tracker of the master, otherwise they would remove the shared memory
+        # of the broadcasts when they exit
+        resource_tracker.ensure_running()
+        self._pool = multiprocessing.get_context(start_method).Pool(self.num_processes)
+
+
+    def __getstate__(self):
+        # The pool stays with the master; a copy of the backend in a worker maps sequentially
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+
+    def parallelize(self, python_list):
+        """
+        Wraps the Python list into a parallel data set. The elements are sent to the workers only when a function is
+        mapped on them.
+
+        Parameters
+        ----------
+        python_list: Python list
+            the list that should get distributed on the workers
+
+        Returns
+        -------
+        PDSMultiprocessing class (parallel data set)
+            A reference object that represents the parallelized list
+        """
+
+        return PDSMultiprocessing(list(python_list))
+
+
+    def broadcast(self, object):
+        """
+        Makes the object available to all workers. NumPy arrays contained in the object are copied into shared
+        memory, all other parts of the object are sent to the workers together with the mapped functions.
+
+        Parameters
+        ----------
+        object: Python object
+            An abitrary object that should be available on all workers
+
+        Returns
+        -------
+        BDSMultiprocessing class (broadcast data set)
+            A reference to the broadcasted object
+        """
+
+        return BDSMultiprocessing(object)
+
+
+    def map(self, func, pds):
+        """
+        Applies func to every element of pds on the worker processes.
+
+        The function is serialized with cloudpickle, such that lambdas and methods of inference schemes can be
+        mapped, and sent once per chunk of elements.
+
+        Parameters
+        ----------
+        func: Python func
+            A function that can be applied to every element of the pds
+        pds: PDSMultiprocessing class
+            A parallel data set to which func should be applied
+
+        Returns
+        -------
+        PDSMultiprocessing class
+            a new parallel data set that contains the result of the map
+        """
+
+        python_list = pds.python_list
+        if self._pool is None:
+            return PDSMultiprocessing([func(element) for element in python_list])
+
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(python_list) // (4 * self.num_processes)))
+
+        BDSMultiprocessing.pickle_for_workers = True
+        try:
+            function_packed = cloudpickle.dumps(func, pickle.HIGHEST_PROTOCOL)
+        finally:
+            BDSMultiprocessing.pickle_for_workers = False
+
+        live_segments = BDSMultiprocessing.get_live_segments()
+        tasks = [(function_packed, python_list[index:index + chunk_size], live_segments)
+                 for index in range(0, len(python_list), chunk_size)]
+        chunk_results = self._pool.map(_map_chunk, tasks, chunksize=1)
+        return PDSMultiprocessing([result for chunk_result in chunk_results for result in chunk_result])
+
+
+    def collect(self, pds):
+        """
+        Returns the Python list stored in PDSMultiprocessing.
+
+        Parameters
+        ----------
+        pds: PDSMultiprocessing class
+            a parallel data set
+
+        Returns
+        -------
+        Python list
+            all elements of pds as a list
+        """
+
+        return pds.python_list
+
+
+    def close(self):
+        """
+        Shuts the worker processes down. The backend cannot be used afterwards.
+        """
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+
+class PDSMultiprocessing(PDS):
+    """
+    This is a wrapper for a Python list, which is kept on the master and sent to the workers in chunks by map.
+    """
+
+    def __init__(self, python_list):
+        self.python_list = python_list
+
+
+
+class BDSMultiprocessing(BDS):
+    """
+    This is a wrapper for a broadcast Python object. When the object is sent to the workers, NumPy arrays contained in
+    it, directly or in (nested) lists and tuples, are replaced by references to shared memory, which the workers map
+    into their address space as read-only arrays.
+
+    All arrays of a broadcast that are at least min_array_size bytes large are packed into a single shared memory
+    segment. Smaller arrays are pickled with the rest of the object, such that broadcasts of many small arrays, like
+    the simulated data of SMCABC, neither cost a file descriptor nor a page of memory per array.
+    """
+
+    # Set by BackendMultiprocessing.map while it serializes a function for the workers. Otherwise, for example when
+    # an inference scheme is pickled to a file, the object is pickled as a whole.
+    pickle_for_workers = False
+
+    # The size in bytes from which on arrays are placed in shared memory
+    min_array_size = 4096
+
+    # The names of the shared memory segments of all broadcasts that are alive on the master
+    _live_segments = set()
+
+    def __init__(self, object):
+        self.object = object
+        self._segments = []
+        self._shared_object = self._share(object)
+
+
+    def value(self):
+        return self.object
+
+
+    @staticmethod
+    def get_live_segments():
+        """
+        Returns the names of the shared memory segments of all broadcasts that are alive on the master.
+
+        Returns
+        -------
+        frozenset
+            The names of the segments.
+        """
+
+        return frozenset(BDSMultiprocessing._live_segments)
+
+
+    def _share(self, object):
+        large_arrays = []
+        description, size = self._describe(object, 0, large_arrays)
+        if not large_arrays:
+            return (None, description)
+
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        for offset, array in large_arrays:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=offset)[...] = array
+        self._segments.append(segment)
+        BDSMultiprocessing._live_segments.add(segment.name)
+        return (segment.name, description)
+
+
+    def _describe(self, object, offset, large_arrays):
+        # Returns the description of object and the offset of the next array in the segment
+        if isinstance(object, np.ndarray) and object.dtype != np.dtype('O') and object.nbytes >= self.min_array_size:
+            large_arrays.append((offset, object))
+            # Aligns the arrays to cache lines
+            return ('array', offset, object.shape, object.dtype.str), offset + -(-object.nbytes // 64) * 64
+        if isinstance(object, (list, tuple)) and any(isinstance(element, (np.ndarray, list, tuple)) for element in object):
+            descriptions = []
+            for element in object:
+                description, offset = self._describe(element, offset, large_arrays)
+                descriptions.append(description)
+            if any(description[0] != 'object' for description in descriptions):
+                return (type(object).__name__, descriptions), offset
+        return ('object', object), offset
+
+
+    def __getstate__(self):
+        if BDSMultiprocessing.pickle_for_workers:
+            return {'shared_object': self._shared_object}
+        return {'object': self.object}
+
+
+    def __setstate__(self, state):
+        self._segments = []
+        if 'object' in state:
+            self.object = state['object']
+            self._shared_object = self._share(self.object)
+        else:
+            self._shared_object = state['shared_object']
+            self.object = _attach(*state['shared_object'])
+
+
+    def __del__(self):
+        for segment in getattr(self, '_segments', []):
+            BDSMultiprocessing._live_segments.discard(segment.name)
+            segment.close()
+            segment.unlink()
+
+
+
+# The shared memory segments the current worker process has attached to, by name
+_attached_segments = {}
+
+
+def _attach(name, description):
+    """
+    Rebuilds a broadcast object in a worker from the name of its shared memory segment and its description.
+    """
+
+    kind = description[0]
+    if kind == 'array':
+        offset, shape, dtype = description[1:]
+        if name not in _attached_segments:
+            _attached_segments[name] = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_attached_segments[name].buf, offset=offset)
+        array.flags.writeable = False
+        return array
+    if kind == 'list':
+        return [_attach(name, element) for element in description[1]]
+    if kind == 'tuple':
+        return tuple(_attach(name, element) for element in description[1])
+    return description[1]
+
+
+def _map_chunk(task):
+    """
+    Applies a function to a chunk of elements in a worker process.
+    """
+
+    function_packed, chunk, live_segments = task
+
+    # Detach from the segments of broadcasts the master has deleted in the meantime. Arrays of earlier tasks may still
+    # be referenced, in which case the segment is detached by a later task.
+    for name in list(_attached_segments):
+        if name not in live_segments:
+            try:
+                _attached_segments[name].close()
+                del _attached_segments[name]
+            except BufferError:
+                pass
+
+    func = cloudpickle.loads(function_packed)
+    return [func(element) for element in chunk]
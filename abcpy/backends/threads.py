@@ -0,0 +1,174 @@
+import copy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from abcpy.backends import Backend, PDS, BDS
+
+
+class BackendThreads(Backend):
+    """
+    A parallelization backend that maps functions on a persistent pool of threads of the current process. Nothing is
+    serialized: parallel data sets and broadcasts are plain references shared by all threads.
+
+    Threads only run in parallel while the Python interpreter lock is released, thus this backend pays off for
+    simulators implemented as compiled extensions that release the lock, such as the C++ model in
+    examples/extensions/models/gaussian_cpp.
+    """
+
+    def __init__(self, num_threads=None, copy_function=True):
+        """
+        Parameters
+        ----------
+        num_threads: int, optional
+            The number of threads. The default value is None, meaning the number of CPUs of the machine.
+        copy_function: boolean, optional
+            If True, every thread works on its own deep copy of the mapped function. For methods, such as those
+            mapped by the inference schemes, the object the method is bound to is copied, such that the state the
+            models keep while they are evaluated is not shared between threads. Broadcasts and the backend itself are
+            never copied. The copies are made once per thread and map. If False, the function has to be thread-safe.
+            The default value is True.
+        """
+
+        self.num_threads = num_threads if num_threads is not None else os.cpu_count()
+        self.copy_function = copy_function
+        self._executor = ThreadPoolExecutor(max_workers=self.num_threads)
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+    def __getstate__(self):
+        # The threads stay with the original backend; an unpickled copy maps sequentially
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+
+    def parallelize(self, python_list):
+        """
+        Wraps the Python list into a parallel data set.
+
+        Parameters
+        ----------
+        python_list: Python list
+            the list that should get distributed on the threads
+
+        Returns
+        -------
+        PDSThreads class (parallel data set)
+            A reference object that represents the parallelized list
+        """
+
+        return PDSThreads(list(python_list))
+
+
+    def broadcast(self, object):
+        """
+        Wraps the object into a broadcast data set, which all threads reference without copying it.
+
+        Parameters
+        ----------
+        object: Python object
+            An abitrary object that should be available on all threads
+
+        Returns
+        -------
+        BDSThreads class (broadcast data set)
+            A reference to the broadcasted object
+        """
+
+        return BDSThreads(object)
+
+
+    def map(self, func, pds):
+        """
+        Applies func to every element of pds on the threads. The results are returned in the order of the elements.
+
+        Parameters
+        ----------
+        func: Python func
+            A function that can be applied to every element of the pds
+        pds: PDSThreads class
+            A parallel data set to which func should be applied
+
+        Returns
+        -------
+        PDSThreads class
+            a new parallel data set that contains the result of the map
+        """
+
+        if self._executor is None:
+            return PDSThreads([func(element) for element in pds.python_list])
+
+        thread_functions = threading.local()
+
+        def apply(element):
+            thread_func = getattr(thread_functions, 'func', None)
+            if thread_func is None:
+                thread_func = copy.deepcopy(func) if self.copy_function else func
+                thread_functions.func = thread_func
+            return thread_func(element)
+
+        return PDSThreads(list(self._executor.map(apply, pds.python_list)))
+
+
+    def collect(self, pds):
+        """
+        Returns the Python list stored in PDSThreads.
+
+        Parameters
+        ----------
+        pds: PDSThreads class
+            a parallel data set
+
+        Returns
+        -------
+        Python list
+            all elements of pds as a list
+        """
+
+        return pds.python_list
+
+
+    def close(self):
+        """
+        Shuts the threads down. The backend cannot be used afterwards.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+
+class PDSThreads(PDS):
+    """
+    This is a wrapper for a Python list, which is shared by all threads.
+    """
+
+    def __init__(self, python_list):
+        self.python_list = python_list
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+
+class BDSThreads(BDS):
+    """
+    This is a wrapper for a broadcast Python object, which is shared by all threads.
+    """
+
+    def __init__(self, object):
+        self.object = object
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+    def value(self):
+        return self.object
@@ -2,8 +2,8 @@ from abcpy.probabilisticmodels import ProbabilisticModel, Continuous, Hyperparam
 import numpy as np
 
 from numbers import Number
-from scipy.stats import multivariate_normal, norm
-from scipy.special import gamma
+from scipy.stats import multivariate_normal, norm, t
+from scipy.special import gamma, gammaln
 
 class Uniform(ProbabilisticModel, Continuous):
     def __init__(self, parameters, name='Uniform'):
@@ -90,6 +90,33 @@ class Uniform(ProbabilisticModel, Continuous):
         return [np.array(x) for x in samples]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        dim = self.get_output_dimension()
+        lower_bound = input_values[:, np.newaxis, :dim]
+        upper_bound = input_values[:, np.newaxis, dim:2*dim]
+        return rng.uniform(lower_bound, upper_bound, (input_values.shape[0], k, dim))
+
+
     def get_output_dimension(self):
         return self._dimension
 
@@ -123,6 +150,48 @@ class Uniform(ProbabilisticModel, Continuous):
         return pdf_value
 
 
+    def logpdf(self, input_values, x):
+        lower_bound = input_values[:self.get_output_dimension()]
+        upper_bound = input_values[self.get_output_dimension():]
+
+        if (np.product(np.greater_equal(x, np.array(lower_bound)) * np.less_equal(x, np.array(upper_bound)))):
+            logpdf_value = -np.sum(np.log(np.array(upper_bound) - np.array(lower_bound)))
+        else:
+            logpdf_value = -np.inf
+        self.calculated_pdf = np.exp(logpdf_value)
+        return logpdf_value
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        dim = self.get_output_dimension()
+        lower_bound = input_values[:, :dim]
+        upper_bound = input_values[:, dim:2*dim]
+
+        inside = np.all((x >= lower_bound) & (x <= upper_bound), axis=1)
+        logpdf = np.full(len(x), -np.inf)
+        logpdf[inside] = -np.sum(np.log(upper_bound[inside] - lower_bound[inside]), axis=1)
+        return logpdf
+
+
 class Normal(ProbabilisticModel, Continuous):
     def __init__(self, parameters, name='Normal'):
         """
@@ -192,6 +261,32 @@ class Normal(ProbabilisticModel, Continuous):
         return [np.array([x]) for x in result]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        mu = input_values[:, 0:1]
+        sigma = input_values[:, 1:2]
+        return rng.normal(mu, sigma, (input_values.shape[0], k))[:, :, np.newaxis]
+
+
     def get_output_dimension(self):
         return 1
         ## Why does the following not work here?
@@ -223,6 +318,37 @@ class Normal(ProbabilisticModel, Continuous):
         return pdf
 
 
+    def logpdf(self, input_values, x):
+        mu = input_values[0]
+        sigma = input_values[1]
+        logpdf = norm(mu,sigma).logpdf(x)
+        self.calculated_pdf = np.exp(logpdf)
+        return logpdf
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        return norm.logpdf(x[:, 0], input_values[:, 0], input_values[:, 1])
+
+
 class StudentT(ProbabilisticModel, Continuous):
     def __init__(self, parameters, name='StudentT'):
         """
@@ -273,6 +399,32 @@ class StudentT(ProbabilisticModel, Continuous):
         return [np.array([x]) for x in result]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        mean = input_values[:, 0:1]
+        df = input_values[:, 1:2]
+        return (rng.standard_t(df, (input_values.shape[0], k)) + mean)[:, :, np.newaxis]
+
+
     def _check_input(self, input_values):
         """
         Checks parameter values sampled from the parents of the probabilistic model. Returns False iff the degrees of freedom are smaller than or equal to 0.
@@ -322,6 +474,29 @@ class StudentT(ProbabilisticModel, Continuous):
         return pdf
 
 
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        return t.logpdf(x[:, 0] - input_values[:, 0], input_values[:, 1])
+
+
 class MultivariateNormal(ProbabilisticModel, Continuous):
     def __init__(self, parameters, name='Multivariate Normal'):
         """
@@ -425,6 +600,37 @@ class MultivariateNormal(ProbabilisticModel, Continuous):
         return [np.array([result[i,:]]).reshape(-1,) for i in range(k)]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        n = input_values.shape[0]
+        dim = self.get_output_dimension()
+        mean = input_values[:, 0:dim]
+        cov = input_values[:, dim:dim+dim**2].reshape((n, dim, dim))
+        # Standard normal draws are correlated by the Cholesky factors of all covariance matrices at once
+        cholesky_factor = np.linalg.cholesky(cov)
+        standard_normal = rng.standard_normal((n, k, dim))
+        return mean[:, np.newaxis, :] + np.einsum('nij,nkj->nki', cholesky_factor, standard_normal)
+
+
     def get_output_dimension(self):
         return self._dimension
 
@@ -457,6 +663,48 @@ class MultivariateNormal(ProbabilisticModel, Continuous):
         return pdf
 
 
+    def logpdf(self, input_values, x):
+        dim = self._dimension
+        mean = np.array(input_values[0:dim])
+        cov = np.array(input_values[dim:dim+dim**2]).reshape((dim, dim))
+
+        logpdf = multivariate_normal(mean, cov).logpdf(x)
+        self.calculated_pdf = np.exp(logpdf)
+        return logpdf
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        n = len(x)
+        dim = self._dimension
+        mean = input_values[:, 0:dim]
+        cov = input_values[:, dim:dim+dim**2].reshape((n, dim, dim))
+
+        # The Mahalanobis distances and log-determinants of all rows follow from a batched Cholesky decomposition
+        cholesky_factor = np.linalg.cholesky(cov)
+        whitened = np.linalg.solve(cholesky_factor, (x - mean)[:, :, np.newaxis])[:, :, 0]
+        log_det = 2 * np.sum(np.log(np.diagonal(cholesky_factor, axis1=1, axis2=2)), axis=1)
+        return -0.5 * (dim * np.log(2 * np.pi) + log_det + np.sum(whitened ** 2, axis=1))
+
+
 class MultiStudentT(ProbabilisticModel, Continuous):
     def __init__(self, parameters, name='MultiStudentT'):
         """
@@ -605,4 +853,37 @@ class MultiStudentT(ProbabilisticModel, Continuous):
         tmp = 1 + 1 / df * np.dot(np.dot(np.transpose(x - mean), np.linalg.inv(cov)), (x - mean))
         density = normalizing_const * pow(tmp, -((df + p) / 2.))
         self.calculated_pdf = density
-        return density
\ No newline at end of file
+        return density
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        n = len(x)
+        p = self.get_output_dimension()
+        mean = input_values[:, 0:p]
+        cov = input_values[:, p:p+p**2].reshape((n, p, p))
+        df = input_values[:, -1]
+
+        log_det = np.linalg.slogdet(cov)[1]
+        difference = x - mean
+        mahalanobis = np.sum(difference * np.linalg.solve(cov, difference[:, :, np.newaxis])[:, :, 0], axis=1)
+        log_normalizing_const = gammaln((df + p) / 2) - gammaln(df / 2) - p / 2. * np.log(df * np.pi) - 0.5 * log_det
+        return log_normalizing_const - (df + p) / 2. * np.log(1 + mahalanobis / df)
\ No newline at end of file
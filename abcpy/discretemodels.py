@@ -2,7 +2,7 @@ from abcpy.probabilisticmodels import ProbabilisticModel, Discrete, Hyperparamet
 
 import numpy as np
 from scipy.special import comb
-from scipy.stats import poisson, bernoulli
+from scipy.stats import poisson, bernoulli, binom
 
 
 class Bernoulli(Discrete, ProbabilisticModel):
@@ -75,6 +75,30 @@ class Bernoulli(Discrete, ProbabilisticModel):
         return [np.array([x]) for x in result]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        return rng.binomial(1, input_values[:, 0:1], (input_values.shape[0], k))[:, :, np.newaxis]
+
+
     def get_output_dimension(self):
         return self._dimension
 
@@ -100,6 +124,29 @@ class Bernoulli(Discrete, ProbabilisticModel):
         return pmf
 
 
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability mass function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pmf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pmf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        return bernoulli.logpmf(x[:, 0], input_values[:, 0])
+
+
 class Binomial(Discrete, ProbabilisticModel):
     def __init__(self, parameters, name='Binomial'):
         """
@@ -180,6 +227,32 @@ class Binomial(Discrete, ProbabilisticModel):
         return [np.array([x]) for x in result]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values)
+        n = input_values[:, 0:1].astype(int)
+        p = input_values[:, 1:2].astype(float)
+        return rng.binomial(n, p, (input_values.shape[0], k))[:, :, np.newaxis]
+
+
     def get_output_dimension(self):
         return self._dimension
 
@@ -213,6 +286,30 @@ class Binomial(Discrete, ProbabilisticModel):
         return pmf
 
 
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability mass function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pmf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pmf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        # As for a single point, non-integer points are truncated to integers
+        x = np.trunc(np.asarray(x, dtype=float).reshape(len(x), -1)[:, 0])
+        return binom.logpmf(x, input_values[:, 0], input_values[:, 1])
+
+
 class Poisson(Discrete, ProbabilisticModel):
     def __init__(self, parameters, name='Poisson'):
         """This class implements a probabilistic model following a poisson distribution.
@@ -281,6 +378,31 @@ class Poisson(Discrete, ProbabilisticModel):
         return [np.array([x]) for x in result]
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Samples k values for each of n sets of input values at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        k: integer
+            The number of samples that should be drawn for each row of input values.
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, output dimension) containing the sampled values.
+        """
+
+        input_values = np.asarray(input_values)
+        mu = input_values[:, 0:1].astype(int)
+        return rng.poisson(mu, (input_values.shape[0], k))[:, :, np.newaxis]
+
+
     def get_output_dimension(self):
         return self._dimension
 
@@ -304,3 +426,26 @@ class Poisson(Discrete, ProbabilisticModel):
         pmf = poisson(int(input_values[0])).pmf(x)
 
         return pmf
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability mass function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            n x output_dim matrix containing the points at which the log-pmf should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pmf values.
+        """
+
+        input_values = np.asarray(input_values, dtype=float)
+        x = np.asarray(x, dtype=float).reshape(len(x), -1)
+        return poisson.logpmf(x[:, 0], np.trunc(input_values[:, 0]))
@@ -80,6 +80,29 @@ class Distance(metaclass = ABCMeta):
         raise NotImplementedError
 
 
+    def batch_distance(self, d1, d2_list):
+        """Calculates the distances between the data set d1 and each of the data sets in d2_list. Commonly used
+        to score a batch of simulations against the observed data at once.
+
+        The default implementation calls distance for each data set in d2_list; sub-classes can overwrite this method
+        with a vectorized version.
+
+        Parameters
+        ----------
+        d1: Python list
+            Contains n1 data points.
+        d2_list: Python list
+            Contains B data sets, each a Python list of data points.
+
+        Returns
+        -------
+        numpy.ndarray
+            The B distances between d1 and each of the data sets in d2_list.
+        """
+
+        return np.array([self.distance(d1, d2) for d2 in d2_list], dtype=float).reshape(-1,)
+
+
     def _calculate_summary_stat(self,d1,d2):
         """Helper function that extracts the summary statistics s1 and s2 from d1 and
         d2 using the statistics object stored in self.statistics_calc.
@@ -145,6 +168,43 @@ class Euclidean(Distance):
 
         return dist.mean()
 
+
+    def batch_distance(self, d1, d2_list):
+        """Calculates the distances between the data set d1 and each of the data sets in d2_list.
+
+        Parameters
+        ----------
+        d1: list
+            A list, containing a list describing the data set
+        d2_list: list
+            A list, containing B lists describing the data sets
+
+        Returns
+        -------
+        numpy.ndarray
+            The B distances between d1 and each of the data sets in d2_list.
+        """
+        if not isinstance(d1, list):
+            raise TypeError('Data is not of allowed types')
+        if not isinstance(d2_list, list):
+            raise TypeError('Data is not of allowed types')
+
+        # Extract summary statistics from the dataset
+        if(self.s1 is None or self.data_set!=d1):
+            self.s1 = self.statistics_calc.statistics(d1)
+            self.data_set = d1
+
+        result = np.zeros(len(d2_list))
+        for index, d2 in enumerate(d2_list):
+            if not isinstance(d2, list):
+                raise TypeError('Data is not of allowed types')
+            s2 = self.statistics_calc.statistics(d2)
+            # compute all pairwise distances between the statistics at once
+            dist = np.sqrt(np.sum(pow(self.s1[:, np.newaxis, :] - s2[np.newaxis, :, :], 2), axis=2))
+            result[index] = dist.mean()
+
+        return result
+
     
     def dist_max(self):
         return np.inf
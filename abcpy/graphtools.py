@@ -1,9 +1,358 @@
 import numpy as np
-from abcpy.probabilisticmodels import Hyperparameter, ModelResultingFromOperation
+from abcpy.probabilisticmodels import Hyperparameter, ModelResultingFromOperation, InputConnector, Discrete
+
+
+class ExecutionPlan():
+    """
+    This class compiles the graph of probabilistic models below a list of root models into flat lists and index
+    arrays, such that the operations of GraphTools run without recursively traversing the graph. The plan is only
+    valid as long as the graph is not changed, which GraphTools checks using InputConnector.modification_count.
+    """
+
+    def __init__(self, roots):
+        """
+        Parameters
+        ----------
+        roots: list
+            List of abcpy.ProbabilisticModel objects, the root models of the graph.
+        """
+
+        self.roots = list(roots)
+        self.modification_count = InputConnector.modification_count
+
+        # The models to be sampled by sample_from_prior, every model after its parents. Hyperparameters are left out,
+        # since their values never change.
+        self.nodes = []
+        visited = set()
+        for root in self.roots:
+            self._add_nodes(root, False, visited)
+
+        # The free parameters in depth-first search order, which defines the order of the parameter vector
+        self.free_models = []
+        self.mapping = []
+        index = 0
+        visited = set()
+        for root in self.roots:
+            index = self._add_free_models(root, False, visited, index)
+        self.n_parameters = index
+
+        # The slots of the free parameters in the parameter vector
+        self.slot_start = np.array([index for model, index in self.mapping], dtype=int)
+        self.slot_stop = self.slot_start + np.array([model.get_output_dimension() for model in self.free_models],
+                                                    dtype=int)
+
+        # For each free parameter, where each of its input values comes from: either a column of the parameter vector,
+        # a constant folded from a Hyperparameter, or the current output of another model
+        first_column = {model: index for model, index in self.mapping}
+        self.input_columns = []
+        self.input_constants = []
+        self.input_nodes = []
+        for model in self.free_models:
+            input_connector = model.get_input_connector()
+            columns = np.full(model.get_input_dimension(), -1, dtype=int)
+            constants = np.full(model.get_input_dimension(), np.nan)
+            nodes = []
+            for i in range(model.get_input_dimension()):
+                parent = input_connector.get_model(i)
+                parent_index = input_connector.get_model_index(i)
+                if parent in first_column:
+                    columns[i] = first_column[parent] + parent_index
+                elif isinstance(parent, Hyperparameter):
+                    constants[i] = parent.get_stored_output_values()[parent_index]
+                else:
+                    nodes.append((i, parent, parent_index))
+            self.input_columns.append(columns)
+            self.input_constants.append(constants)
+            self.input_nodes.append(nodes)
+
+    def _add_nodes(self, model, is_not_root, visited):
+        for parent in model.get_input_models():
+            if parent not in visited:
+                visited.add(parent)
+                self._add_nodes(parent, True, visited)
+        if is_not_root and not isinstance(model, Hyperparameter):
+            self.nodes.append(model)
+        visited.add(model)
+
+    def _add_free_models(self, model, is_not_root, visited, index):
+        if is_not_root and not isinstance(model, (Hyperparameter, ModelResultingFromOperation)):
+            self.free_models.append(model)
+            self.mapping.append((model, index))
+            index += model.get_output_dimension()
+        visited.add(model)
+        for parent in model.get_input_models():
+            if parent not in visited:
+                index = self._add_free_models(parent, True, visited, index)
+        return index
+
+    def is_valid(self, roots):
+        """
+        Checks whether the plan was compiled for the specified root models and the graph has not changed since.
+
+        Parameters
+        ----------
+        roots: list
+            List of abcpy.ProbabilisticModel objects, the root models of the graph.
+
+        Returns
+        -------
+        boolean
+            True if the plan can be used for the specified root models.
+        """
+
+        return self.modification_count == InputConnector.modification_count and len(self.roots) == len(roots) and \
+               all(plan_root is root for plan_root, root in zip(self.roots, roots))
+
+    def get_input_values(self, index, parameters):
+        """
+        Returns the input values of a free parameter for each row of a matrix of parameter values.
+
+        Parameters
+        ----------
+        index: integer
+            The position of the free parameter in free_models.
+        parameters: numpy.ndarray
+            nxp matrix, each row containing the values of all free parameters in depth-first search order.
+
+        Returns
+        -------
+        numpy.ndarray
+            n x input_dim matrix of input values.
+        """
+
+        columns = self.input_columns[index]
+        input_values = np.tile(self.input_constants[index], (len(parameters), 1))
+        from_parameters = columns >= 0
+        input_values[:, from_parameters] = parameters[:, columns[from_parameters]]
+        for i, parent, parent_index in self.input_nodes[index]:
+            input_values[:, i] = parent.get_stored_output_values()[parent_index]
+        return input_values
+
+
+class EvaluationContext():
+    """
+    This class holds the values of all free parameters of a graph separately from the probabilistic models, such that
+    several parameter vectors can be sampled, simulated from and scored at the same time, for example in different
+    threads, without changing the state of the models or deep-copying the graph.
+
+    The models are only read by the context. Each thread should use its own context and random number generator.
+    Graphs containing models resulting from operations on other models are not supported, since these models sample
+    their parents themselves.
+    """
+
+    def __init__(self, plan):
+        """
+        Parameters
+        ----------
+        plan: abcpy.graphtools.ExecutionPlan
+            The execution plan of the graph.
+        """
+
+        if any(isinstance(node, ModelResultingFromOperation) for node in plan.nodes):
+            raise NotImplementedError('Evaluation contexts do not support models resulting from operations.')
+
+        self.plan = plan
+        self.outputs = {}
+
+    def get_input_values(self, model):
+        """
+        Returns the input values of a model, taking the values of its parents from the context.
+
+        Parameters
+        ----------
+        model: abcpy.ProbabilisticModel
+            A model of the graph.
+
+        Returns
+        -------
+        list
+            The input values of the model.
+        """
+
+        input_connector = model.get_input_connector()
+        input_values = []
+        for i in range(model.get_input_dimension()):
+            parent = input_connector.get_model(i)
+            if parent in self.outputs:
+                input_values.append(self.outputs[parent][input_connector.get_model_index(i)])
+            else:
+                input_values.append(parent.get_stored_output_values()[input_connector.get_model_index(i)])
+        return input_values
+
+    def sample_from_prior(self, rng=np.random.RandomState()):
+        """
+        Samples values for all free parameters of the graph.
+
+        Parameters
+        ----------
+        rng: Random number generator
+            Defines the random number generator to be used
+        """
+
+        # If it was at some point not possible to sample (due to incompatible parameter values provided by the parents), we start from scratch
+        while not self._sample_nodes(rng):
+            pass
+
+    def _sample_nodes(self, rng):
+        self.outputs = {}
+        for node in self.plan.nodes:
+            input_values = self.get_input_values(node)
+            if not node._check_input(input_values):
+                return False
+            output_values = np.array(node.forward_simulate(input_values, 1, rng=rng)[0])
+            if not node._check_output(output_values):
+                return False
+            self.outputs[node] = output_values
+        return True
+
+    def get_parameters(self):
+        """
+        Returns the values of all free parameters in depth-first search order.
+
+        Returns
+        -------
+        list
+            A list containing the values of the free parameters.
+        """
+
+        return [self.outputs[model] for model in self.plan.free_models]
+
+    def set_parameters(self, parameters):
+        """
+        Sets the values of all free parameters.
+
+        Parameters
+        ----------
+        parameters: list
+            The values of all free parameters in depth-first search order.
+
+        Returns
+        -------
+        list: [boolean, integer]
+            Returns whether it was possible to set all parameters and the next index to be considered in the parameters list.
+        """
+
+        outputs = {}
+        for model, start, stop in zip(self.plan.free_models, self.plan.slot_start, self.plan.slot_stop):
+            output_values = np.array(parameters[start:stop])
+            if not model._check_output(output_values):
+                return [False, int(start)]
+            outputs[model] = output_values
+        self.outputs = outputs
+        return [True, self.plan.n_parameters]
+
+    def simulate(self, n_samples_per_param, rng=np.random.RandomState()):
+        """
+        Simulates data of each root model using the values of the free parameters in the context.
+
+        Parameters
+        ----------
+        n_samples_per_param: integer
+            Number of data points in each simulated data set.
+        rng: random number generator
+            The random number generator to be used.
+
+        Returns
+        -------
+        list
+            Each entry corresponds to the simulated data of one model, None if the parameters are not compatible with
+            the models.
+        """
+
+        result = []
+        for model in self.plan.roots:
+            input_values = self.get_input_values(model)
+            if not model._check_input(input_values):
+                return None
+            result.append(model.forward_simulate(input_values, n_samples_per_param, rng=rng))
+        return result
+
+    def log_pdf_of_prior(self):
+        """
+        Calculates the logarithm of the joint probability density function of the prior at the values of the free
+        parameters in the context.
+
+        Returns
+        -------
+        float
+            The resulting log-pdf, -inf outside of the support of the prior.
+        """
+
+        result = 0.
+        for model in self.plan.free_models:
+            x = self.outputs[model]
+            result += model.logpdf(self.get_input_values(model), x[0] if len(x) == 1 else x)
+        return result
+
+    def pdf_of_prior(self):
+        """
+        Calculates the joint probability density function of the prior at the values of the free parameters in the
+        context.
+
+        Returns
+        -------
+        float
+            The resulting pdf.
+        """
+
+        result = 1.
+        for model in self.plan.free_models:
+            x = self.outputs[model]
+            result *= model.pdf(self.get_input_values(model), x[0] if len(x) == 1 else x)
+        return result
 
 
 class GraphTools():
-    """This class implements all methods that will be called recursively on the graph structure."""
+    """This class implements all methods that act on the graph structure. They run against an execution plan of the
+    graph, which is compiled once and cached."""
+
+    _execution_plans = None
+
+    def _get_execution_plan(self, models=None):
+        """
+        Returns the execution plan of the graph below the specified root models. The plan is compiled once and cached
+        until the graph changes.
+
+        Parameters
+        ----------
+        models: list of abcpy.ProbabilisticModel objects
+            The root models of the graph. If no value is provided, the root models are assumed to be the model of the
+            inference method.
+
+        Returns
+        -------
+        abcpy.graphtools.ExecutionPlan
+            The execution plan.
+        """
+        if not models:
+            models = self.model
+        if self._execution_plans is None:
+            self._execution_plans = {}
+
+        key = tuple(id(model) for model in models)
+        plan = self._execution_plans.get(key)
+        if plan is None or not plan.is_valid(models):
+            plan = ExecutionPlan(models)
+            self._execution_plans[key] = plan
+        return plan
+
+    def create_evaluation_context(self, models=None):
+        """
+        Creates an evaluation context for the graph, which holds values of the free parameters separately from the
+        models. Contexts allow to evaluate several parameter vectors concurrently.
+
+        Parameters
+        ----------
+        models: list of abcpy.ProbabilisticModel objects
+            The root models of the graph. If no value is provided, the root models are assumed to be the model of the
+            inference method.
+
+        Returns
+        -------
+        abcpy.graphtools.EvaluationContext
+            A new context without parameter values.
+        """
+        return EvaluationContext(self._get_execution_plan(models))
 
     def sample_from_prior(self, model=None, rng=np.random.RandomState()):
         """
@@ -17,52 +366,72 @@ class GraphTools():
         rng: Random number generator
             Defines the random number generator to be used
         """
-        if(model is None):
-            model = self.model
+        plan = self._get_execution_plan(model)
         # If it was at some point not possible to sample (due to incompatible parameter values provided by the parents), we start from scratch
-        while(not(self._sample_from_prior(model, rng=rng))):
-            self._reset_flags(model)
-
-        # At the end of the algorithm, are flags are reset such that new methods can act on the graph freely
-        self._reset_flags(model)
+        while(not(all(node._forward_simulate_and_store_output(rng=rng) for node in plan.nodes))):
+            pass
 
-    def _sample_from_prior(self, models, is_not_root=False, was_accepted=True, rng=np.random.RandomState()):
+    def sample_from_prior_batch(self, n, rng=np.random.RandomState()):
         """
-        Recursive version of sample_from_prior. Commonly called from within sample_from_prior.
+        Samples n values for all free parameters of the model of the inference method at once. The free parameters
+        are sampled in the order of the execution plan, each with a single call to its forward_simulate_batch method,
+        taking its input values for all rows from the columns sampled before. Rows for which the sampled values of a
+        parent are not valid input are sampled again, as sample_from_prior starts from scratch in that case.
+
+        Graphs containing models resulting from operations on other models are sampled row by row using
+        sample_from_prior. The stored values of the models are not changed, except in this case.
 
         Parameters
         ----------
-        models: list of abcpy.ProbabilisticModel objects
-            Defines the models for which, together with their parents, new parameters will be sampled
-        is_root: boolean
-            Whether the probabilistic models provided in models are root models.
-        was_accepted: boolean
-            Whether the sampled values for all previous/parent models were accepted.
+        n: integer
+            The number of parameter vectors to be sampled.
         rng: Random number generator
             Defines the random number generator to be used
 
         Returns
         -------
-        boolean:
-            Whether it was possible to sample new values for all nodes of the graph.
+        numpy.ndarray
+            nxp matrix, each row containing the values of all free parameters in depth-first search order.
         """
+        plan = self._get_execution_plan()
+        if any(isinstance(node, ModelResultingFromOperation) for node in plan.nodes):
+            parameters = []
+            for i in range(n):
+                self.sample_from_prior(rng=rng)
+                parameters.append(np.hstack(self.get_parameters()))
+            return np.array(parameters, dtype=float).reshape(n, plan.n_parameters)
+
+        position = {model: i for i, model in enumerate(plan.free_models)}
+        parameters = np.zeros((n, plan.n_parameters))
+        missing = np.arange(n)
+        while len(missing) > 0:
+            block = np.zeros((len(missing), plan.n_parameters))
+            valid = np.ones(len(missing), dtype=bool)
+            for node in plan.nodes:
+                i = position[node]
+                input_values = plan.get_input_values(i, block)
+                # Inputs which only depend on hyperparameters are the same for all rows and checked once
+                if np.all(plan.input_columns[i] < 0):
+                    valid &= node._check_input(node.get_input_values())
+                else:
+                    valid &= [is_valid and node._check_input(self._get_input_list(node, row))
+                              for is_valid, row in zip(valid, input_values)]
+                if not np.any(valid):
+                    break
+                samples = np.asarray(node.forward_simulate_batch(input_values[valid], 1, rng=rng), dtype=float)
+                block[valid, plan.slot_start[i]:plan.slot_stop[i]] = samples.reshape(np.sum(valid), -1)
+            parameters[missing[valid]] = block[valid]
+            missing = missing[~valid]
+        return parameters
 
-        # If it was so far possible to sample parameters for all nodes, the current node as well as its parents are sampled, using depth-first search
-        if(was_accepted):
-            for model in models:
-                for parent in model.get_input_models():
-                    if(not(parent.visited)):
-                        parent.visited = True
-                        was_accepted = self._sample_from_prior([parent], is_not_root = True, was_accepted=was_accepted, rng=rng)
-                        if(not(was_accepted)):
-                            return False
-
-                if(is_not_root and not(model._forward_simulate_and_store_output(rng=rng))):
-                    return False
-
-                model.visited = True
-
-        return was_accepted
+    def _get_input_list(self, model, input_values):
+        """
+        Converts a row of input values of a model, as returned by ExecutionPlan.get_input_values, to the list
+        get_input_values would return, with integer values for inputs coming from discrete models.
+        """
+        input_connector = model.get_input_connector()
+        return [int(value) if isinstance(input_connector.get_model(i), Discrete) else value
+                for i, value in enumerate(input_values)]
 
     def _reset_flags(self, models=None):
         """
@@ -85,7 +454,7 @@ class GraphTools():
             model.visited = False
             model.calculated_pdf = None
 
-    def pdf_of_prior(self, models, parameters, mapping=None, is_root=True):
+    def pdf_of_prior(self, models, parameters):
         """
         Calculates the joint probability density function of the prior of the specified models at the given parameter values.
         Commonly used to check whether new parameters are valid given the prior, as well as to calculate acceptance probabilities.
@@ -96,135 +465,136 @@ class GraphTools():
             Defines the models for which the pdf of their prior should be evaluated
         parameters: python list
             The parameters at which the pdf should be evaluated
-        mapping: list of tupels
-            Defines the mapping of probabilistic models and index in a parameter list.
-        is_root: boolean
-            A flag specifying whether the provided models are the root models. This is to ensure that the pdf is calculated correctly.
 
         Returns
         -------
-        list
-            The resulting pdf,as well as the next index to be considered in the parameters list.
+        float
+            The resulting pdf.
         """
         self.set_parameters(parameters)
-        result = self._recursion_pdf_of_prior(models, parameters, mapping, is_root)
+        result = 1.
+        for model, x in self._get_prior_points(models, parameters):
+            result *= model.pdf(model.get_input_values(), x)
         return result
 
-    def _recursion_pdf_of_prior(self, models, parameters, mapping=None, is_root=True):
+    def log_pdf_of_prior(self, models, parameters):
         """
-        Calculates the joint probability density function of the prior of the specified models at the given parameter values.
-        Commonly used to check whether new parameters are valid given the prior, as well as to calculate acceptance probabilities.
+        Calculates the logarithm of the joint probability density function of the prior of the specified models at
+        the given parameter values. The log-densities of the individual models are summed, so that the result does
+        not underflow for high-dimensional parameters.
 
         Parameters
         ----------
         models: list of abcpy.ProbabilisticModel objects
-            Defines the models for which the pdf of their prior should be evaluated
+            Defines the models for which the log-pdf of their prior should be evaluated
         parameters: python list
-            The parameters at which the pdf should be evaluated
-        mapping: list of tupels
-            Defines the mapping of probabilistic models and index in a parameter list.
-        is_root: boolean
-            A flag specifying whether the provided models are the root models. This is to ensure that the pdf is calculated correctly.
+            The parameters at which the log-pdf should be evaluated
 
         Returns
         -------
-        list
-            The resulting pdf,as well as the next index to be considered in the parameters list.
-        """
-        # At the beginning of calculation, obtain the mapping
-        if(is_root):
-            mapping, garbage_index = self._get_mapping()
-        # The pdf of each root model is first calculated seperately
-        result = [1.]*len(models)
-
-        for i, model in enumerate(models):
-            # If the model is not a root model, the pdf of this model, given the prior, should be calculated
-            if(not(is_root) and not(isinstance(model, ModelResultingFromOperation))):
-                # Define a helper list which will contain the parameters relevant to the current model for pdf calculation
-                relevant_parameters = []
-
-                for mapped_model, model_index in mapping:
-                    if(mapped_model==model):
-                        parameter_index = model_index
-                        for j in range(model.get_output_dimension()):
-                            relevant_parameters.append(parameters[parameter_index])
-                            parameter_index+=1
-                        break
-                if(len(relevant_parameters)==1):
-                    relevant_parameters = relevant_parameters[0]
-                else:
-                    relevant_parameters = np.array(relevant_parameters)
-            else:
-                relevant_parameters=[]
-
-            # Mark whether the parents of each model have been visited before for this model to avoid repeated calculation.
-            visited_parents = [False for j in range(len(model.get_input_models()))]
-            # For each parent, the pdf of this parent has to be calculated as well.
-            for parent_index, parent in enumerate(model.get_input_models()):
-                # Only calculate the pdf if the parent has never been visited for this model
-                if(not(visited_parents[parent_index])):
-                    pdf = self._recursion_pdf_of_prior([parent], parameters, mapping=mapping, is_root=False)
-                    input_models = model.get_input_models()
-                    for j in range(len(input_models)):
-                        if input_models[j][0] == parent:
-                            visited_parents[j]=True
-                    result[i] *= pdf
-            if(not(is_root)):
-                if(model.calculated_pdf is None):
-                    result[i] *= model.pdf(model.get_input_values(),relevant_parameters)
-                else:
-                    result[i] *= 1 
+        float
+            The resulting log-pdf, -inf outside of the support of the prior.
+        """
+        self.set_parameters(parameters)
+        result = 0.
+        for model, x in self._get_prior_points(models, parameters):
+            result += model.logpdf(model.get_input_values(), x)
+        return result
 
-        # Multiply the pdfs of all roots together to give an overall pdf.
-        temporary_result = result
-        result = 1.
-        for individual_result in temporary_result:
-            result *= individual_result
+    def _get_prior_points(self, models, parameters):
+        """
+        Returns each free parameter of the prior of the specified models, together with its values in a parameter
+        list.
 
+        Parameters
+        ----------
+        models: list of abcpy.ProbabilisticModel objects
+            Defines the models whose prior should be considered
+        parameters: python list
+            The values of all free parameters in depth-first search order.
+
+        Returns
+        -------
+        list
+            Tuples containing a model and its values, a single number if the model is one dimensional.
+        """
+        first_column = {model: index for model, index in self._get_execution_plan().mapping}
+        result = []
+        for model in self._get_execution_plan(models).free_models:
+            index = first_column[model]
+            if model.get_output_dimension() == 1:
+                result.append((model, parameters[index]))
+            else:
+                result.append((model, np.array(parameters[index:index + model.get_output_dimension()])))
         return result
 
-    def _get_mapping(self, models=None, index=0, is_not_root=False):
-        """Returns a mapping of model and first index corresponding to the outputs in this model in parameter lists.
+    def pdf_of_prior_batch(self, models, parameters):
+        """
+        Calculates the joint probability density function of the prior of the specified models for each row of a
+        matrix of parameter values.
 
         Parameters
         ----------
-        models: list
-            List of abcpy.ProbabilisticModel objects
-        index: integer
-            Next index to be mapped in a parameter list
-        is_not_root: boolean
-            Specifies whether the models specified are root models.
+        models: list of abcpy.ProbabilisticModel objects
+            Defines the models for which the pdf of their prior should be evaluated
+        parameters: numpy.ndarray
+            nxp matrix, each row containing the values of all free parameters in depth-first search order.
 
         Returns
         -------
-        list
-            A list containing two entries. The first entry corresponds to the mapping of the root models, including their parents. The second entry corresponds to the next index to be considered in a parameter list.
+        numpy.ndarray
+            The n resulting pdf values.
         """
+        return np.exp(self.log_pdf_of_prior_batch(models, parameters))
 
-        if(models is None):
-            models = self.model
+    def log_pdf_of_prior_batch(self, models, parameters):
+        """
+        Calculates the logarithm of the joint probability density function of the prior of the specified models for
+        each row of a matrix of parameter values. The input values of each model are gathered for all rows using the
+        execution plan of the graph, and its log-densities are evaluated at once using its logpdf_batch method.
 
-        mapping = []
+        Parameters
+        ----------
+        models: list of abcpy.ProbabilisticModel objects
+            Defines the models for which the log-pdf of their prior should be evaluated
+        parameters: numpy.ndarray
+            nxp matrix, each row containing the values of all free parameters in depth-first search order.
 
-        for model in models:
-            # If this model corresponds to an unvisited free parameter, add it to the mapping
-            if(is_not_root and not(model.visited) and not(isinstance(model, Hyperparameter)) and not(isinstance(model, ModelResultingFromOperation))):
-                mapping.append((model, index))
-                index+=model.get_output_dimension()
-            # Add all parents to the mapping, if applicable
-            for parent in model.get_input_models():
-                parent_mapping, index = self._get_mapping([parent], index=index, is_not_root=True)
-                parent.visited=True
-                for mappings in parent_mapping:
-                    mapping.append(mappings)
+        Returns
+        -------
+        numpy.ndarray
+            The n resulting log-pdf values, -inf outside of the support of the prior.
+        """
+        parameters = np.asarray(parameters)
+        if parameters.dtype == object or parameters.ndim != 2:
+            parameters = np.array([np.hstack(row) for row in parameters], dtype=float).reshape(len(parameters), -1)
+
+        plan = self._get_execution_plan()
+        position = {model: i for i, model in enumerate(plan.free_models)}
+
+        result = np.zeros(len(parameters))
+        for model in self._get_execution_plan(models).free_models:
+            i = position[model]
+            x = parameters[:, plan.slot_start[i]:plan.slot_stop[i]]
+            result += model.logpdf_batch(plan.get_input_values(i, parameters), x)
+        return result
 
-            model.visited=True
+    def _get_mapping(self, models=None):
+        """Returns a mapping of model and first index corresponding to the outputs in this model in parameter lists.
 
-        # At the end of the algorithm, reset all flags such that another method can act on the graph freely.
-        if(not(is_not_root)):
-            self._reset_flags()
+        Parameters
+        ----------
+        models: list
+            List of abcpy.ProbabilisticModel objects, the root models. If no value is provided, the root models are
+            assumed to be the model of the inference method.
 
-        return [mapping, index]
+        Returns
+        -------
+        list
+            A list containing two entries. The first entry corresponds to the mapping of the root models, including their parents. The second entry corresponds to the next index to be considered in a parameter list.
+        """
+        plan = self._get_execution_plan(models)
+        return [list(plan.mapping), plan.n_parameters]
 
     def _get_names_and_parameters(self):
         """
@@ -240,12 +610,13 @@ class GraphTools():
         return_value = []
 
         for model, index in mapping:
-            return_value.append((model.name, self.accepted_parameters_manager.get_accepted_parameters_bds_values([model])))
+            # The values are copied, as they are stored in the journal while the accepted parameters may change
+            return_value.append((model.name, np.array(self.accepted_parameters_manager.get_accepted_parameters_bds_values([model]))))
 
         return return_value
 
 
-    def get_parameters(self, models=None, is_root=True):
+    def get_parameters(self, models=None):
         """
         Returns the current values of all free parameters in the model. Commonly used before perturbing the parameters
         of the model.
@@ -255,41 +626,16 @@ class GraphTools():
         models: list of abcpy.ProbabilisticModel objects
             The models for which, together with their parents, the parameter values should be returned. If no value is
             provided, the root models are assumed to be the model of the inference method.
-        is_root: boolean
-            Specifies whether the current models are at the root. This ensures that the values corresponding to
-            simulated observations will not be returned.
 
         Returns
         -------
         list
             A list containing all currently sampled values of the free parameters.
         """
-        parameters = []
-
-        # If we are at the root, we set models to the model attribute of the inference method
-        if is_root:
-            models = self.model
-
-        for model in models:
-            # If we are not at the root, the sampled values for the current node should be returned
-            if is_root == False and not isinstance(model, (ModelResultingFromOperation, Hyperparameter)):
-                parameters.append(model.get_stored_output_values())
-                model.visited = True
-
-            # Implement a depth-first search to return also the sampled values associated with each parent of the model
-            for parent in model.get_input_models():
-                if not parent.visited:
-                    parameters += self.get_parameters(models=[parent], is_root=False)
-                    parent.visited = True
+        return [model.get_stored_output_values() for model in self._get_execution_plan(models).free_models]
 
-        # At the end of the algorithm, are flags are reset such that new methods can act on the graph freely
-        if is_root:
-            self._reset_flags()
 
-        return parameters
-
-
-    def set_parameters(self, parameters, models=None, index=0, is_root=True):
+    def set_parameters(self, parameters, models=None):
         """
         Sets new values for the currently used values of each random variable.
         Commonly used after perturbing the parameter values using a kernel.
@@ -298,50 +644,21 @@ class GraphTools():
         ----------
         parameters: list
             Defines the values to which the respective parameter values of the models should be set
-        model: list of abcpy.ProbabilisticModel objects
+        models: list of abcpy.ProbabilisticModel objects
              Defines all models for which, together with their parents, new values should be set. If no value is provided, the root models are assumed to be the model of the inference method.
-        index: integer
-            The current index to be considered in the parameters list
-        is_root: boolean
-            Defines whether the current models are at the root. This ensures that only values corresponding to random variables will be set.
 
         Returns
         -------
         list: [boolean, integer]
             Returns whether it was possible to set all parameters and the next index to be considered in the parameters list.
         """
+        plan = self._get_execution_plan(models)
+        for model, start, stop in zip(plan.free_models, plan.slot_start, plan.slot_stop):
+            if not model.set_output_values(np.array(parameters[start:stop])):
+                return [False, int(start)]
+        return [True, plan.n_parameters]
 
-        # If we are at the root, we set models to the model attribute of the inference method
-        if is_root:
-            models = self.model
-
-        for model in models:
-            # New parameters should only be set in case we are not at the root
-            if not is_root and not isinstance(model, ModelResultingFromOperation):
-                new_output_values = np.array(parameters[index:index + model.get_output_dimension()])
-                if not model.set_output_values(new_output_values):
-                    return [False, index]
-                index += model.get_output_dimension()
-                model.visited = True
-
-            # New parameters for all parents are set using a depth-first search
-            for parent in model.get_input_models():
-                if not parent.visited and not isinstance(parent, Hyperparameter):
-                    is_set, index = self.set_parameters(parameters, models=[parent], index=index, is_root=False)
-                    if not is_set:
-                        # At the end of the algorithm, are flags are reset such that new methods can act on the graph freely
-                        if is_root:
-                            self._reset_flags()
-                        return [False, index]
-            model.visited = True
-
-        # At the end of the algorithm, are flags are reset such that new methods can act on the graph freely
-        if(is_root):
-            self._reset_flags()
-
-        return [True, index]
-
-    def get_correct_ordering(self, parameters_and_models, models=None, is_root = True):
+    def get_correct_ordering(self, parameters_and_models, models=None):
         """
         Orders the parameters returned by a kernel in the order required by the graph.
         Commonly used when perturbing the parameters.
@@ -358,34 +675,14 @@ class GraphTools():
         list
             The ordering which can be used by recursive functions on the graph.
         """
-        ordered_parameters = []
-
-        # If we are at the root, we set models to the model attribute of the inference method
-        if(is_root):
-            models=self.model
-
-        for model in models:
-            if(not(model.visited)):
-                model.visited = True
-
-                # Check all entries in parameters_and_models to determine whether the current model is contained within it
-                for corresponding_model, parameter in parameters_and_models:
-                    if(corresponding_model==model):
-                        for param in parameter:
-                            ordered_parameters.append(param)
-                        break
-
-                # Recursively order all the parents of the current model
-                for parent in model.get_input_models():
-                    if(not(parent.visited)):
-                        parent_ordering = self.get_correct_ordering(parameters_and_models, models=[parent],is_root=False)
-                        for parent_parameters in parent_ordering:
-                            ordered_parameters.append(parent_parameters)
-
-        # At the end of the algorithm, are flags are reset such that new methods can act on the graph freely
-        if(is_root):
-            self._reset_flags()
+        parameters_of_models = {}
+        for model, parameter in parameters_and_models:
+            parameters_of_models.setdefault(model, parameter)
 
+        ordered_parameters = []
+        for model in self._get_execution_plan(models).free_models:
+            if model in parameters_of_models:
+                ordered_parameters.extend(parameters_of_models[model])
         return ordered_parameters
 
     def simulate(self, n_samples_per_param, rng=np.random.RandomState()):
@@ -410,3 +707,44 @@ class GraphTools():
             else:
                 return None
         return result
+
+    def simulate_batch(self, parameters, n_samples_per_param, rng=np.random.RandomState()):
+        """Simulates data of each model for each row of a matrix of parameters. Commonly used to simulate a whole
+        block of proposed parameters at once.
+
+        Parameters
+        ----------
+        parameters: numpy.ndarray
+            Bxp matrix, each row containing the values of all free parameters in depth-first search order.
+        n_samples_per_param: integer
+            Number of data points in each simulated data set.
+        rng: random number generator
+            The random number generator to be used.
+
+        Returns
+        -------
+        list
+            B entries, each a list containing the simulated data of one model for the corresponding row, or None if
+            the parameters of that row were not compatible with the models.
+        """
+        # Collect the input values of each model for all compatible rows, such that every model is simulated with a
+        # single call to forward_simulate_batch
+        compatible_rows = []
+        input_values = [[] for model in self.model]
+        for index, row in enumerate(parameters):
+            accepted, last_index = self.set_parameters(row)
+            if not accepted:
+                continue
+            row_values = [model.get_input_values() for model in self.model]
+            if all(model._check_input(values) for model, values in zip(self.model, row_values)):
+                compatible_rows.append(index)
+                for model_values, values in zip(input_values, row_values):
+                    model_values.append(values)
+
+        result = [None] * len(parameters)
+        if compatible_rows:
+            simulations = [model.forward_simulate_batch(np.array(values), n_samples_per_param, rng=rng)
+                           for model, values in zip(self.model, input_values)]
+            for position, index in enumerate(compatible_rows):
+                result[index] = [list(simulation[position]) for simulation in simulations]
+        return result
@@ -7,10 +7,16 @@ from abcpy.perturbationkernel import DefaultKernel
 from abcpy.jointdistances import LinearCombination
 from abcpy.jointapprox_lhd import ProductCombination
 import copy
+import os
+import pickle
+import time
+import warnings
 
 import numpy as np
 from abcpy.output import Journal
+from abcpy.rngstreams import RNGStreams
 from scipy import optimize
+from scipy.special import logsumexp
 
 class InferenceMethod(GraphTools, metaclass = ABCMeta):
     """
@@ -18,6 +24,12 @@ class InferenceMethod(GraphTools, metaclass = ABCMeta):
 
     """
 
+    # Budget of the current call to sample(), see _set_budget
+    max_simulations = None
+    max_time = None
+    _deadline = None
+    _task_budget = None
+
     def __getstate__(self):
         """Cloudpickle is used with the MPIBackend. This function ensures that the backend itself
         is not pickled
@@ -62,12 +74,220 @@ class InferenceMethod(GraphTools, metaclass = ABCMeta):
         """To be overwritten by any sub-class: an attribute specifying the number of data points in each simulated         data set."""
         raise NotImplementedError
 
+    def _split_in_chunks(self, array, chunk_size):
+        """
+        Splits an array along its first axis into chunks of at most chunk_size rows. Commonly used to parallelize
+        vectorized computations over chunks instead of single particles.
+
+        Parameters
+        ----------
+        array: numpy.ndarray
+            The array to be split.
+        chunk_size: integer
+            The maximal number of rows of each chunk.
+
+        Returns
+        -------
+        list
+            The chunks of the array, in order.
+        """
+
+        return [array[start:start + chunk_size] for start in range(0, len(array), chunk_size)]
+
+    def _set_budget(self, max_simulations, max_time):
+        """
+        Sets the simulation budget and the wall-clock deadline of a call to sample().
+
+        Parameters
+        ----------
+        max_simulations: integer
+            Maximal total number of simulations, or None for no limit.
+        max_time: float
+            Maximal wall-clock time in seconds, or None for no limit.
+        """
+
+        self.max_simulations = max_simulations
+        self.max_time = max_time
+        self._deadline = None if max_time is None else time.time() + max_time
+        self._task_budget = None
+
+    def _budget_exhausted(self):
+        """
+        Checks on the master whether the simulation budget or the deadline of sample() is exhausted.
+
+        Returns
+        -------
+        string
+            'max_simulations' or 'max_time' if the corresponding limit is reached, None otherwise.
+        """
+
+        if self.max_simulations is not None and self.simulation_counter >= self.max_simulations:
+            return 'max_simulations'
+        if self._deadline is not None and time.time() >= self._deadline:
+            return 'max_time'
+        return None
+
+    def _abort_reason(self):
+        """
+        Returns the reason why tasks of the last map stopped before completing their work.
+
+        Returns
+        -------
+        string
+            'max_time' if the deadline passed, 'max_simulations' otherwise.
+        """
+
+        if self._deadline is not None and time.time() >= self._deadline:
+            return 'max_time'
+        return 'max_simulations'
+
+    def _add_last_generation(self, journal, generation):
+        """
+        Writes the last completed generation to the journal if sample() stopped because the simulation budget or the
+        deadline ran out. With full_output=0 only the final generation is written, so that otherwise the journal of a
+        run stopped early would be empty.
+
+        Parameters
+        ----------
+        journal: abcpy.output.Journal
+            The journal of the run.
+        generation: dict
+            The last completed generation which was not written yet, or None if there is none. It holds the
+            'parameters' and 'number_of_simulations' of the generation, and its 'weights', 'log_weights' and
+            'opt_values' if the inference scheme records them.
+        """
+
+        if generation is None or journal.configuration["stop_reason"] not in ('max_simulations', 'max_time'):
+            return
+        journal.add_parameters(generation["parameters"])
+        if "weights" in generation:
+            journal.add_weights(generation["weights"])
+        if "log_weights" in generation:
+            journal.add_log_weights(generation["log_weights"])
+        if "opt_values" in generation:
+            journal.add_opt_values(generation["opt_values"])
+        self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=generation["parameters"])
+        names_and_parameters = self._get_names_and_parameters()
+        journal.add_user_parameters(names_and_parameters)
+        journal.number_of_simulations.append(generation["number_of_simulations"])
+
+    def _save_checkpoint(self, checkpoint_file, state):
+        """
+        Atomically writes the state of a finished generation, together with the state of the random number generators
+        and the simulation counter, to checkpoint_file. The state is first written to a temporary file which then
+        replaces the checkpoint, such that a killed run always leaves the last complete checkpoint behind.
+
+        Parameters
+        ----------
+        checkpoint_file: string
+            The location of the checkpoint.
+        state: dict
+            The state of the inference scheme after the finished generation.
+        """
+
+        state = dict(state, rng_state=self.rng.get_state(), rng_streams=self.rng_streams,
+                     simulation_counter=self.simulation_counter)
+        temporary_file = checkpoint_file + '.tmp'
+        with open(temporary_file, 'wb') as output:
+            pickle.dump(state, output, -1)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary_file, checkpoint_file)
+
+    def _load_checkpoint(self, checkpoint_file):
+        """
+        Reads a checkpoint written by _save_checkpoint and restores the random number generators and the simulation
+        counter from it.
+
+        Parameters
+        ----------
+        checkpoint_file: string
+            The location of the checkpoint.
+
+        Returns
+        -------
+        dict
+            The state of the inference scheme after the last finished generation, or None if there is no checkpoint.
+        """
+
+        if checkpoint_file is None or not os.path.exists(checkpoint_file):
+            return None
+        with open(checkpoint_file, 'rb') as input:
+            state = pickle.load(input)
+        self.rng.set_state(state["rng_state"])
+        self.rng_streams = state["rng_streams"]
+        self.simulation_counter = state["simulation_counter"]
+        return state
+
+    def _share_budget(self, keys):
+        """
+        Shares the remaining simulation budget among the tasks of the next map, such that together they do not exceed
+        it: every task gets the integer share of the remaining simulations, and the first tasks one simulation more
+        until the remainder is used up. If less simulations remain than there are tasks, the last tasks get none.
+
+        Parameters
+        ----------
+        keys: numpy.ndarray
+            The consecutive keys of the random number streams of the tasks of the next map, as returned by
+            RNGStreams.keys.
+        """
+
+        if self.max_simulations is None:
+            self._task_budget = None
+        else:
+            remaining = max(0, self.max_simulations - self.simulation_counter)
+            n_tasks = max(1, len(keys))
+            first_key = int(keys[0]) if len(keys) > 0 else 0
+            self._task_budget = (first_key, remaining // n_tasks, remaining % n_tasks)
+
+    def _task_simulations(self, key):
+        """
+        Returns the number of simulations the task with the given key may run, or None if there is no limit.
+
+        Parameters
+        ----------
+        key: integer
+            The key of the random number stream of the task.
+        """
+
+        if self._task_budget is None:
+            return None
+        first_key, share, remainder = self._task_budget
+        return share + (1 if int(key) - first_key < remainder else 0)
+
+    def _proposal_allowed(self, counter, key):
+        """
+        Checks on a worker, before each proposal, whether a task that has done counter simulations may simulate again.
+
+        Parameters
+        ----------
+        counter: integer
+            The number of simulations done by the task so far.
+        key: integer
+            The key of the random number stream of the task.
+
+        Returns
+        -------
+        boolean
+            False if the task exceeded its share of the simulation budget or the deadline passed.
+        """
+
+        task_simulations = self._task_simulations(key)
+        if task_simulations is not None and counter >= task_simulations:
+            return False
+        if self._deadline is not None and time.time() >= self._deadline:
+            return False
+        return True
+
 
 class BaseMethodsWithKernel(metaclass = ABCMeta):
     """
     This abstract base class represents inference methods that have a kernel.
     """
 
+    # number of particles for which the weights are calculated by a single task
+    chunk_size = 100
+
     @abstractproperty
     def kernel(self):
         """To be overwritten by any sub-class: an attribute specifying the transition or perturbation kernel."""
@@ -97,13 +317,11 @@ class BaseMethodsWithKernel(metaclass = ABCMeta):
             # Get new parameters of the graph
             new_parameters = self.kernel.update(self.accepted_parameters_manager, column_index, rng=rng)
 
-            self._reset_flags()
-
             # Order the parameters provided by the kernel in depth-first search order
             correctly_ordered_parameters = self.get_correct_ordering(new_parameters)
 
             # Try to set new parameters
-            accepted, last_index = self.set_parameters(correctly_ordered_parameters, 0)
+            accepted, last_index = self.set_parameters(correctly_ordered_parameters)
             if accepted:
                 break
             current_epoch+=1
@@ -113,6 +331,65 @@ class BaseMethodsWithKernel(metaclass = ABCMeta):
 
         return [True, correctly_ordered_parameters]
 
+    def _prior_and_kernel_ratio(self, mapping_for_kernels, index, theta, new_theta):
+        """
+        Calculates the ratio of the priors times the ratio of the kernels of a Metropolis-Hastings move from theta to
+        new_theta, i.e. the part of the acceptance probability which does not depend on simulated data. Commonly used
+        during inference. The ratio is computed from log-densities, such that it neither underflows nor divides zero
+        by zero for high-dimensional parameters. The parameters of the graph are set to theta afterwards.
+
+        Parameters
+        ----------
+        mapping_for_kernels: list
+            The mapping of the models to be used by the kernels.
+        index: integer
+            The row of the accepted parameters at which the kernel is centred.
+        theta: numpy.ndarray
+            The current parameters.
+        new_theta: numpy.ndarray
+            The proposed parameters.
+
+        Returns
+        -------
+        float
+            The prior ratio times the kernel ratio.
+        """
+        log_ratio_prior_prob = self.log_pdf_of_prior(self.model, new_theta) - self.log_pdf_of_prior(self.model, theta)
+        # The kernel centred at the given row, evaluated at both points
+        kernel_log_pdfs = self.kernel.logpdf(mapping_for_kernels, self.accepted_parameters_manager, [theta, new_theta],
+                                             row_index=index)
+        log_ratio_likelihood_prob = kernel_log_pdfs[0, 0] - kernel_log_pdfs[1, 0]
+        return np.exp(log_ratio_prior_prob + log_ratio_likelihood_prob)
+
+    def _calculate_log_weights(self, thetas):
+        """
+        Calculates the logarithm of the (unnormalized) weights for a chunk of parameters using accepted_parameters,
+        accepted_weights and accepted_cov_mats. The mixture density of the kernels is evaluated for the whole chunk at
+        once in log space.
+
+        Parameters
+        ----------
+        thetas: np.array
+            mxp matrix containing m model parameters, where p is the number of parameters
+
+        Returns
+        -------
+        np.array
+            the logarithm of the new weights for each theta
+        """
+        if self.accepted_parameters_manager.kernel_parameters_bds is None:
+            return np.full(len(thetas), -np.log(self.n_samples))
+
+        thetas = np.array([np.hstack(theta) for theta in thetas], dtype=float)
+
+        log_prior = self.log_pdf_of_prior_batch(self.model, thetas)
+
+        # Get the mapping of the models to be used by the kernels
+        mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(self.accepted_parameters_manager.model)
+
+        log_denominator = self.kernel.log_mixture_pdf(mapping_for_kernels, self.accepted_parameters_manager, thetas)
+        return log_prior - log_denominator
+
 
 class BaseLikelihood(InferenceMethod, BaseMethodsWithKernel, metaclass = ABCMeta):
     """
@@ -158,10 +435,12 @@ class RejectionABC(InferenceMethod):
     model = None
     distance = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
     epsilon = None
+    batch_size = None
 
     backend = None
 
@@ -171,6 +450,7 @@ class RejectionABC(InferenceMethod):
         self.distance = LinearCombination(root_models, distances)
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # An object managing the bds objects
         self.accepted_parameters_manager = AcceptedParametersManager(self.model)
@@ -178,7 +458,8 @@ class RejectionABC(InferenceMethod):
         # counts the number of simulate calls
         self.simulation_counter = 0
 
-    def sample(self, observations, n_samples, n_samples_per_param, epsilon, full_output=0):
+    def sample(self, observations, n_samples, n_samples_per_param, epsilon, full_output=0, batch_size=None,
+               max_simulations=None, max_time=None):
         """
         Samples from the posterior distribution of the model parameter given the observed
         data observations.
@@ -196,6 +477,16 @@ class RejectionABC(InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        batch_size: integer, optional
+            If provided, each task accepts up to batch_size samples by repeatedly drawing blocks of batch_size
+            parameters from the prior, which are simulated and compared to the observations at once. The default
+            value is None, meaning each task accepts a single sample.
+        max_simulations: integer, optional
+            Maximal total number of simulations. If it is reached, the parameters accepted so far are returned. The
+            default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. If it is reached, the parameters accepted so far are returned. The
+            default value is None, meaning no limit.
 
         Returns
         -------
@@ -208,32 +499,53 @@ class RejectionABC(InferenceMethod):
         self.n_samples = n_samples
         self.n_samples_per_param = n_samples_per_param
         self.epsilon = epsilon
+        self._set_budget(max_simulations, max_time)
 
         journal = Journal(full_output)
         journal.configuration["n_samples"] = self.n_samples
         journal.configuration["n_samples_per_param"] = self.n_samples_per_param
         journal.configuration["epsilon"] = self.epsilon
+        journal.configuration["stop_reason"] = None
 
         accepted_parameters = None
 
         # main Rejection ABC algorithm
-        seed_arr = self.rng.randint(1, n_samples * n_samples, size=n_samples, dtype=np.int32)
-        rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-        rng_pds = self.backend.parallelize(rng_arr)
-
-        accepted_parameters_and_counter_pds = self.backend.map(self._sample_parameter, rng_pds)
-        accepted_parameters_and_counter = self.backend.collect(accepted_parameters_and_counter_pds)
-        accepted_parameters, counter = [list(t) for t in zip(*accepted_parameters_and_counter)]
+        if batch_size is None:
+            key_arr = self.rng_streams.keys(n_samples)
+            key_pds = self.backend.parallelize(key_arr)
+
+            self._share_budget(key_arr)
+            accepted_parameters_and_counter_pds = self.backend.map(self._sample_parameter, key_pds)
+            accepted_parameters_and_counter = self.backend.collect(accepted_parameters_and_counter_pds)
+            accepted_parameters, counter = [list(t) for t in zip(*accepted_parameters_and_counter)]
+            # Tasks which ran out of budget did not accept a parameter
+            accepted_parameters = [theta for theta in accepted_parameters if theta is not None]
+        else:
+            self.batch_size = batch_size
+            # Each task has to accept batch_size samples, except the last one which accepts the remaining ones
+            quota_arr = [min(batch_size, n_samples - start) for start in range(0, n_samples, batch_size)]
+            key_arr = self.rng_streams.keys(len(quota_arr))
+            key_and_quota_arr = np.column_stack((key_arr, quota_arr))
+            key_and_quota_pds = self.backend.parallelize(key_and_quota_arr)
+
+            self._share_budget(key_arr)
+            accepted_parameters_and_counter_pds = self.backend.map(self._sample_parameter_batch, key_and_quota_pds)
+            accepted_parameters_and_counter = self.backend.collect(accepted_parameters_and_counter_pds)
+            accepted_parameters_batches, counter = [list(t) for t in zip(*accepted_parameters_and_counter)]
+            accepted_parameters = [theta for batch in accepted_parameters_batches for theta in batch]
 
         for count in counter:
             self.simulation_counter+=count
 
+        if len(accepted_parameters) < n_samples:
+            journal.configuration["stop_reason"] = self._abort_reason()
+
         accepted_parameters = np.array(accepted_parameters)
 
         self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters)
 
         journal.add_parameters(accepted_parameters)
-        journal.add_weights(np.ones((n_samples, 1)))
+        journal.add_weights(np.ones((len(accepted_parameters), 1)))
         self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters)
         names_and_parameters = self._get_names_and_parameters()
         journal.add_user_parameters(names_and_parameters)
@@ -242,7 +554,7 @@ class RejectionABC(InferenceMethod):
 
         return journal
 
-    def _sample_parameter(self, rng):
+    def _sample_parameter(self, key):
         """
         Samples a single model parameter and simulates from it until
         distance between simulated outcome and the observation is
@@ -250,18 +562,21 @@ class RejectionABC(InferenceMethod):
 
         Parameters
         ----------
-        rng: random number generator
-            The random number generator to be used.
+        key: integer
+            The key of the random number stream of the task.
         Returns
         -------
         np.array
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before
         """
+        rng = self.rng_streams.generator(key)
         distance = self.distance.dist_max()
 
         counter = 0
 
         while distance > self.epsilon:
+            if not self._proposal_allowed(counter, key):
+                return (None, counter)
             # Accept new parameter value if the distance is less than epsilon
             self.sample_from_prior(rng=rng)
             theta = np.array(self.get_parameters(self.model)).reshape(-1,)
@@ -273,6 +588,53 @@ class RejectionABC(InferenceMethod):
                 distance = self.distance.dist_max()
         return (theta, counter)
 
+    def _sample_parameter_batch(self, key_and_quota):
+        """
+        Samples blocks of batch_size model parameters, simulates from them and keeps those for which the distance
+        between simulated outcome and the observation is smaller than epsilon, until quota parameters are accepted.
+
+        Parameters
+        ----------
+        key_and_quota: numpy.ndarray
+            2 dimensional array, where the first entry is the key of the random number stream of the task and the
+            second entry is the number of parameters to be accepted.
+
+        Returns
+        -------
+        Tuple
+            The accepted parameters as a quota x p matrix, and the number of simulations done. If the budget of the
+            task was exhausted before, less than quota parameters are returned.
+        """
+        rng = self.rng_streams.generator(key_and_quota[0])
+        quota = int(key_and_quota[1])
+
+        observations = self.accepted_parameters_manager.observations_bds.value()
+        accepted_parameters = []
+        counter = 0
+
+        while len(accepted_parameters) < quota:
+            if not self._proposal_allowed(counter, key_and_quota[0]):
+                break
+            # The last block is shrunk to the simulations left in the share of the task
+            block_size = self.batch_size
+            task_simulations = self._task_simulations(key_and_quota[0])
+            if task_simulations is not None:
+                block_size = min(block_size, task_simulations - counter)
+            thetas = self.sample_from_prior_batch(block_size, rng=rng)
+
+            y_sims = self.simulate_batch(thetas, self.n_samples_per_param, rng=rng)
+            counter+=len(thetas)
+
+            # Parameters for which no data could be simulated are never accepted
+            distances = np.full(len(thetas), self.distance.dist_max())
+            simulated = [index for index, y_sim in enumerate(y_sims) if y_sim is not None]
+            if(simulated):
+                distances[simulated] = self.distance.batch_distance(observations, [y_sims[index] for index in simulated])
+
+            accepted_parameters.extend(thetas[distances <= self.epsilon])
+
+        return (np.array(accepted_parameters[:quota]), counter)
+
 
 class PMCABC(BaseDiscrepancy, InferenceMethod):
     """
@@ -304,6 +666,7 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
     distance = None
     kernel = None
     rng = None
+    rng_streams = None
 
     #default value, set so that testing works
     n_samples = 2
@@ -327,13 +690,14 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
         self.kernel = kernel
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         self.accepted_parameters_manager = AcceptedParametersManager(self.model)
 
         self.simulation_counter=0
 
 
-    def sample(self, observations, steps, epsilon_init, n_samples = 10000, n_samples_per_param = 1, epsilon_percentile = 0, covFactor = 2, full_output=0, journal_file = None):
+    def sample(self, observations, steps, epsilon_init, n_samples = 10000, n_samples_per_param = 1, epsilon_percentile = 0, covFactor = 2, full_output=0, journal_file = None, max_simulations = None, max_time = None, checkpoint_file = None, policy = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -358,6 +722,19 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        checkpoint_file: string, optional
+            If provided, the state of the algorithm is written atomically to this file after every generation. If the
+            file exists when sample() is called, sampling resumes after the generation stored in it. The default value
+            is None, meaning no checkpoints are written.
+        policy: abcpy.resampling.ResamplingPolicy, optional
+            If provided, sampling stops early once the policy considers the posterior converged. The default value
+            is None, meaning all steps are run.
 
         Returns
         -------
@@ -378,6 +755,8 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
             journal.configuration["epsilon_percentile"] = epsilon_percentile
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_weights = None
@@ -393,9 +772,35 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
             else:
                 raise ValueError("The length of epsilon_init can only be equal to 1 or steps.")
 
+        # Resume after the last finished generation if a checkpoint exists
+        start_step = 0
+        last_generation = None
+        checkpoint = self._load_checkpoint(checkpoint_file)
+        if checkpoint is not None:
+            journal = checkpoint["journal"]
+            journal.configuration["stop_reason"] = None
+            start_step = checkpoint["step"]
+            accepted_parameters = checkpoint["accepted_parameters"]
+            accepted_weights = checkpoint["accepted_weights"]
+            accepted_cov_mats = checkpoint["accepted_cov_mats"]
+            epsilon_arr = checkpoint["epsilon_arr"]
+            last_generation = checkpoint.get("last_generation")
+
+            self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters, accepted_weights=accepted_weights)
+
+            kernel_parameters = []
+            for kernel in self.kernel.kernels:
+                kernel_parameters.append(
+                    self.accepted_parameters_manager.get_accepted_parameters_bds_values(kernel.models))
+            self.accepted_parameters_manager.update_kernel_values(self.backend, kernel_parameters=kernel_parameters)
+
         # main PMCABC algorithm
         # print("INFO: Starting PMCABC iterations.")
-        for aStep in range(0, steps):
+        for aStep in range(start_step, steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters = journal.parameters[-1]
                 accepted_weights = journal.weights[-1]
@@ -415,9 +820,8 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
                 accepted_cov_mats = [covFactor * new_cov_mat for new_cov_mat in new_cov_mats]
 
             # print("DEBUG: Iteration " + str(aStep) + " of PMCABC algorithm.")
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=n_samples, dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            rng_pds = self.backend.parallelize(rng_arr)
+            key_arr = self.rng_streams.keys(n_samples)
+            key_pds = self.backend.parallelize(key_arr)
 
             # 0: update remotely required variables
             # print("INFO: Broadcasting parameters.")
@@ -426,16 +830,21 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
 
             # 1: calculate resample parameters
             # print("INFO: Resampling parameters")
-            params_and_dists_and_ysim_and_counter_pds = self.backend.map(self._resample_parameter, rng_pds)
+            self._share_budget(key_arr)
+            params_and_dists_and_ysim_and_counter_pds = self.backend.map(self._resample_parameter, key_pds)
             params_and_dists_and_ysim_and_counter = self.backend.collect(params_and_dists_and_ysim_and_counter_pds)
             new_parameters, distances, counter = [list(t) for t in zip(*params_and_dists_and_ysim_and_counter)]
-            new_parameters = np.array(new_parameters)
-
-            #print(new_parameters)
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                break
+
+            new_parameters = np.array(new_parameters)
+
             # Compute epsilon for next step
             # print("INFO: Calculating acceptance threshold (epsilon).")
             if aStep < steps - 1:
@@ -449,13 +858,11 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
 
 
 
-            new_parameters_pds = self.backend.parallelize(new_parameters)
-            new_weights_pds = self.backend.map(self._calculate_weight, new_parameters_pds)
-            new_weights = np.array(self.backend.collect(new_weights_pds)).reshape(-1, 1)
-            sum_of_weights = 0.0
-            for w in new_weights:
-                sum_of_weights += w
-            new_weights = new_weights / sum_of_weights
+            new_parameters_pds = self.backend.parallelize(self._split_in_chunks(new_parameters, self.chunk_size))
+            new_log_weights_pds = self.backend.map(self._calculate_log_weights, new_parameters_pds)
+            new_log_weights = np.concatenate(self.backend.collect(new_log_weights_pds))
+            new_log_weights = (new_log_weights - logsumexp(new_log_weights)).reshape(-1, 1)
+            new_weights = np.exp(new_log_weights)
 
             # The calculation of cov_mats needs the new weights and new parameters
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters = new_parameters, accepted_weights=new_weights)
@@ -476,18 +883,41 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
             # 4: Update the newly computed values
             accepted_parameters = new_parameters
             accepted_weights = new_weights
+            accepted_log_weights = new_log_weights
             accepted_cov_mats = new_cov_mats
 
+            converged = policy is not None and policy.should_stop(weights=accepted_weights, epsilon=epsilon_arr[:aStep + 2],
+                                                                   acceptance_rate=n_samples / np.sum(counter))
+
             # print("INFO: Saving configuration to output journal.")
-            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and aStep == steps - 1):
+            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and (aStep == steps - 1 or converged)):
                 journal.add_parameters(accepted_parameters)
-                journal.add_weights(accepted_weights)
+                journal.add_log_weights(accepted_log_weights)
                 self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters,
                                                                   accepted_weights=accepted_weights)
                 names_and_parameters = self._get_names_and_parameters()
                 journal.add_user_parameters(names_and_parameters)
 
                 journal.number_of_simulations.append(self.simulation_counter)
+                last_generation = None
+            else:
+                # Kept back to be written if the budget runs out before the next generation completes
+                last_generation = {"parameters": accepted_parameters, "log_weights": accepted_log_weights,
+                                   "number_of_simulations": self.simulation_counter}
+
+            if checkpoint_file is not None:
+                self._save_checkpoint(checkpoint_file, {"journal": journal, "step": aStep + 1,
+                                                        "accepted_parameters": accepted_parameters,
+                                                        "accepted_weights": accepted_weights,
+                                                        "accepted_cov_mats": accepted_cov_mats,
+                                                        "epsilon_arr": epsilon_arr,
+                                                        "last_generation": last_generation})
+
+            if converged:
+                journal.configuration["stop_reason"] = "converged"
+                break
+
+        self._add_last_generation(journal, last_generation)
 
         # Add epsilon_arr to the journal
         journal.configuration["epsilon_arr"] = epsilon_arr
@@ -495,7 +925,7 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
         return journal
 
     # define helper functions for map step
-    def _resample_parameter(self, rng):
+    def _resample_parameter(self, key):
         """
         Samples a single model parameter and simulate from it until
         distance between simulated outcome and the observation is
@@ -503,20 +933,22 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed: integer
-            initial seed for the random number generator.
+        key: integer
+            The key of the random number stream of the task.
 
         Returns
         -------
         np.array
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before
         """
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
+        rng = self.rng_streams.generator(key)
 
         distance = self.distance.dist_max()
         counter=0
         while distance > self.epsilon:
             #print( " distance: " + str(distance) + " epsilon: " + str(self.epsilon))
+            if not self._proposal_allowed(counter, key):
+                return (None, distance, counter)
 
             if self.accepted_parameters_manager.accepted_parameters_bds == None:
                 self.sample_from_prior(rng=rng)
@@ -561,17 +993,278 @@ class PMCABC(BaseDiscrepancy, InferenceMethod):
         if self.accepted_parameters_manager.kernel_parameters_bds is None:
             return 1.0 / self.n_samples
         else:
-            prior_prob = self.pdf_of_prior(self.model, theta, 0)
+            return np.exp(self._calculate_log_weights([theta])[0])
+
+class SteadyStatePMCABC(PMCABC):
+    """
+    This class implements a steady-state, asynchronous variant of PMCABC. In PMCABC every task of a generation
+    simulates until its particle is accepted, such that most workers idle while the last particles of a generation are
+    found. Here every task proposes a single particle and simulates once from it, such that all tasks of a wave of
+    proposals take equally long. The accepted particles of a wave are merged into the population right away, keeping
+    the n_samples particles closest to the observation. Whenever the population is full, the threshold is lowered to
+    the epsilon_percentile-th value of its distances and the particles which no longer satisfy it are dropped, to be
+    replaced by the following waves. The threshold is not lowered after the last wave, and further waves are run
+    until the population is full, such that n_samples particles are returned. The perturbation kernel is updated
+    after every wave.
+
+    Every particle keeps the importance weight prior / proposal density of the population it was proposed from, such
+    that particles proposed from different populations form a correctly weighted population.
+
+    Parameters
+    ----------
+    model : list
+        A list of the Probabilistic models corresponding to the observed datasets
+    distance : abcpy.distances.Distance
+        Distance object defining the distance measure to compare simulated and observed data sets.
+    kernel : abcpy.distributions.Distribution
+        Distribution object defining the perturbation kernel needed for the sampling.
+    backend : abcpy.backends.Backend
+        Backend object defining the backend to be used.
+    seed : integer, optional
+         Optional initial seed for the random number generator. The default value is generated randomly.
+    """
+
+    def sample(self, observations, steps, epsilon_init, n_samples = 10000, n_samples_per_param = 1, epsilon_percentile = 50, covFactor = 2, n_proposals = None, max_refill_waves = None, full_output=0, max_simulations = None, max_time = None):
+        """Samples from the posterior distribution of the model parameter given the observed
+        data observations.
+
+        Parameters
+        ----------
+        observations : list
+            A list, containing lists describing the observed data sets
+        steps : integer
+            Number of waves of proposals. If the population is not full after these waves, further waves are run until
+            it is, at most max_refill_waves of them.
+        epsilon_init : float
+            The threshold used until the population is filled for the first time.
+        n_samples : integer, optional
+            Number of samples to generate. The default value is 10000.
+        n_samples_per_param : integer, optional
+            Number of data points in each simulated data set. The default value is 1.
+        epsilon_percentile : float, optional
+            A value between (0, 100]. Whenever the population is full, the threshold is set to this percentile of its
+            distances. The default value is 50.
+        covFactor : float, optional
+            scaling parameter of the covariance matrix. The default value is 2.
+        n_proposals : integer, optional
+            Number of particles proposed, and simulations run, in each wave. The default value is n_samples.
+        max_refill_waves : integer, optional
+            Maximal number of further waves run after the given steps to fill the population. If it is still not full
+            afterwards, for instance because epsilon_init is too small for any particle to be accepted, a warning is
+            issued and the incomplete population is returned. The default value is steps.
+        full_output: integer, optional
+            If full_output==1, the population after every wave is included in output journal.
+            The default value is 0, meaning the intermediate results are not saved.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the current population is
+            returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops after the current wave and the
+            current population is returned. The default value is None, meaning no limit.
+
+        Returns
+        -------
+        abcpy.output.Journal
+            A journal containing simulation results, metadata and optionally intermediate results.
+        """
+        self.accepted_parameters_manager.broadcast(self.backend, observations)
+        self.n_samples = n_samples
+        self.n_samples_per_param = n_samples_per_param
+        if n_proposals is None:
+            n_proposals = n_samples
+        if max_refill_waves is None:
+            max_refill_waves = steps
+
+        journal = Journal(full_output)
+        journal.configuration["type_model"] = [type(model).__name__ for model in self.model]
+        journal.configuration["type_dist_func"] = type(self.distance).__name__
+        journal.configuration["n_samples"] = self.n_samples
+        journal.configuration["n_samples_per_param"] = self.n_samples_per_param
+        journal.configuration["steps"] = steps
+        journal.configuration["epsilon_percentile"] = epsilon_percentile
+        journal.configuration["n_proposals"] = n_proposals
+        journal.configuration["max_refill_waves"] = max_refill_waves
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
+
+        population_parameters = None
+        population_distances = None
+        population_log_weights = None
+        population_filled = False
+        epsilon = np.max(epsilon_init)
+        epsilon_arr = []
+
+        # main steady-state PMCABC algorithm. After the given number of waves, further waves refill the population
+        # with the particles dropped when the threshold was last lowered
+        aStep = 0
+        while aStep < steps or population_parameters is None or len(population_parameters) < n_samples:
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
+            if aStep >= steps + max_refill_waves:
+                journal.configuration["stop_reason"] = "max_refill_waves"
+                n_particles = 0 if population_parameters is None else len(population_parameters)
+                warnings.warn("The population could not be filled within " + str(max_refill_waves) + " further waves, "
+                              "returning " + str(n_particles) + " of " + str(n_samples) + " particles.", RuntimeWarning)
+                break
+
+            # Every proposal needs a single simulation, so the last wave is shortened to the remaining budget
+            wave_size = n_proposals
+            if self.max_simulations is not None:
+                wave_size = min(wave_size, self.max_simulations - self.simulation_counter)
+
+            key_arr = self.rng_streams.keys(wave_size)
+            key_pds = self.backend.parallelize(key_arr)
+
+            # 1: propose and simulate a wave of particles
+            self.epsilon = epsilon
+            params_and_dists_and_counter_pds = self.backend.map(self._propose_parameter, key_pds)
+            params_and_dists_and_counter = self.backend.collect(params_and_dists_and_counter_pds)
+            new_parameters, new_distances, counter = [list(t) for t in zip(*params_and_dists_and_counter)]
+
+            for count in counter:
+                self.simulation_counter += count
+
+            new_distances = np.array(new_distances).reshape(-1)
+            accepted = new_distances <= epsilon
+
+            # 2: weight the accepted particles against the population they were proposed from and merge them into it
+            if np.any(accepted):
+                new_parameters = np.array(new_parameters)[accepted]
+                new_distances = new_distances[accepted]
+                if self.accepted_parameters_manager.kernel_parameters_bds is None:
+                    # Particles proposed from the prior have weight prior / prior
+                    new_log_weights = np.zeros(len(new_parameters))
+                else:
+                    new_parameters_pds = self.backend.parallelize(self._split_in_chunks(new_parameters, self.chunk_size))
+                    new_log_weights_pds = self.backend.map(self._calculate_log_weights, new_parameters_pds)
+                    new_log_weights = np.concatenate(self.backend.collect(new_log_weights_pds))
+
+                if population_parameters is None:
+                    population_parameters = new_parameters
+                    population_distances = new_distances
+                    population_log_weights = new_log_weights
+                else:
+                    population_parameters = np.concatenate((population_parameters, new_parameters))
+                    population_distances = np.concatenate((population_distances, new_distances))
+                    population_log_weights = np.concatenate((population_log_weights, new_log_weights))
+
+                # Keep the n_samples particles closest to the observation
+                index_kept = np.argsort(population_distances, kind='stable')[:n_samples]
+                population_parameters = population_parameters[index_kept]
+                population_distances = population_distances[index_kept]
+                population_log_weights = population_log_weights[index_kept]
+
+                # 3: lower the threshold once the population is full and drop the particles which do not satisfy it,
+                # unless the population is to be returned after this wave
+                if len(population_distances) == n_samples:
+                    population_filled = True
+                    if aStep < steps - 1:
+                        epsilon = np.percentile(population_distances, epsilon_percentile)
+                        index_kept = population_distances <= epsilon
+                        population_parameters = population_parameters[index_kept]
+                        population_distances = population_distances[index_kept]
+                        population_log_weights = population_log_weights[index_kept]
+
+                # 4: once the population has been filled, the current population is perturbed by the next wave
+                if population_filled:
+                    population_weights = np.exp(population_log_weights - logsumexp(population_log_weights)).reshape(-1, 1)
+                    self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=population_parameters,
+                                                                      accepted_weights=population_weights)
+                    kernel_parameters = []
+                    for kernel in self.kernel.kernels:
+                        kernel_parameters.append(
+                            self.accepted_parameters_manager.get_accepted_parameters_bds_values(kernel.models))
+                    self.accepted_parameters_manager.update_kernel_values(self.backend, kernel_parameters=kernel_parameters)
+
+                    new_cov_mats = self.kernel.calculate_cov(self.accepted_parameters_manager)
+                    accepted_cov_mats = [covFactor * new_cov_mat for new_cov_mat in new_cov_mats]
+                    self.accepted_parameters_manager.update_broadcast(self.backend, accepted_cov_mats=accepted_cov_mats)
+
+            epsilon_arr.append(epsilon)
+
+            if full_output == 1 and population_parameters is not None:
+                self._add_population_to_journal(journal, population_parameters, population_distances,
+                                                population_log_weights)
+
+            aStep += 1
+
+        if full_output == 0 and population_parameters is not None:
+            self._add_population_to_journal(journal, population_parameters, population_distances,
+                                            population_log_weights)
+
+        journal.configuration["epsilon_arr"] = epsilon_arr
+
+        return journal
+
+    def _add_population_to_journal(self, journal, population_parameters, population_distances, population_log_weights):
+        """
+        Adds the current population to the journal.
+
+        Parameters
+        ----------
+        journal: abcpy.output.Journal
+            The journal to which the population is added.
+        population_parameters: numpy.ndarray
+            The parameters of the particles.
+        population_distances: numpy.ndarray
+            The distances of the particles.
+        population_log_weights: numpy.ndarray
+            The unnormalized log-weights of the particles.
+        """
+        population_log_weights = (population_log_weights - logsumexp(population_log_weights)).reshape(-1, 1)
+        journal.add_parameters(copy.deepcopy(population_parameters))
+        journal.add_log_weights(population_log_weights)
+        journal.add_distances(copy.deepcopy(population_distances))
+
+        # Until the population has been filled, the kernel values are not set and the particles are broadcast for the
+        # names and parameters alone
+        self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=population_parameters,
+                                                          accepted_weights=np.exp(population_log_weights))
+        names_and_parameters = self._get_names_and_parameters()
+        journal.add_user_parameters(names_and_parameters)
+        journal.number_of_simulations.append(self.simulation_counter)
+
+    def _propose_parameter(self, key):
+        """
+        Proposes a single parameter, from the prior until the population has been filled and by perturbing a particle
+        of the population afterwards, and simulates once from it.
+
+        Parameters
+        ----------
+        key: integer
+            The key of the random number stream of the task.
+
+        Returns
+        -------
+        tuple
+            The proposed parameter, the distance between its simulation and the observation and the number of
+            simulations.
+        """
+        rng = self.rng_streams.generator(key)
 
-            denominator = 0.0
+        if self.accepted_parameters_manager.kernel_parameters_bds is None:
+            self.sample_from_prior(rng=rng)
+            theta = self.get_parameters()
+        else:
+            weights = self.accepted_parameters_manager.accepted_weights_bds.value().reshape(-1)
+            index = rng.choice(len(weights), size=1, p=weights)
+            # truncate the kernel to the bounds of parameter space of the model, as in PMCABC
+            while True:
+                perturbation_output = self.perturb(index[0], rng=rng)
+                if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1]) != 0:
+                    theta = perturbation_output[1]
+                    break
 
-            # Get the mapping of the models to be used by the kernels
-            mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(self.accepted_parameters_manager.model)
+        y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+        if y_sim is not None:
+            distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+        else:
+            distance = self.distance.dist_max()
 
-            for i in range(0, self.n_samples):
-                pdf_value = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, i, theta)
-                denominator += self.accepted_parameters_manager.accepted_weights_bds.value()[i, 0] * pdf_value
-            return 1.0 * prior_prob / denominator
+        # Parameters sampled from the prior and perturbed ones are flattened alike, such that they can be concatenated
+        return (np.hstack(theta), distance, 1)
 
 
 class PMC(BaseLikelihood, InferenceMethod):
@@ -610,6 +1303,7 @@ class PMC(BaseLikelihood, InferenceMethod):
     likfun = None
     kernel = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
@@ -633,6 +1327,7 @@ class PMC(BaseLikelihood, InferenceMethod):
         self.kernel = kernel
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # these are usually big tables, so we broadcast them to have them once
         # per executor instead of once per task
@@ -641,7 +1336,7 @@ class PMC(BaseLikelihood, InferenceMethod):
         self.simulation_counter = 0
 
 
-    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 100, covFactors = None, iniPoints = None, full_output=0, journal_file = None):
+    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 100, covFactors = None, iniPoints = None, full_output=0, journal_file = None, max_simulations = None, max_time = None, policy = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -662,6 +1357,16 @@ class PMC(BaseLikelihood, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        policy: abcpy.resampling.ResamplingPolicy, optional
+            If provided, the particles are resampled with the scheme of the policy and sampling stops early once the
+            policy considers the posterior converged. The default value is None, meaning multinomial resampling and
+            all steps are run.
 
         Returns
         -------
@@ -686,11 +1391,14 @@ class PMC(BaseLikelihood, InferenceMethod):
 
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_weights = None
         accepted_cov_mats = None
         new_theta = None
+        last_generation = None
 
         dim = len(self.get_parameters())
 
@@ -701,10 +1409,10 @@ class PMC(BaseLikelihood, InferenceMethod):
             for ind in range(0, n_samples):
                 self.sample_from_prior(rng=self.rng)
                 accepted_parameters[ind, :] = self.get_parameters()
-            accepted_weights = np.ones((n_samples, 1), dtype=np.float) / n_samples
+            accepted_weights = np.ones((n_samples, 1), dtype=float) / n_samples
         else:
             accepted_parameters = iniPoints
-            accepted_weights = np.ones((iniPoints.shape[0], 1), dtype=np.float) / iniPoints.shape[0]
+            accepted_weights = np.ones((iniPoints.shape[0], 1), dtype=float) / iniPoints.shape[0]
 
         if covFactors is None:
             covFactors = np.ones(shape=(len(self.kernel.kernels),))
@@ -733,6 +1441,10 @@ class PMC(BaseLikelihood, InferenceMethod):
         # main SMC algorithm
         # print("INFO: Starting PMC iterations.")
         for aStep in range(0, steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters = journal.parameters[-1]
                 accepted_weights = journal.weights[-1]
@@ -764,39 +1476,44 @@ class PMC(BaseLikelihood, InferenceMethod):
 
             # 1: calculate resample parameters
             # print("INFO: Resample parameters.")
-            index = self.rng.choice(accepted_parameters.shape[0], size=n_samples, p=accepted_weights.reshape(-1))
-            # Choose a new particle using the resampled particle (make the boundary proper)
-            # Initialize new_parameters
-            new_parameters = np.zeros((n_samples, dim), dtype=np.float)
-            for ind in range(0, self.n_samples):
-                while True:
-                    perturbation_output = self.perturb(index[ind], rng=self.rng)
-                    if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1])!= 0:
-                        new_parameters[ind, :] = perturbation_output[1]
-                        break
-            # 2: calculate approximate lieklihood for new parameters
-            # print("INFO: Calculate approximate likelihood.")
-            new_parameters_pds = self.backend.parallelize(new_parameters)
-            approx_likelihood_new_parameters_and_counter_pds = self.backend.map(self._approx_lik_calc, new_parameters_pds)
+            if policy is None:
+                index_arr = self.rng.choice(accepted_parameters.shape[0], size=n_samples, p=accepted_weights.reshape(-1))
+            else:
+                index_arr = policy.resample(accepted_weights, self.rng, n_samples)
+            key_arr = self.rng_streams.keys(n_samples)
+            key_and_index_arr = np.column_stack((key_arr, index_arr))
+            key_and_index_pds = self.backend.parallelize(key_and_index_arr)
+
+            # 2: perturb the resampled particles (make the boundary proper) and calculate approximate likelihood for
+            # the new parameters
+            # print("INFO: Perturb particles and calculate approximate likelihood.")
+            self._share_budget(key_arr)
+            params_and_approx_likelihood_and_counter_pds = self.backend.map(self._approx_lik_calc, key_and_index_pds)
             # print("DEBUG: Collect approximate likelihood from pds.")
-            approx_likelihood_new_parameters_and_counter = self.backend.collect(approx_likelihood_new_parameters_and_counter_pds)
-            approx_likelihood_new_parameters, counter = [list(t) for t in zip(*approx_likelihood_new_parameters_and_counter)]
-
-            approx_likelihood_new_parameters = np.array(approx_likelihood_new_parameters).reshape(-1,1)
+            params_and_approx_likelihood_and_counter = self.backend.collect(params_and_approx_likelihood_and_counter_pds)
+            new_parameters, approx_log_likelihood_new_parameters, counter = [list(t) for t in zip(*params_and_approx_likelihood_and_counter)]
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                break
+
+            new_parameters = np.array(new_parameters)
+
+            approx_log_likelihood_new_parameters = np.array(approx_log_likelihood_new_parameters).reshape(-1,1)
+            approx_likelihood_new_parameters = np.exp(approx_log_likelihood_new_parameters)
+
             # 3: calculate new weights for new parameters
             # print("INFO: Calculating weights.")
-            new_weights_pds = self.backend.map(self._calculate_weight, new_parameters_pds)
-            new_weights = np.array(self.backend.collect(new_weights_pds)).reshape(-1, 1)
-
-            sum_of_weights = 0.0
-            for i in range(0, self.n_samples):
-                new_weights[i] = new_weights[i] * approx_likelihood_new_parameters[i]
-                sum_of_weights += new_weights[i]
-            new_weights = new_weights / sum_of_weights
+            new_parameters_pds = self.backend.parallelize(self._split_in_chunks(new_parameters, self.chunk_size))
+            new_log_weights_pds = self.backend.map(self._calculate_log_weights, new_parameters_pds)
+            new_log_weights = np.concatenate(self.backend.collect(new_log_weights_pds))
+            new_log_weights = new_log_weights + approx_log_likelihood_new_parameters.reshape(-1)
+            new_log_weights = (new_log_weights - logsumexp(new_log_weights)).reshape(-1, 1)
+            new_weights = np.exp(new_log_weights)
             accepted_parameters = new_parameters
 
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters, accepted_weights=new_weights)
@@ -824,56 +1541,81 @@ class PMC(BaseLikelihood, InferenceMethod):
             # 5: Update the newly computed values
             accepted_parameters = new_parameters
             accepted_weights = new_weights
+            accepted_log_weights = new_log_weights
             accepted_cov_mat = new_cov_mats
 
+            converged = policy is not None and policy.should_stop(weights=accepted_weights)
+
             # print("INFO: Saving configuration to output journal.")
-            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and aStep == steps - 1):
+            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and (aStep == steps - 1 or converged)):
                 journal.add_parameters(accepted_parameters)
-                journal.add_weights(accepted_weights)
+                journal.add_log_weights(accepted_log_weights)
                 journal.add_opt_values(approx_likelihood_new_parameters)
                 self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters,
                                                                   accepted_weights=accepted_weights)
                 names_and_parameters = self._get_names_and_parameters()
                 journal.add_user_parameters(names_and_parameters)
                 journal.number_of_simulations.append(self.simulation_counter)
+                last_generation = None
+            else:
+                # Kept back to be written if the budget runs out before the next generation completes
+                last_generation = {"parameters": accepted_parameters, "log_weights": accepted_log_weights,
+                                   "opt_values": approx_likelihood_new_parameters,
+                                   "number_of_simulations": self.simulation_counter}
+
+            if converged:
+                journal.configuration["stop_reason"] = "converged"
+                break
+
+        self._add_last_generation(journal, last_generation)
 
         return journal
 
     # define helper functions for map step
-    def _approx_lik_calc(self, theta):
+    def _approx_lik_calc(self, key_and_index):
         """
-        Compute likelihood for new parameters using approximate likelihood function
+        Perturbs the accepted parameter at the given index until it lies in the support of the prior, and computes the
+        log-likelihood for the new parameter using the approximate likelihood function
 
         Parameters
         ----------
-        theta: numpy.ndarray
-            1xp matrix containing the model parameters, where p is the number of parameters
+        key_and_index: numpy.ndarray
+            2 dimensional array, where the first entry is the key of the random number stream of the task and the
+            second entry is the index of the accepted parameter to be perturbed
 
         Returns
         -------
-        float
-            The approximated likelihood function
+        Tuple
+            The perturbed parameter, the logarithm of the approximated likelihood function and the number of
+            simulations done. The parameter and the likelihood are None if the budget of the task was exhausted before.
         """
+        rng = self.rng_streams.generator(key_and_index[0])
+        index = key_and_index[1]
+
+        if not self._proposal_allowed(0, key_and_index[0]):
+            return (None, None, 0)
+
+        # truncate the kernel to the bounds of the parameter space of the model
+        while True:
+            perturbation_output = self.perturb(index, rng=rng)
+            if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1]) != 0:
+                theta = perturbation_output[1]
+                break
 
         # Simulate the fake data from the model given the parameter value theta
         # print("DEBUG: Simulate model for parameter " + str(theta))
-        y_sim = self.simulate(self.n_samples_per_param, self.rng)
+        y_sim = self.simulate(self.n_samples_per_param, rng=rng)
         # print("DEBUG: Extracting observation.")
         obs = self.accepted_parameters_manager.observations_bds.value()
         # print("DEBUG: Computing likelihood...")
 
+        loglhd = self.likfun.loglikelihood(obs, y_sim)
 
-        total_pdf_at_theta = 1.
-
-        lhd = self.likfun.likelihood(obs, y_sim)
+        # print("DEBUG: Log-likelihood is :" + str(loglhd))
+        log_pdf_at_theta = self.log_pdf_of_prior(self.model, theta)
 
-        # print("DEBUG: Likelihood is :" + str(lhd))
-        pdf_at_theta = self.pdf_of_prior(self.model, theta)
-
-        total_pdf_at_theta*=(pdf_at_theta*lhd)
-
-        # print("DEBUG: prior pdf evaluated at theta is :" + str(pdf_at_theta))
-        return (total_pdf_at_theta, 1)
+        # print("DEBUG: prior log-pdf evaluated at theta is :" + str(log_pdf_at_theta))
+        return (theta, log_pdf_at_theta + loglhd, 1)
 
     def _calculate_weight(self, theta):
         """
@@ -894,18 +1636,7 @@ class PMC(BaseLikelihood, InferenceMethod):
         if self.accepted_parameters_manager.accepted_weights_bds is None:
             return 1.0 / self.n_samples
         else:
-            prior_prob = self.pdf_of_prior(self.model, theta)
-
-            denominator = 0.0
-
-            mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(
-                self.accepted_parameters_manager.model)
-
-            for i in range(0, self.n_samples):
-                pdf_value = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, i, theta)
-                denominator+=self.accepted_parameters_manager.accepted_weights_bds.value()[i,0]*pdf_value
-
-            return 1.0 * prior_prob / denominator
+            return np.exp(self._calculate_log_weights([theta])[0])
 
 
 class SABC(BaseDiscrepancy, InferenceMethod):
@@ -933,6 +1664,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
     distance = None
     kernel = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
@@ -959,6 +1691,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         self.kernel = kernel
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # these are usually big tables, so we broadcast them to have them once
         # per executor instead of once per task
@@ -969,7 +1702,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         self.simulation_counter = 0
 
 
-    def sample(self, observations, steps, epsilon, n_samples = 10000, n_samples_per_param = 1, beta = 2, delta = 0.2, v = 0.3, ar_cutoff = 0.5, resample = None, n_update = None, adaptcov = 1, full_output=0, journal_file = None):
+    def sample(self, observations, steps, epsilon, n_samples = 10000, n_samples_per_param = 1, beta = 2, delta = 0.2, v = 0.3, ar_cutoff = 0.5, resample = None, n_update = None, adaptcov = 1, full_output=0, journal_file = None, max_simulations = None, max_time = None, checkpoint_file = None, policy = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -1002,6 +1735,19 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        checkpoint_file: string, optional
+            If provided, the state of the algorithm is written atomically to this file after every generation. If the
+            file exists when sample() is called, sampling resumes after the generation stored in it. The default value
+            is None, meaning no checkpoints are written.
+        policy: abcpy.resampling.ResamplingPolicy, optional
+            If provided, the policy decides when to resample, in place of the resample count, which scheme to use and
+            when the posterior has converged. The default value is None.
 
         Returns
         -------
@@ -1032,6 +1778,8 @@ class SABC(BaseDiscrepancy, InferenceMethod):
             journal.configuration["full_output"] = full_output
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = np.zeros(shape=(n_samples, len(self.get_parameters(self.model))))
         distances = np.zeros(shape=(n_samples,))
@@ -1055,8 +1803,40 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         ## Counter whether broken preemptively
         broken_preemptively = False
 
-        for aStep in range(0, steps):
+        # Resume after the last finished generation if a checkpoint exists
+        start_step = 0
+        checkpoint = self._load_checkpoint(checkpoint_file)
+        if checkpoint is not None:
+            journal = checkpoint["journal"]
+            journal.configuration["stop_reason"] = None
+            start_step = checkpoint["step"]
+            aStep = start_step - 1
+            accepted_parameters = checkpoint["accepted_parameters"]
+            accepted_weights = checkpoint["accepted_weights"]
+            accepted_cov_mats = checkpoint["accepted_cov_mats"]
+            distances = checkpoint["distances"]
+            smooth_distances = checkpoint["smooth_distances"]
+            all_distances = checkpoint["all_distances"]
+            epsilon = checkpoint["epsilon"]
+            accept = checkpoint["accept"]
+            samples_until = checkpoint["samples_until"]
+
+            self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters)
+            kernel_parameters = []
+            for kernel in self.kernel.kernels:
+                kernel_parameters.append(
+                    self.accepted_parameters_manager.get_accepted_parameters_bds_values(kernel.models))
+            self.accepted_parameters_manager.update_kernel_values(self.backend, kernel_parameters=kernel_parameters)
+            self.accepted_parameters_manager.update_broadcast(self.backend, accepted_cov_mats=accepted_cov_mats)
+
+        for aStep in range(start_step, steps):
             print(aStep)
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                if aStep == 0:
+                    return journal
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters=journal.parameters[-1]
                 accepted_weights=journal.weights[-1]
@@ -1085,12 +1865,11 @@ class SABC(BaseDiscrepancy, InferenceMethod):
 
             # main SABC algorithm
             # print("INFO: Initialization of SABC")
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=int(sample_array[aStep]), dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
+            key_arr = self.rng_streams.keys(int(sample_array[aStep]))
             index_arr = self.rng.randint(0, self.n_samples, size=int(sample_array[aStep]), dtype=np.uint32)
             data_arr = []
-            for i in range(len(rng_arr)):
-                data_arr.append([rng_arr[i], index_arr[i]])
+            for i in range(len(key_arr)):
+                data_arr.append([key_arr[i], index_arr[i]])
             data_pds = self.backend.parallelize(data_arr)
 
             # 0: update remotely required variables
@@ -1100,6 +1879,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
 
             # 1: Calculate  parameters
             # print("INFO: Initial accepted parameter parameters")
+            self._share_budget(key_arr)
             params_and_dists_pds = self.backend.map(self._accept_parameter, data_pds)
             params_and_dists = self.backend.collect(params_and_dists_pds)
             new_parameters, new_distances, new_all_parameters, new_all_distances, index, acceptance, counter = [list(t) for t in
@@ -1110,6 +1890,13 @@ class SABC(BaseDiscrepancy, InferenceMethod):
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                if aStep == 0:
+                    return journal
+                break
+
             new_parameters = np.array(new_parameters)
             new_distances = np.array(new_distances)
             new_all_distances = np.concatenate(new_all_distances)
@@ -1120,7 +1907,8 @@ class SABC(BaseDiscrepancy, InferenceMethod):
             if aStep == 0:
                 index = np.linspace(0, n_samples - 1, n_samples).astype(int).reshape(n_samples, )
                 accept = 0
-                all_distances = new_all_distances
+                # The reference distances are kept sorted, such that smoothing a distance is a sorted search
+                all_distances = np.sort(new_all_distances)
 
             # Initialize/Update the accepted parameters and their corresponding distances
             accepted_parameters[index[acceptance == 1], :] = new_parameters[acceptance == 1, :]
@@ -1131,6 +1919,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
                                                                                all_distances)
 
             # 3: Initialize/Update U, epsilon and covariance of perturbation kernel
+            previous_epsilon = epsilon
             if aStep == 0:
                 U = self._average_redefined_distance(self._smoother_distance(all_distances, all_distances), epsilon)
             else:
@@ -1148,13 +1937,24 @@ class SABC(BaseDiscrepancy, InferenceMethod):
                 if acceptance_rate < ar_cutoff:
                     broken_preemptively = True
                     break
+                if policy is not None and policy.should_stop(epsilon=[previous_epsilon, epsilon],
+                                                             acceptance_rate=acceptance_rate):
+                    journal.configuration["stop_reason"] = "converged"
+                    broken_preemptively = True
+                    break
 
-            # 5: Resampling if number of accepted particles greater than resample
-            if accept >= resample and U > 1e-100:
-                ## Weighted resampling:
+            # 5: Resampling if number of accepted particles greater than resample, or if the policy asks for it
+            resample_now = False
+            if U > 1e-100:
                 weight = np.exp(-smooth_distances * delta / U)
                 weight = weight / sum(weight)
-                index_resampled = self.rng.choice(np.arange(n_samples), n_samples, replace=1, p=weight)
+                resample_now = accept >= resample if policy is None else policy.should_resample(weight)
+            if resample_now:
+                ## Weighted resampling:
+                if policy is None:
+                    index_resampled = self.rng.choice(np.arange(n_samples), n_samples, replace=1, p=weight)
+                else:
+                    index_resampled = policy.resample(weight, self.rng)
                 accepted_parameters = accepted_parameters[index_resampled, :]
                 smooth_distances = smooth_distances[index_resampled]
 
@@ -1227,6 +2027,16 @@ class SABC(BaseDiscrepancy, InferenceMethod):
                     journal.add_user_parameters(names_and_parameters)
                     journal.number_of_simulations.append(self.simulation_counter)
 
+            if checkpoint_file is not None:
+                self._save_checkpoint(checkpoint_file, {"journal": journal, "step": aStep + 1,
+                                                        "accepted_parameters": accepted_parameters,
+                                                        "accepted_weights": accepted_weights,
+                                                        "accepted_cov_mats": accepted_cov_mats,
+                                                        "distances": distances,
+                                                        "smooth_distances": smooth_distances,
+                                                        "all_distances": all_distances, "epsilon": epsilon,
+                                                        "accept": accept, "samples_until": samples_until})
+
         # Add epsilon_arr, number of final steps and final output to the journal
         # print("INFO: Saving final configuration to output journal.")
         if (full_output == 0) or (full_output ==1 and broken_preemptively and aStep<= steps-1):
@@ -1244,7 +2054,8 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         return journal
 
     def _smoother_distance(self, distance, old_distance):
-        """Smooths the distance using the Equation 14 of [1].
+        """Smooths the distance using the Equation 14 of [1], i.e. using the empirical cumulative distribution
+        function of the old distances, which is evaluated through a sorted search.
 
         [1] C. Albert, H. R. Kuensch and A. Scheidegger. A Simulated Annealing Approach to
         Approximate Bayes Computations. Statistics and Computing 0960-3174 (2014).
@@ -1254,7 +2065,7 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         distance: numpy.ndarray
             Current distance between the simulated and observed data
         old_distance: numpy.ndarray
-            Last distance between the simulated and observed data
+            Last distance between the simulated and observed data, sorted in ascending order
 
         Returns
         -------
@@ -1263,13 +2074,12 @@ class SABC(BaseDiscrepancy, InferenceMethod):
 
         """
 
-        smoothed_distance = np.zeros(shape=(len(distance),))
+        distance = np.array(distance, dtype=float).reshape(-1,)
+        min_old_distance = old_distance[0]
 
-        for ind in range(0, len(distance)):
-            if distance[ind] < np.min(old_distance):
-                smoothed_distance[ind] = (distance[ind] / np.min(old_distance)) / len(old_distance)
-            else:
-                smoothed_distance[ind] = np.mean(np.array(old_distance) < distance[ind])
+        smoothed_distance = np.searchsorted(old_distance, distance, side='left') / len(old_distance)
+        below_min = distance < min_old_distance
+        smoothed_distance[below_min] = (distance[below_min] / min_old_distance) / len(old_distance)
 
         return smoothed_distance
 
@@ -1322,19 +2132,19 @@ class SABC(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed: integer
-            Initial seed for the random number generator.
+        data: list
+            2 dimensional list, where the first entry is the key of the random number stream of the task and the
+            second entry is the index of the particle to be updated.
 
         Returns
         -------
         numpy.ndarray
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before
         """
         if(isinstance(data,np.ndarray)):
             data = data.tolist()
-        rng=data[0]
+        rng = self.rng_streams.generator(data[0])
         index=data[1]
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
 
         all_parameters = []
         all_distances = []
@@ -1345,6 +2155,8 @@ class SABC(BaseDiscrepancy, InferenceMethod):
         if self.accepted_parameters_manager.accepted_cov_mats_bds == None:
 
             while acceptance == 0:
+                if not self._proposal_allowed(counter, data[0]):
+                    return (None, None, all_parameters, all_distances, index, 0, counter)
                 self.sample_from_prior(rng=rng)
                 new_theta = np.array(self.get_parameters()).reshape(-1,)
                 all_parameters.append(new_theta)
@@ -1373,10 +2185,10 @@ class SABC(BaseDiscrepancy, InferenceMethod):
             smooth_distance = self._smoother_distance([distance], self.all_distances_bds.value())
 
             ## Calculate acceptance probability:
-            ratio_prior_prob = self.pdf_of_prior(self.model, perturbation_output[1]) / self.pdf_of_prior(self.model,
-                self.accepted_parameters_manager.accepted_parameters_bds.value()[index, :])
-            ratio_likelihood_prob = np.exp((self.smooth_distances_bds.value()[index] - smooth_distance) / self.epsilon)
-            acceptance_prob = ratio_prior_prob * ratio_likelihood_prob
+            log_ratio_prior_prob = self.log_pdf_of_prior(self.model, perturbation_output[1]) - self.log_pdf_of_prior(
+                self.model, self.accepted_parameters_manager.accepted_parameters_bds.value()[index, :])
+            log_ratio_likelihood_prob = (self.smooth_distances_bds.value()[index] - smooth_distance) / self.epsilon
+            acceptance_prob = np.exp(log_ratio_prior_prob + log_ratio_likelihood_prob)
 
             ## If accepted
             if rng.rand(1) < acceptance_prob:
@@ -1411,11 +2223,13 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
     distance = None
     kernel = None
     rng = None
+    rng_streams = None
     anneal_parameter = None
 
     n_samples = None
     n_samples_per_param = None
     chain_length = None
+    delayed_acceptance = False
 
     backend = None
 
@@ -1436,6 +2250,7 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
         self.kernel = kernel
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
         self.anneal_parameter = None
 
 
@@ -1446,7 +2261,7 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
         self.simulation_counter = 0
 
 
-    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, chain_length = 10, ap_change_cutoff = 10, full_output=0, journal_file = None):
+    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, chain_length = 10, ap_change_cutoff = 10, full_output=0, journal_file = None, delayed_acceptance = False, max_simulations = None, max_time = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -1462,6 +2277,16 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        delayed_acceptance: boolean, optional
+            If True, the prior and kernel part of each Metropolis-Hastings acceptance probability is checked first,
+            and data are only simulated for proposals surviving this check. The acceptance probability is unchanged.
+            The default value is False.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
 
         Returns
         -------
@@ -1474,6 +2299,7 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
         self.chain_length = chain_length
         self.n_samples = n_samples
         self.n_samples_per_param = n_samples_per_param
+        self.delayed_acceptance = delayed_acceptance
 
         if(journal_file is None):
             journal = Journal(full_output)
@@ -1485,8 +2311,11 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
             journal.configuration["chain_length"] = self.chain_length
             journal.configuration["ap_change_cutoff"] = ap_change_cutoff
             journal.configuration["full_output"] = full_output
+            journal.configuration["delayed_acceptance"] = delayed_acceptance
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_weights = np.ones(shape=(n_samples, 1))
@@ -1497,6 +2326,12 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
 
         for aStep in range(0, steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                if aStep == 0:
+                    return journal
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters = journal.parameters[-1]
                 accepted_weights = journal.weights[-1]
@@ -1504,13 +2339,10 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
             # main ABCsubsim algorithm
             # print("INFO: Initialization of ABCsubsim")
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=int(n_samples / temp_chain_length),
-                                        dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            index_arr = np.linspace(0, n_samples / temp_chain_length - 1, n_samples / temp_chain_length).astype(
-                int).reshape(int(n_samples / temp_chain_length), )
-            rng_and_index_arr = np.column_stack((rng_arr, index_arr))
-            rng_and_index_pds = self.backend.parallelize(rng_and_index_arr)
+            key_arr = self.rng_streams.keys(int(n_samples / temp_chain_length))
+            index_arr = np.arange(int(n_samples / temp_chain_length))
+            key_and_index_arr = np.column_stack((key_arr, index_arr))
+            key_and_index_pds = self.backend.parallelize(key_and_index_arr)
 
             # 0: update remotely required variables
             # print("INFO: Broadcasting parameters.")
@@ -1519,13 +2351,21 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
             # 1: Calculate  parameters
             # print("INFO: Initial accepted parameter parameters")
-            params_and_dists_pds = self.backend.map(self._accept_parameter, rng_and_index_pds)
+            self._share_budget(key_arr)
+            params_and_dists_pds = self.backend.map(self._accept_parameter, key_and_index_pds)
             params_and_dists = self.backend.collect(params_and_dists_pds)
             new_parameters, new_distances, counter = [list(t) for t in zip(*params_and_dists)]
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                if aStep == 0:
+                    return journal
+                break
+
             accepted_parameters = np.concatenate(new_parameters)
             distances = np.concatenate(new_distances)
 
@@ -1561,21 +2401,24 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_cov_mats=accepted_cov_mats)
 
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=10, dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            index_arr = np.linspace(0, 10 - 1, 10).astype(int).reshape(10, )
-            rng_and_index_arr = np.column_stack((rng_arr, index_arr))
-            rng_and_index_pds = self.backend.parallelize(rng_and_index_arr)
+            key_arr = self.rng_streams.keys(10)
+            index_arr = np.arange(10)
+            key_and_index_arr = np.column_stack((key_arr, index_arr))
+            key_and_index_pds = self.backend.parallelize(key_and_index_arr)
 
-            cov_mats_index_pds = self.backend.map(self._update_cov_mat, rng_and_index_pds)
+            self._share_budget(key_arr)
+            cov_mats_index_pds = self.backend.map(self._update_cov_mat, key_and_index_pds)
             cov_mats_index = self.backend.collect(cov_mats_index_pds)
             cov_mats, T, accept_index, counter = [list(t) for t in zip(*cov_mats_index)]
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the covariance update incomplete: the generation itself is complete
+            # and kept with the current covariance matrices, but no further generation follows
+            cov_update_complete = all(accept is not None for accept in accept_index)
             for ind in range(10):
-                if accept_index[ind] == 1:
+                if cov_update_complete and accept_index[ind] == 1:
                     accepted_cov_mats = cov_mats[ind]
                     break
 
@@ -1592,6 +2435,10 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
                 journal.add_user_parameters(names_and_parameters)
                 journal.number_of_simulations.append(self.simulation_counter)
 
+            if not cov_update_complete:
+                journal.configuration["stop_reason"] = self._abort_reason()
+                break
+
             # Show progress
             anneal_parameter_change_percentage = 100 * abs(anneal_parameter_old - anneal_parameter) / abs(anneal_parameter)
             print('Steps: ', aStep, 'annealing parameter: ', anneal_parameter, 'change (%) in annealing parameter: ',
@@ -1617,7 +2464,7 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
         return journal
 
     # define helper functions for map step
-    def _accept_parameter(self, rng_and_index):
+    def _accept_parameter(self, key_and_index):
         """
         Samples a single model parameter and simulate from it until
         distance between simulated outcome and the observation is
@@ -1625,19 +2472,18 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed: numpy.ndarray
-            2 dimensional array. The first entry defines the initial seed of therandom number generator.
+        key_and_index: numpy.ndarray
+            2 dimensional array. The first entry defines the key of the random number stream of the task.
             The second entry defines the index in the data set.
 
         Returns
         -------
         numpy.ndarray
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before the chain was complete
         """
 
-        rng = rng_and_index[0]
-        index = rng_and_index[1]
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
+        rng = self.rng_streams.generator(key_and_index[0])
+        index = key_and_index[1]
 
         mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(
             self.accepted_parameters_manager.model)
@@ -1647,6 +2493,9 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
         counter = 0
 
+        if not self._proposal_allowed(counter, key_and_index[0]):
+            return (None, None, counter)
+
         if self.accepted_parameters_manager.accepted_parameters_bds == None:
             self.sample_from_prior(rng=rng)
             y_sim = self.simulate(self.n_samples_per_param, rng=rng)
@@ -1667,20 +2516,32 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
                     perturbation_output = self.perturb(index, rng=rng)
                     if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1])!= 0:
                         break
-                y_sim = self.simulate(self.n_samples_per_param, rng=rng)
-                counter+=1
-                new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+                if self.delayed_acceptance:
+                    ## Check the prior and kernel part of the acceptance probability before simulating:
+                    acceptance_prob = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, index, theta, perturbation_output[1]))
+                    accepted = False
+                    if rng.uniform() < acceptance_prob:
+                        if not self._proposal_allowed(counter, key_and_index[0]):
+                            return (None, None, counter)
+                        self.set_parameters(perturbation_output[1])
+                        y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                        counter+=1
+                        new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+                        accepted = new_distance < self.anneal_parameter
+                else:
+                    if not self._proposal_allowed(counter, key_and_index[0]):
+                        return (None, None, counter)
+                    y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                    counter+=1
+                    new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
 
-                ## Calculate acceptance probability:
-                ratio_prior_prob = self.pdf_of_prior(self.model, perturbation_output[1]) / self.pdf_of_prior(self.model, theta)
-                kernel_numerator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager,index, theta)
-                kernel_denominator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index, perturbation_output[1])
-                ratio_likelihood_prob = kernel_numerator / kernel_denominator
-                acceptance_prob = min(1, ratio_prior_prob * ratio_likelihood_prob) * (
-                new_distance < self.anneal_parameter)
+                    ## Calculate acceptance probability:
+                    acceptance_prob = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, index, theta, perturbation_output[1])) * (
+                    new_distance < self.anneal_parameter)
+                    accepted = rng.binomial(1, acceptance_prob) == 1
 
                 ## If accepted
-                if rng.binomial(1, acceptance_prob) == 1:
+                if accepted:
                     result_theta.append(perturbation_output[1])
                     result_distance.append(new_distance)
                     theta = perturbation_output[1]
@@ -1691,25 +2552,25 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
 
         return (result_theta, result_distance, counter)
 
-    def _update_cov_mat(self, rng_t):
+    def _update_cov_mat(self, key_t):
         """
         Updates the covariance matrix.
 
         Parameters
         ----------
-        seed_t: numpy.ndarray
-            2 dimensional array. The first entry defines the initial seed of the random number generator.
+        key_t: numpy.ndarray
+            2 dimensional array. The first entry defines the key of the random number stream of the task.
             The second entry defines the way in which the accepted covariance matrix is transformed.
 
         Returns
         -------
         numpy.ndarray
-            accepted covariance matrix
+            accepted covariance matrix, and whether it is accepted, which is None if the budget of the task was
+            exhausted before the chain was complete
         """
 
-        rng = rng_t[0]
-        t = rng_t[1]
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
+        rng = self.rng_streams.generator(key_t[0])
+        t = key_t[1]
 
         acceptance = 0
 
@@ -1727,18 +2588,30 @@ class ABCsubsim(BaseDiscrepancy, InferenceMethod):
                 perturbation_output = self.perturb(0, rng=rng)
                 if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1]) != 0:
                     break
-            y_sim = self.simulate(self.n_samples_per_param, rng=rng)
-            counter+=1
-            new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+            if self.delayed_acceptance:
+                ## Check the prior and kernel part of the acceptance probability before simulating:
+                acceptance_prob = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, 0, theta, perturbation_output[1]))
+                accepted = False
+                if rng.uniform() < acceptance_prob:
+                    if not self._proposal_allowed(counter, key_t[0]):
+                        return (accepted_cov_mats_transformed, t, None, counter)
+                    self.set_parameters(perturbation_output[1])
+                    y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                    counter+=1
+                    new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+                    accepted = new_distance < self.anneal_parameter
+            else:
+                if not self._proposal_allowed(counter, key_t[0]):
+                    return (accepted_cov_mats_transformed, t, None, counter)
+                y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                counter+=1
+                new_distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
 
-            ## Calculate acceptance probability:
-            ratio_prior_prob = self.pdf_of_prior(self.model, perturbation_output[1]) / self.pdf_of_prior(self.model, theta)
-            kernel_numerator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager,0 , theta)
-            kernel_denominator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager,0 , perturbation_output[1])
-            ratio_likelihood_prob = kernel_numerator / kernel_denominator
-            acceptance_prob = min(1, ratio_prior_prob * ratio_likelihood_prob) * (new_distance < self.anneal_parameter)
+                ## Calculate acceptance probability:
+                acceptance_prob = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, 0, theta, perturbation_output[1])) * (new_distance < self.anneal_parameter)
+                accepted = rng.binomial(1, acceptance_prob) == 1
             ## If accepted
-            if rng.binomial(1, acceptance_prob) == 1:
+            if accepted:
                 theta = perturbation_output[1]
                 acceptance = acceptance + 1
         if acceptance / 10 <= 0.5 and acceptance / 10 >= 0.3:
@@ -1774,10 +2647,12 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
 
     R = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
     alpha = None
+    delayed_acceptance = False
 
     accepted_dist_bds = None
 
@@ -1803,6 +2678,7 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
 
         self.R=None
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # these are usually big tables, so we broadcast them to have them once
         # per executor instead of once per task
@@ -1812,7 +2688,7 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
         self.simulation_counter = 0
 
 
-    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, alpha = 0.1, epsilon_init = 100, epsilon_final = 0.1, const = 0.01, covFactor = 2.0, full_output=0, journal_file = None):
+    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, alpha = 0.1, epsilon_init = 100, epsilon_final = 0.1, const = 0.01, covFactor = 2.0, full_output=0, journal_file = None, delayed_acceptance = False, max_simulations = None, max_time = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -1839,6 +2715,16 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        delayed_acceptance: boolean, optional
+            If True, the prior and kernel part of each Metropolis-Hastings acceptance probability is checked first,
+            and data are only simulated for proposals surviving this check. The acceptance probability is unchanged.
+            The default value is False.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
 
         Returns
         -------
@@ -1851,6 +2737,7 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
         self.alpha = alpha
         self.n_samples = n_samples
         self.n_samples_per_param = n_samples_per_param
+        self.delayed_acceptance = delayed_acceptance
 
         if(journal_file is None):
             journal = Journal(full_output)
@@ -1859,16 +2746,24 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
             journal.configuration["n_samples"] = self.n_samples
             journal.configuration["n_samples_per_param"] = self.n_samples_per_param
             journal.configuration["steps"] = steps
+            journal.configuration["delayed_acceptance"] = delayed_acceptance
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_cov_mat = None
         accepted_dist = None
+        last_generation = None
 
         # main RSMCABC algorithm
         # print("INFO: Starting RSMCABC iterations.")
         for aStep in range(steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters=journal.parameters[-1]
 
@@ -1916,9 +2811,8 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
             if epsilon[-1] < epsilon_final:
                 break
 
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=n_replenish, dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            rng_pds = self.backend.parallelize(rng_arr)
+            key_arr = self.rng_streams.keys(n_replenish)
+            key_pds = self.backend.parallelize(key_arr)
 
             # update remotely required variables
             # print("INFO: Broadcasting parameters.")
@@ -1930,16 +2824,23 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
 
             # calculate resample parameters
             # print("INFO: Resampling parameters")
-            params_and_dist_index_pds = self.backend.map(self._accept_parameter, rng_pds)
+            self._share_budget(key_arr)
+            params_and_dist_index_pds = self.backend.map(self._accept_parameter, key_pds)
             params_and_dist_index = self.backend.collect(params_and_dist_index_pds)
             new_parameters, new_dist, new_index, counter = [list(t) for t in zip(*params_and_dist_index)]
-            new_parameters = np.array(new_parameters)
-            new_dist = np.array(new_dist)
-            new_index = np.array(new_index)
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                break
+
+            new_parameters = np.array(new_parameters)
+            new_dist = np.array(new_dist)
+            new_index = np.array(new_index)
+
             # 1: Update all parameters, compute acceptance probability, compute epsilon
             if len(new_dist) == self.n_samples:
                 accepted_parameters = new_parameters
@@ -1956,6 +2857,12 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
                 names_and_parameters = self._get_names_and_parameters()
                 journal.add_user_parameters(names_and_parameters)
                 journal.number_of_simulations.append(self.simulation_counter)
+                last_generation = None
+            else:
+                # Kept back to be written if the budget runs out before the next generation completes
+                last_generation = {"parameters": copy.deepcopy(accepted_parameters),
+                                   "weights": np.ones(shape=(len(accepted_parameters), 1)) * (1 / len(accepted_parameters)),
+                                   "number_of_simulations": self.simulation_counter}
 
             # 2: Compute acceptance probabilty and set R
             # print(aStep)
@@ -1978,6 +2885,7 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
                                       0)
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters)
 
+        self._add_last_generation(journal, last_generation)
 
         # Add epsilon_arr to the journal
         journal.configuration["epsilon_arr"] = epsilon
@@ -1994,7 +2902,7 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
             self.accepted_dist_bds = self.backend.broadcast(accepted_dist)
 
     # define helper functions for map step
-    def _accept_parameter(self, rng):
+    def _accept_parameter(self, key):
         """
         Samples a single model parameter and simulate from it until
         distance between simulated outcome and the observation is
@@ -2002,15 +2910,15 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed: integer
-            Initial seed for the random number generator.
+        key: integer
+            The key of the random number stream of the task.
 
         Returns
         -------
         numpy.ndarray
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before
         """
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
+        rng = self.rng_streams.generator(key)
 
         distance = self.distance.dist_max()
 
@@ -2021,6 +2929,8 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
 
         if self.accepted_parameters_manager.accepted_parameters_bds == None:
             while distance > self.epsilon[-1]:
+                if not self._proposal_allowed(counter, key):
+                    return (None, distance, 0, counter)
                 self.sample_from_prior(rng=rng)
                 y_sim = self.simulate(self.n_samples_per_param, rng=rng)
                 counter+=1
@@ -2035,16 +2945,30 @@ class RSMCABC(BaseDiscrepancy, InferenceMethod):
                     perturbation_output = self.perturb(index[0], rng=rng)
                     if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1]) != 0:
                         break
-                y_sim = self.simulate(self.n_samples_per_param, rng=rng)
-                counter+=1
-                distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
-                ratio_prior_prob = self.pdf_of_prior(self.model, perturbation_output[1]) / self.pdf_of_prior(self.model, theta)
-                kernel_numerator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index[0], theta)
-                kernel_denominator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index[0], perturbation_output[1])
-                ratio_kernel_prob = kernel_numerator / kernel_denominator
-                probability_acceptance = min(1, ratio_prior_prob * ratio_kernel_prob)
-                if distance < self.epsilon[-1] and rng.binomial(1, probability_acceptance) == 1:
+                if self.delayed_acceptance:
+                    ## Check the prior and kernel part of the acceptance probability before simulating:
+                    probability_acceptance = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, index[0], theta, perturbation_output[1]))
+                    accepted = False
+                    if rng.uniform() < probability_acceptance:
+                        if not self._proposal_allowed(counter, key):
+                            return (None, distance, 0, counter)
+                        self.set_parameters(perturbation_output[1])
+                        y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                        counter+=1
+                        distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+                        accepted = distance < self.epsilon[-1]
+                else:
+                    if not self._proposal_allowed(counter, key):
+                        return (None, distance, 0, counter)
+                    y_sim = self.simulate(self.n_samples_per_param, rng=rng)
+                    counter+=1
+                    distance = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
+                    probability_acceptance = min(1, self._prior_and_kernel_ratio(mapping_for_kernels, index[0], theta, perturbation_output[1]))
+                    accepted = distance < self.epsilon[-1] and rng.binomial(1, probability_acceptance) == 1
+                if accepted:
                     index_accept += 1
+                    # computing the acceptance probability has set the parameters back to theta
+                    self.set_parameters(perturbation_output[1])
                 else:
                     self.set_parameters(theta)
                     distance = self.accepted_dist_bds.value()[index[0]]
@@ -2079,6 +3003,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
     epsilon = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
@@ -2106,6 +3031,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
         self.epsilon= None
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # these are usually big tables, so we broadcast them to have them once
         # per executor instead of once per task
@@ -2115,7 +3041,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
         self.simulation_counter = 0
 
 
-    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, alpha = 0.9, acceptance_cutoff = 0.03, covFactor = 2.0, full_output=0, journal_file = None):
+    def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, alpha = 0.9, acceptance_cutoff = 0.03, covFactor = 2.0, full_output=0, journal_file = None, max_simulations = None, max_time = None, policy = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -2138,6 +3064,15 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        policy: abcpy.resampling.ResamplingPolicy, optional
+            If provided, sampling stops early once the policy considers the posterior converged. The default value
+            is None, meaning sampling only stops at the acceptance cutoff or after all steps.
 
         Returns
         -------
@@ -2160,18 +3095,28 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             journal.configuration["steps"] = steps
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_weights = None
+        accepted_log_weights = None
         accepted_cov_mats = None
         accepted_dist = None
         alpha_accepted_parameters = None
         alpha_accepted_weights = None
+        alpha_accepted_log_weights = None
         alpha_accepted_dist = None
+        last_generation = None
+        epsilon = []
 
         # main APMCABC algorithm
         # print("INFO: Starting APMCABC iterations.")
         for aStep in range(steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters=journal.parameters[-1]
                 accepted_weights=journal.weights[-1]
@@ -2193,6 +3138,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
                 alpha_accepted_parameters=accepted_parameters
                 alpha_accepted_weights=accepted_weights
+                alpha_accepted_log_weights=journal.get_log_weights()
 
             # 0: Drawing new new/perturbed samples using prior or MCMC Kernel
             # print("DEBUG: Iteration " + str(aStep) + " of APMCABC algorithm.")
@@ -2201,9 +3147,8 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             else:
                 n_additional_samples = n_samples
 
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=n_additional_samples, dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            rng_pds = self.backend.parallelize(rng_arr)
+            key_arr = self.rng_streams.keys(n_additional_samples)
+            key_pds = self.backend.parallelize(key_arr)
 
             # update remotely required variables
             # print("INFO: Broadcasting parameters.")
@@ -2212,21 +3157,28 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
             # calculate resample parameters
             # print("INFO: Resampling parameters")
-            params_and_dist_weights_pds = self.backend.map(self._accept_parameter, rng_pds)
+            self._share_budget(key_arr)
+            params_and_dist_weights_pds = self.backend.map(self._accept_parameter, key_pds)
             params_and_dist_weights = self.backend.collect(params_and_dist_weights_pds)
-            new_parameters, new_dist, new_weights, counter = [list(t) for t in zip(*params_and_dist_weights)]
-            new_parameters = np.array(new_parameters)
-            new_dist = np.array(new_dist)
-            new_weights = np.array(new_weights).reshape(n_additional_samples, 1)
+            new_parameters, new_dist, new_log_weights, counter = [list(t) for t in zip(*params_and_dist_weights)]
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                break
+
+            new_parameters = np.array(new_parameters)
+            new_dist = np.array(new_dist)
+            new_log_weights = np.array(new_log_weights).reshape(n_additional_samples, 1)
+
             # 1: Update all parameters, compute acceptance probability, compute epsilon
-            if len(new_weights) == n_samples:
+            if len(new_log_weights) == n_samples:
                 accepted_parameters = new_parameters
                 accepted_dist = new_dist
-                accepted_weights = new_weights
+                accepted_log_weights = new_log_weights
                 # Compute acceptance probability
                 prob_acceptance = 1
                 # Compute epsilon
@@ -2234,7 +3186,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             else:
                 accepted_parameters = np.concatenate((alpha_accepted_parameters, new_parameters))
                 accepted_dist = np.concatenate((alpha_accepted_dist, new_dist))
-                accepted_weights = np.concatenate((alpha_accepted_weights, new_weights))
+                accepted_log_weights = np.concatenate((alpha_accepted_log_weights, new_log_weights))
                 # Compute acceptance probability
                 prob_acceptance = sum(new_dist < epsilon[-1]) / len(new_dist)
                 # Compute epsilon
@@ -2243,7 +3195,9 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             # 2: Update alpha_parameters, alpha_dist and alpha_weights
             index_alpha = accepted_dist < epsilon[-1]
             alpha_accepted_parameters = accepted_parameters[index_alpha, :]
-            alpha_accepted_weights = accepted_weights[index_alpha] / sum(accepted_weights[index_alpha])
+            alpha_accepted_log_weights = accepted_log_weights[index_alpha] - logsumexp(accepted_log_weights[index_alpha])
+            alpha_accepted_weights = np.exp(alpha_accepted_log_weights)
+            accepted_weights = np.exp(accepted_log_weights)
             alpha_accepted_dist = accepted_dist[index_alpha]
 
             # 3: calculate covariance
@@ -2261,21 +3215,36 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
             accepted_cov_mats = [covFactor*cov_mat for cov_mat in accepted_cov_mats]
 
+            converged = policy is not None and policy.should_stop(weights=accepted_weights, epsilon=epsilon,
+                                                                   acceptance_rate=prob_acceptance if aStep > 0 else None)
+
             # print("INFO: Saving configuration to output journal.")
-            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and aStep == steps - 1):
+            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and (aStep == steps - 1 or converged)):
                 journal.add_parameters(copy.deepcopy(accepted_parameters))
-                journal.add_weights(copy.deepcopy(accepted_weights))
+                journal.add_log_weights(copy.deepcopy(accepted_log_weights))
                 self.accepted_parameters_manager.update_broadcast(self.backend,
                                                                   accepted_parameters=accepted_parameters,
                                                                   accepted_weights=accepted_weights)
                 names_and_parameters = self._get_names_and_parameters()
                 journal.add_user_parameters(names_and_parameters)
                 journal.number_of_simulations.append(self.simulation_counter)
+                last_generation = None
+            else:
+                # Kept back to be written if the budget runs out before the next generation completes
+                last_generation = {"parameters": copy.deepcopy(accepted_parameters),
+                                   "log_weights": copy.deepcopy(accepted_log_weights),
+                                   "number_of_simulations": self.simulation_counter}
 
             # 4: Check probability of acceptance lower than acceptance_cutoff
             if prob_acceptance < acceptance_cutoff:
                 break
 
+            if converged:
+                journal.configuration["stop_reason"] = "converged"
+                break
+
+        self._add_last_generation(journal, last_generation)
+
         # Add epsilon_arr to the journal
         journal.configuration["epsilon_arr"] = epsilon
 
@@ -2289,7 +3258,7 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             self.accepted_dist_bds = self.backend.broadcast(accepted_dist)
 
     # define helper functions for map step
-    def _accept_parameter(self, rng):
+    def _accept_parameter(self, key):
         """
         Samples a single model parameter and simulate from it until
         distance between simulated outcome and the observation is
@@ -2297,28 +3266,28 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed: integer
-            Initial seed for the random number generator.
+        key: integer
+            The key of the random number stream of the task.
 
         Returns
         -------
         numpy.ndarray
-            accepted parameter
+            accepted parameter, or None if the budget of the task was exhausted before
         """
 
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
-
-        mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(
-            self.accepted_parameters_manager.model)
+        rng = self.rng_streams.generator(key)
 
         counter = 0
 
+        if not self._proposal_allowed(counter, key):
+            return (None, None, None, counter)
+
         if self.accepted_parameters_manager.accepted_parameters_bds == None:
             self.sample_from_prior(rng=rng)
             y_sim = self.simulate(self.n_samples_per_param, rng=rng)
             counter+=1
             dist = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
-            weight = 1.0
+            log_weight = 0.0
         else:
             index = rng.choice(len(self.accepted_parameters_manager.accepted_weights_bds.value()), size=1,
                                p=self.accepted_parameters_manager.accepted_weights_bds.value().reshape(-1))
@@ -2332,14 +3301,9 @@ class APMCABC(BaseDiscrepancy, InferenceMethod):
             counter+=1
             dist = self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), y_sim)
 
-            prior_prob = self.pdf_of_prior(self.model, perturbation_output[1])
-            denominator = 0.0
-            for i in range(0, len(self.accepted_parameters_manager.accepted_weights_bds.value())):
-                pdf_value = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index[0], perturbation_output[1])
-                denominator += self.accepted_parameters_manager.accepted_weights_bds.value()[i, 0] * pdf_value
-            weight = 1.0 * prior_prob / denominator
+            log_weight = self._calculate_log_weights([perturbation_output[1]])[0]
 
-        return (self.get_parameters(self.model), dist, weight, counter)
+        return (self.get_parameters(self.model), dist, log_weight, counter)
 
 
 class SMCABC(BaseDiscrepancy, InferenceMethod):
@@ -2369,11 +3333,13 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
     epsilon = None
     rng = None
+    rng_streams = None
 
     n_samples = None
     n_samples_per_param = None
 
     accepted_y_sim_bds = None
+    accepted_distances_bds = None
 
     backend = None
 
@@ -2395,17 +3361,20 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
         self.epsilon = None
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
 
         # these are usually big tables, so we broadcast them to have them once
         # per executor instead of once per task\
         self.accepted_parameters_manager = AcceptedParametersManager(self.model)
         self.accepted_y_sim_bds = None
+        self.accepted_distances_bds = None
 
         self.simulation_counter = 0
 
 
     def sample(self, observations, steps, n_samples = 10000, n_samples_per_param = 1, epsilon_final = 0.1, alpha = 0.95,
-               covFactor = 2, resample = None, full_output=0, journal_file=None):
+               covFactor = 2, resample = None, full_output=0, journal_file=None, batch_size = None, max_simulations = None,
+               max_time = None, policy = None):
         """Samples from the posterior distribution of the model parameter given the observed
         data observations.
 
@@ -2429,6 +3398,18 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
         full_output: integer, optional
             If full_output==1, intermediate results are included in output journal.
             The default value is 0, meaning the intermediate results are not saved.
+        batch_size: integer, optional
+            If provided, each task moves a block of batch_size particles, whose proposals are simulated with a single
+            call to simulate_batch. The default value is None, meaning each task moves a single particle.
+        max_simulations: integer, optional
+            Maximal total number of simulations. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        max_time: float, optional
+            Maximal wall-clock time in seconds. Once it is reached, sampling stops and the last completed generation
+            is returned. The default value is None, meaning no limit.
+        policy: abcpy.resampling.ResamplingPolicy, optional
+            If provided, the policy decides when to resample, in place of resample, which scheme to use and when the
+            posterior has converged. The default value is None.
 
         Returns
         -------
@@ -2450,11 +3431,16 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
             journal.configuration["steps"] = steps
         else:
             journal = Journal.fromFile(journal_file)
+        journal.configuration["stop_reason"] = None
+        self._set_budget(max_simulations, max_time)
 
         accepted_parameters = None
         accepted_weights = None
+        accepted_log_weights = None
         accepted_cov_mats = None
         accepted_y_sim = None
+        accepted_distances = None
+        last_generation = None
 
         # Define the resmaple parameter
         if resample == None:
@@ -2466,6 +3452,10 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
         # main SMC ABC algorithm
         # print("INFO: Starting SMCABC iterations.")
         for aStep in range(0, steps):
+            stop_reason = self._budget_exhausted()
+            if stop_reason is not None:
+                journal.configuration["stop_reason"] = stop_reason
+                break
             if(aStep==0 and journal_file is not None):
                 accepted_parameters=journal.parameters[-1]
                 accepted_weights=journal.weights[-1]
@@ -2493,10 +3483,14 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
             # 0: Compute the Epsilon
             if accepted_y_sim != None:
+                # Compute the distances between the observations and each simulated data point once for this step
+                accepted_y_sim_pds = self.backend.parallelize(self._split_in_chunks(accepted_y_sim, self.chunk_size))
+                accepted_distances_pds = self.backend.map(self._compute_distances, accepted_y_sim_pds)
+                accepted_distances = np.concatenate(self.backend.collect(accepted_distances_pds))
+
                 # Compute epsilon for next step
                 fun = lambda epsilon_var: self._compute_epsilon(epsilon_var, \
-                                                                epsilon, observations, accepted_y_sim, accepted_weights,
-                                                                n_samples, n_samples_per_param, alpha)
+                                                                epsilon, accepted_distances, accepted_weights, alpha)
                 epsilon_new = self._bisection(fun, epsilon_final, epsilon[-1], 0.001)
                 if epsilon_new < epsilon_final:
                     epsilon_new = epsilon_final
@@ -2505,33 +3499,34 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
             # 1: calculate weights for new parameters
             # print("INFO: Calculating weights.")
             if accepted_y_sim != None:
-                new_weights = np.zeros(shape=(n_samples), )
-                for ind1 in range(n_samples):
-                    numerator = 0.0
-                    denominator = 0.0
-                    for ind2 in range(n_samples_per_param):
-                        numerator += (self.distance.distance(observations, [[accepted_y_sim[ind1][0][ind2]]]) < epsilon[-1])
-                        denominator += (
-                        self.distance.distance(observations, [[accepted_y_sim[ind1][0][ind2]]]) < epsilon[-2])
-                    if denominator != 0.0:
-                        new_weights[ind1] = accepted_weights[ind1] * (numerator / denominator)
-                    else:
-                        new_weights[ind1] = 0
-
-                new_weights = new_weights / sum(new_weights)
+                new_log_weights = self._log_reweight(accepted_distances, accepted_weights, epsilon[-1], epsilon[-2])
+                new_log_weights = new_log_weights - logsumexp(new_log_weights)
             else:
-                new_weights = np.ones(shape=(n_samples), ) * (1.0 / n_samples)
+                new_log_weights = np.full(n_samples, -np.log(n_samples))
+            new_weights = np.exp(new_log_weights)
+            importance_weights = new_weights
 
             # 2: Resample
-            if accepted_y_sim != None and pow(sum(pow(new_weights, 2)), -1) < resample:
+            if policy is None:
+                resample_now = pow(sum(pow(new_weights, 2)), -1) < resample
+            else:
+                resample_now = policy.should_resample(new_weights)
+            if accepted_y_sim != None and resample_now:
                 print('Resampling')
                 # Weighted resampling:
-                index_resampled = self.rng.choice(np.arange(n_samples), n_samples, replace=1, p=new_weights)
+                if policy is None:
+                    index_resampled = self.rng.choice(np.arange(n_samples), n_samples, replace=1, p=new_weights)
+                else:
+                    index_resampled = policy.resample(new_weights, self.rng)
                 accepted_parameters = accepted_parameters[index_resampled, :]
-                new_weights = np.ones(shape=(n_samples), ) * (1.0 / n_samples)
+                accepted_y_sim = [accepted_y_sim[index] for index in index_resampled]
+                accepted_distances = accepted_distances[index_resampled, :]
+                new_log_weights = np.full(n_samples, -np.log(n_samples))
+                new_weights = np.exp(new_log_weights)
 
             # Update the weights
             accepted_weights = new_weights.reshape(len(new_weights), 1)
+            accepted_log_weights = new_log_weights.reshape(len(new_log_weights), 1)
 
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters,
                                                               accepted_weights=accepted_weights)
@@ -2549,52 +3544,90 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
             # 3: Drawing new perturbed samples using MCMC Kernel
             # print("DEBUG: Iteration " + str(aStep) + " of SMCABC algorithm.")
-            seed_arr = self.rng.randint(0, np.iinfo(np.uint32).max, size=n_samples, dtype=np.uint32)
-            rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-            index_arr = np.arange(n_samples)
-            rng_and_index_arr = np.column_stack((rng_arr, index_arr))
-            rng_and_index_pds = self.backend.parallelize(rng_and_index_arr)
+            if batch_size is None:
+                key_arr = self.rng_streams.keys(n_samples)
+                index_arr = np.arange(n_samples)
+                key_and_index_arr = np.column_stack((key_arr, index_arr))
+            else:
+                # Each task moves the particles from start to stop, the last one the remaining ones
+                start_arr = np.arange(0, n_samples, batch_size)
+                stop_arr = np.minimum(start_arr + batch_size, n_samples)
+                key_arr = self.rng_streams.keys(len(start_arr))
+                key_and_index_arr = np.column_stack((key_arr, start_arr, stop_arr))
+            key_and_index_pds = self.backend.parallelize(key_and_index_arr)
 
             # print("INFO: Broadcasting parameters.")
             self.epsilon = epsilon
 
             self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters,
                                                               accepted_weights=accepted_weights, accepted_cov_mats=accepted_cov_mats)
-            self._update_broadcasts(accepted_y_sim)
+            self._update_broadcasts(accepted_y_sim, accepted_distances)
 
             # calculate resample parameters
             # print("INFO: Resampling parameters")
-            params_and_ysim_pds = self.backend.map(self._accept_parameter, rng_and_index_pds)
-            params_and_ysim = self.backend.collect(params_and_ysim_pds)
-            new_parameters, new_y_sim, counter = [list(t) for t in zip(*params_and_ysim)]
-            new_parameters = np.array(new_parameters)
+            self._share_budget(key_arr)
+            if batch_size is None:
+                params_and_ysim_pds = self.backend.map(self._accept_parameter, key_and_index_pds)
+                params_and_ysim = self.backend.collect(params_and_ysim_pds)
+                new_parameters, new_y_sim, counter = [list(t) for t in zip(*params_and_ysim)]
+            else:
+                params_and_ysim_pds = self.backend.map(self._accept_parameter_batch, key_and_index_pds)
+                params_and_ysim = self.backend.collect(params_and_ysim_pds)
+                parameter_batches, y_sim_batches, counter = [list(t) for t in zip(*params_and_ysim)]
+                new_parameters = [theta for batch in parameter_batches for theta in batch]
+                new_y_sim = [y_sim for batch in y_sim_batches for y_sim in batch]
 
             for count in counter:
                 self.simulation_counter+=count
 
+            # Tasks which ran out of budget leave the generation incomplete, so that it is discarded together with
+            # its threshold
+            if any(theta is None for theta in new_parameters):
+                journal.configuration["stop_reason"] = self._abort_reason()
+                if accepted_y_sim is not None:
+                    epsilon.pop()
+                break
+
+            new_parameters = np.array(new_parameters)
+
             # Update the parameters
             accepted_parameters = new_parameters
             accepted_y_sim = new_y_sim
 
+            # The weights of the first generation are uniform, so the policy is consulted once they have been reweighted
+            converged = policy is not None and len(epsilon) > 1 and policy.should_stop(weights=importance_weights,
+                                                                                        epsilon=epsilon)
 
             # print("INFO: Saving configuration to output journal.")
-            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and aStep == steps - 1):
+            if (full_output == 1 and aStep <= steps - 1) or (full_output == 0 and (aStep == steps - 1 or converged)):
                 self.accepted_parameters_manager.update_broadcast(self.backend, accepted_parameters=accepted_parameters)
                 journal.add_parameters(copy.deepcopy(accepted_parameters))
-                journal.add_weights(copy.deepcopy(accepted_weights))
+                journal.add_log_weights(copy.deepcopy(accepted_log_weights))
                 journal.add_opt_values(copy.deepcopy(accepted_y_sim))
 
                 names_and_parameters = self._get_names_and_parameters()
                 journal.add_user_parameters(names_and_parameters)
                 journal.number_of_simulations.append(self.simulation_counter)
+                last_generation = None
+            else:
+                # Kept back to be written if the budget runs out before the next generation completes
+                last_generation = {"parameters": copy.deepcopy(accepted_parameters),
+                                   "log_weights": copy.deepcopy(accepted_log_weights),
+                                   "opt_values": copy.deepcopy(accepted_y_sim),
+                                   "number_of_simulations": self.simulation_counter}
+
+            if converged:
+                journal.configuration["stop_reason"] = "converged"
+                break
+
+        self._add_last_generation(journal, last_generation)
 
         # Add epsilon_arr to the journal
         journal.configuration["epsilon_arr"] = epsilon
 
         return journal
 
-    def _compute_epsilon(self, epsilon_new, epsilon, observations, accepted_y_sim, accepted_weights, n_samples,
-                         n_samples_per_param, alpha):
+    def _compute_epsilon(self, epsilon_new, epsilon, accepted_distances, accepted_weights, alpha):
         """
         Parameters
         ----------
@@ -2602,16 +3635,11 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
             New value for epsilon.
         epsilon: float
             Current threshold.
-        observations: numpy.ndarray
-            Observed data.
-        accepted_y_sim: numpy.ndarray
-            Accepted simulated data.
+        accepted_distances: numpy.ndarray
+            n_samples x n_samples_per_param matrix of the distances between the observed data and each data point
+            of the accepted simulated data.
         accepted_weights: numpy.ndarray
             Accepted weights.
-        n_samples: integer
-            Number of samples to generate.
-        n_samples_per_param: integer
-            Number of data points in each simulated data set.
         alpha: float
 
         Returns
@@ -2621,17 +3649,7 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
         """
 
         RHS = alpha * pow(sum(pow(accepted_weights, 2)), -1)
-        LHS = np.zeros(shape=(n_samples), )
-        for ind1 in range(n_samples):
-            numerator = 0.0
-            denominator = 0.0
-            for ind2 in range(n_samples_per_param):
-                numerator += (self.distance.distance(observations, [[accepted_y_sim[ind1][0][ind2]]]) < epsilon_new)
-                denominator += (self.distance.distance(observations, [[accepted_y_sim[ind1][0][ind2]]]) < epsilon[-1])
-            if(denominator==0):
-                LHS[ind1]=0
-            else:
-                LHS[ind1] = accepted_weights[ind1] * (numerator / denominator)
+        LHS = self._reweight(accepted_distances, accepted_weights, epsilon_new, epsilon[-1])
         if sum(LHS) == 0:
             result = RHS
         else:
@@ -2640,6 +3658,64 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
             result = RHS - LHS
         return (result)
 
+    def _reweight(self, accepted_distances, accepted_weights, epsilon_new, epsilon_old):
+        """
+        Computes the unnormalized weights of the accepted parameters when the threshold moves from epsilon_old to
+        epsilon_new, i.e. the old weights multiplied by the ratio of the number of simulated data points within each
+        threshold.
+
+        Parameters
+        ----------
+        accepted_distances: numpy.ndarray
+            n_samples x n_samples_per_param matrix of the distances between the observed data and each data point
+            of the accepted simulated data.
+        accepted_weights: numpy.ndarray
+            Accepted weights.
+        epsilon_new: float
+            New threshold.
+        epsilon_old: float
+            Old threshold.
+
+        Returns
+        -------
+        numpy.ndarray
+            The new weights, with length n_samples.
+        """
+
+        return np.exp(self._log_reweight(accepted_distances, accepted_weights, epsilon_new, epsilon_old))
+
+    def _log_reweight(self, accepted_distances, accepted_weights, epsilon_new, epsilon_old):
+        """
+        Computes the logarithm of the unnormalized weights returned by _reweight. Parameters whose simulated data
+        points all lie outside of the old threshold get a log-weight of -inf.
+
+        Parameters
+        ----------
+        accepted_distances: numpy.ndarray
+            n_samples x n_samples_per_param matrix of the distances between the observed data and each data point
+            of the accepted simulated data.
+        accepted_weights: numpy.ndarray
+            Accepted weights.
+        epsilon_new: float
+            New threshold.
+        epsilon_old: float
+            Old threshold.
+
+        Returns
+        -------
+        numpy.ndarray
+            The logarithm of the new weights, with length n_samples.
+        """
+
+        numerator = np.sum(accepted_distances < epsilon_new, axis=1)
+        denominator = np.sum(accepted_distances < epsilon_old, axis=1)
+        new_log_weights = np.full(len(accepted_distances), -np.inf)
+        nonzero = (denominator != 0) & (numerator != 0)
+        with np.errstate(divide='ignore'):
+            log_accepted_weights = np.log(np.array(accepted_weights, dtype=float).reshape(-1,))
+        new_log_weights[nonzero] = log_accepted_weights[nonzero] + np.log(numerator[nonzero]) - np.log(denominator[nonzero])
+        return new_log_weights
+
     def _bisection(self, func, low, high, tol):
         midpoint = (low + high) / 2.0
         while (high - low) / 2.0 > tol:
@@ -2653,17 +3729,39 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
         return midpoint
 
-    def _update_broadcasts(self, accepted_y_sim):
+    def _update_broadcasts(self, accepted_y_sim, accepted_distances):
         def destroy(bc):
             if bc != None:
                 bc.unpersist
                 # bc.destroy
         if not accepted_y_sim is None:
             self.accepted_y_sim_bds = self.backend.broadcast(accepted_y_sim)
+        if not accepted_distances is None:
+            self.accepted_distances_bds = self.backend.broadcast(accepted_distances)
+
+    # define helper functions for map step
+    def _compute_distances(self, y_sims):
+        """
+        Computes the distance between the observed data and each data point of the simulated data sets.
+
+        Parameters
+        ----------
+        y_sims: list
+            Simulated data sets, each containing n_samples_per_param data points.
+
+        Returns
+        -------
+        numpy.ndarray
+            len(y_sims) x n_samples_per_param matrix of distances.
+        """
 
-            # define helper functions for map step
+        observations = self.accepted_parameters_manager.observations_bds.value()
+        distances = np.zeros(shape=(len(y_sims), self.n_samples_per_param))
+        for index, y_sim in enumerate(y_sims):
+            distances[index, :] = self.distance.batch_distance(observations, [[[y_sim[0][ind]]] for ind in range(self.n_samples_per_param)])
+        return distances
 
-    def _accept_parameter(self, rng_and_index):
+    def _accept_parameter(self, key_and_index):
         """
         Samples a single model parameter and simulate from it until
         distance between simulated outcome and the observation is
@@ -2671,19 +3769,19 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
         Parameters
         ----------
-        seed_and_index: numpy.ndarray
-            2 dimensional array. The first entry specifies the initial seed for the random number generator.
+        key_and_index: numpy.ndarray
+            2 dimensional array. The first entry specifies the key of the random number stream of the task.
             The second entry defines the index in the data set.
 
         Returns
         -------
         Tuple
-            The first entry of the tuple is the accepted parameters. The second entry is the simulated data set.
+            The first entry of the tuple is the accepted parameters. The second entry is the simulated data set. Both
+            are None if the budget of the task was exhausted before.
         """
 
-        rng = rng_and_index[0]
-        index = rng_and_index[1]
-        rng.seed(rng.randint(np.iinfo(np.uint32).max, dtype=np.uint32))
+        rng = self.rng_streams.generator(key_and_index[0])
+        index = key_and_index[1]
 
         mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(
             self.accepted_parameters_manager.model)
@@ -2692,11 +3790,15 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
 
         # print("on seed " + str(seed) + " distance: " + str(distance) + " epsilon: " + str(self.epsilon))
         if self.accepted_parameters_manager.accepted_parameters_bds == None:
+            if not self._proposal_allowed(counter, key_and_index[0]):
+                return (None, None, counter)
             self.sample_from_prior(rng=rng)
             y_sim = self.simulate(self.n_samples_per_param, rng=rng)
             counter+=1
         else:
             if self.accepted_parameters_manager.accepted_weights_bds.value()[index] > 0:
+                if not self._proposal_allowed(counter, key_and_index[0]):
+                    return (None, None, counter)
                 theta = np.array(self.accepted_parameters_manager.accepted_parameters_bds.value()[index]).reshape(-1,)
                 while True:
                     perturbation_output = self.perturb(index, rng=rng)
@@ -2704,22 +3806,14 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
                         break
                 y_sim = self.simulate(self.n_samples_per_param, rng=rng)
                 counter+=1
-                y_sim_old = self.accepted_y_sim_bds.value()[index]
                 ## Calculate acceptance probability:
-                numerator = 0.0
-                denominator = 0.0
-                for ind in range(self.n_samples_per_param):
-                    numerator += (self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), [[y_sim[0][ind]]]) < self.epsilon[-1])
-                    denominator += (self.distance.distance(self.accepted_parameters_manager.observations_bds.value(), [[y_sim_old[0][ind]]]) < self.epsilon[-1])
+                numerator = np.sum(self._compute_distances([y_sim])[0] < self.epsilon[-1])
+                denominator = np.sum(self.accepted_distances_bds.value()[index] < self.epsilon[-1])
                 if denominator == 0:
                     ratio_data_epsilon = 1
                 else:
                     ratio_data_epsilon = numerator / denominator
-                ratio_prior_prob = self.pdf_of_prior(self.model, perturbation_output[1]) / self.pdf_of_prior(self.model, theta)
-                kernel_numerator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index, theta)
-                kernel_denominator = self.kernel.pdf(mapping_for_kernels, self.accepted_parameters_manager, index, perturbation_output[1])
-                ratio_likelihood_prob = kernel_numerator / kernel_denominator
-                acceptance_prob = min(1, ratio_data_epsilon * ratio_prior_prob * ratio_likelihood_prob)
+                acceptance_prob = min(1, ratio_data_epsilon * self._prior_and_kernel_ratio(mapping_for_kernels, index, theta, perturbation_output[1]))
                 if rng.binomial(1, acceptance_prob) == 1:
                     self.set_parameters(perturbation_output[1])
                 else:
@@ -2730,3 +3824,84 @@ class SMCABC(BaseDiscrepancy, InferenceMethod):
                 y_sim = self.accepted_y_sim_bds.value()[index]
 
         return (self.get_parameters(), y_sim, counter)
+
+    def _accept_parameter_batch(self, key_and_range):
+        """
+        Moves a block of particles like _accept_parameter, simulating the proposals of all of them with a single call
+        to simulate_batch. The first generation is sampled from the prior.
+
+        Parameters
+        ----------
+        key_and_range: numpy.ndarray
+            3 dimensional array. The first entry specifies the key of the random number stream of the task. The second
+            and third entry define the indices in the data set from which on and up to which the particles are moved.
+
+        Returns
+        -------
+        Tuple
+            The first entry of the tuple is the list of accepted parameters. The second entry is the list of simulated
+            data sets. Both only contain None if the budget of the task does not cover all of its simulations.
+        """
+
+        rng = self.rng_streams.generator(key_and_range[0])
+        indices = np.arange(key_and_range[1], key_and_range[2])
+
+        mapping_for_kernels, garbage_index = self.accepted_parameters_manager.get_mapping(
+            self.accepted_parameters_manager.model)
+
+        if self.accepted_parameters_manager.accepted_parameters_bds == None:
+            moved_indices = indices
+        else:
+            weights = self.accepted_parameters_manager.accepted_weights_bds.value()
+            moved_indices = [index for index in indices if weights[index] > 0]
+
+        # The block is only simulated if the share of the task covers all of its simulations, as the generation is
+        # discarded otherwise
+        task_simulations = self._task_simulations(key_and_range[0])
+        if len(moved_indices) > 0 and (not self._proposal_allowed(0, key_and_range[0]) or
+                                       (task_simulations is not None and len(moved_indices) > task_simulations)):
+            return ([None] * len(indices), [None] * len(indices), 0)
+
+        if self.accepted_parameters_manager.accepted_parameters_bds == None:
+            new_parameters = self.sample_from_prior_batch(len(indices), rng=rng)
+            y_sims = self.simulate_batch(new_parameters, self.n_samples_per_param, rng=rng)
+            return (list(new_parameters), y_sims, len(indices))
+
+        accepted_parameters = self.accepted_parameters_manager.accepted_parameters_bds.value()
+        accepted_y_sim = self.accepted_y_sim_bds.value()
+
+        new_thetas = []
+        for index in moved_indices:
+            while True:
+                perturbation_output = self.perturb(index, rng=rng)
+                if perturbation_output[0] and self.pdf_of_prior(self.model, perturbation_output[1]) != 0:
+                    break
+            new_thetas.append(perturbation_output[1])
+        if len(moved_indices) > 0:
+            new_y_sims = self.simulate_batch(np.array(new_thetas), self.n_samples_per_param, rng=rng)
+            new_distances = self._compute_distances(new_y_sims)
+
+        parameters = []
+        y_sims = []
+        position = 0
+        for index in indices:
+            theta = np.array(accepted_parameters[index]).reshape(-1,)
+            y_sim = accepted_y_sim[index]
+            if position < len(moved_indices) and moved_indices[position] == index:
+                ## Calculate acceptance probability:
+                numerator = np.sum(new_distances[position] < self.epsilon[-1])
+                denominator = np.sum(self.accepted_distances_bds.value()[index] < self.epsilon[-1])
+                if denominator == 0:
+                    ratio_data_epsilon = 1
+                else:
+                    ratio_data_epsilon = numerator / denominator
+                acceptance_prob = min(1, ratio_data_epsilon * self._prior_and_kernel_ratio(mapping_for_kernels, index, theta, new_thetas[position]))
+                if rng.binomial(1, acceptance_prob) == 1:
+                    theta = new_thetas[position]
+                    y_sim = new_y_sims[position]
+                position += 1
+            self.set_parameters(theta)
+            parameters.append(self.get_parameters())
+            y_sims.append(y_sim)
+
+        return (parameters, y_sims, len(moved_indices))
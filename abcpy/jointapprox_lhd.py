@@ -52,6 +52,26 @@ class JointApprox_likelihood(metaclass = ABCMeta):
 
         raise NotImplemented
 
+    def loglikelihood(self, d1, d2):
+        """Computes the logarithm of the combined approximate likelihood. The
+        default implementation takes the logarithm of likelihood().
+
+        Parameters
+        ----------
+        d1: Python list
+            Contains lists which are datasets corresponding to root models.
+        d2: Python list
+            Contains lists which are datasets corresponding to root models.
+
+        Returns
+        -------
+        float
+            Logarithm of the computed approximate likelihood.
+        """
+
+        with np.errstate(divide='ignore'):
+            return np.log(self.likelihood(d1, d2))
+
 class ProductCombination(JointApprox_likelihood):
     """
     This class implements the product combination of different approximate likelihoods computed on different datasets corresponding to
@@ -83,8 +103,26 @@ class ProductCombination(JointApprox_likelihood):
         if len(d1)!=len(d2):
             raise ValueError('Both the datasets should contain dataset for each of the root models')
 
-        combined_likelihood = 1.0
+        return np.exp(self.loglikelihood(d1, d2))
+
+
+    def loglikelihood(self, d1, d2):
+        """Combine the log-likelihoods of the different datasets by summation.
+
+        Parameters
+        ----------
+        d1, d2: list
+            A list, containing lists describing the different data sets
+        """
+        if not isinstance(d1, list):
+            raise TypeError('Data is not of allowed types')
+        if not isinstance(d2, list):
+            raise TypeError('Data is not of allowed types')
+        if len(d1)!=len(d2):
+            raise ValueError('Both the datasets should contain dataset for each of the root models')
+
+        combined_loglikelihood = 0.0
         for ind in range(len(self.approx_lhds)):
-            combined_likelihood *= self.approx_lhds[ind].likelihood(d1[ind], d2[ind])
+            combined_loglikelihood += self.approx_lhds[ind].loglikelihood(d1[ind], d2[ind])
 
-        return combined_likelihood
\ No newline at end of file
+        return combined_loglikelihood
\ No newline at end of file
@@ -126,6 +126,38 @@ class LinearCombination(JointDistance):
 
         return combined_distance
 
+
+    def batch_distance(self, d1, d2_list):
+        """Combine the distances between the observed datasets and each of the simulated datasets in a batch.
+
+        Parameters
+        ----------
+        d1: list
+            A list, containing lists describing the different data sets
+        d2_list: list
+            A list of B entries, each a list containing lists describing the different data sets
+
+        Returns
+        -------
+        numpy.ndarray
+            The B combined distances.
+        """
+        if not isinstance(d1, list):
+            raise TypeError('Data is not of allowed types')
+        if not isinstance(d2_list, list):
+            raise TypeError('Data is not of allowed types')
+        for d2 in d2_list:
+            if not isinstance(d2, list):
+                raise TypeError('Data is not of allowed types')
+            if len(d1)!=len(d2):
+                raise ValueError('Both the datasets should contain dataset for each of the root models')
+
+        combined_distance = np.zeros(len(d2_list))
+        for ind in range(len(self.distances)):
+            combined_distance += self.weights[ind]*self.distances[ind].batch_distance(d1[ind], [d2[ind] for d2 in d2_list])
+
+        return combined_distance
+
     
     def dist_max(self):
         combined_distance_max = 0.0
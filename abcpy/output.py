@@ -1,4 +1,5 @@
 import numpy as np
+import os
 import pickle
 
 
@@ -14,6 +15,8 @@ class Journal:
         a nxpxt matrix
     weights : numpy.array
         a nxt matrix
+    log_weights : numpy.array
+        a nxt matrix containing the logarithm of the weights, if provided by the inference scheme
     opt_value: numpy.array
         nxp matrix containing for each parameter the evaluated objective function for every time step
     configuration: Python dictionary
@@ -34,6 +37,7 @@ class Journal:
         
         self.parameters = []
         self.weights = []
+        self.log_weights = []
         self.distances = []
         self.opt_values = []
         self.configuration = {}
@@ -184,6 +188,48 @@ class Journal:
         if self._type == 1:
             self.weights.append(weights)
 
+
+    def get_log_weights(self, iteration=None):
+        """
+        Returns the logarithm of the weights from a sampling scheme. If the scheme only stored the weights, their
+        logarithm is returned.
+
+        For intermediate results, pass the iteration.
+
+        Parameters
+        ----------
+        iteration: int
+            specify the iteration for which to return the log-weights
+        """
+
+        if iteration is None:
+            iteration = len(self.weights) - 1
+        log_weights = getattr(self, 'log_weights', [])
+        if len(log_weights) == len(self.weights):
+            return log_weights[iteration]
+        with np.errstate(divide='ignore'):
+            return np.log(self.weights[iteration])
+
+
+    def add_log_weights(self, log_weights):
+        """
+        Saves provided log-weights by appending them to the journal, together with the corresponding weights. If
+        type==0, old weights get overwritten.
+
+        Parameters
+        ----------
+        log_weights: numpy.array
+            vector containing the logarithm of n weigths
+        """
+
+        if self._type == 0:
+            self.log_weights = [log_weights]
+
+        if self._type == 1:
+            self.log_weights.append(log_weights)
+
+        self.add_weights(np.exp(log_weights))
+
     def get_distances(self, iteration=None):
         """
         Returns the distances from a sampling scheme.
@@ -238,7 +284,8 @@ class Journal:
 
     def save(self, filename):
         """
-        Stores the journal to disk.
+        Stores the journal to disk. The journal is first written to a temporary file which then replaces
+        <filename>, such that an interrupted save never leaves a truncated journal behind.
 
         Parameters
         ----------
@@ -246,8 +293,12 @@ class Journal:
             the location of the file to store the current object to.
         """
         
-        with open(filename, 'wb') as output:
+        temporary_filename = filename + '.tmp'
+        with open(temporary_filename, 'wb') as output:
             pickle.dump(self, output, -1)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary_filename, filename)
             
 
 
@@ -2,7 +2,8 @@ from abc import ABCMeta, abstractmethod
 from abcpy.probabilisticmodels import Continuous
 import numpy as np
 from scipy.stats import multivariate_normal
-from scipy.special import gamma
+from scipy.special import gamma, gammaln, logsumexp
+from scipy.linalg import solve_triangular
 
 
 class PerturbationKernel(metaclass = ABCMeta):
@@ -92,6 +93,44 @@ class PerturbationKernel(metaclass = ABCMeta):
             raise NotImplementedError
 
 
+    def logpdf(self, accepted_parameters_manager, kernel_index, x, row_index=None):
+        """
+        Calculates the logarithm of the pdf of the kernel centred at each row of the accepted parameters, for all
+        points in x. This default implementation falls back to calling pdf for every pair of point and row; kernels
+        should override it with a vectorized version where possible.
+
+        Parameters
+        ----------
+        accepted_parameters_manager: abcpy.acceptedparametersmanager object
+            The accepted parameters manager that manages all bds objects.
+        kernel_index: integer
+            The index of the kernel in the list of kernels of the joint perturbation kernel.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the pdf should be evaluated.
+        row_index: integer, optional
+            If given, only the kernel centred at this row of the accepted parameters is evaluated. The default value
+            is None, meaning all rows.
+
+        Returns
+        -------
+        numpy.ndarray:
+            A mxn matrix, the entry (i,j) being the log pdf at point i of the kernel centred at the accepted row j. If
+            row_index is given, a mx1 matrix.
+        """
+
+        if row_index is None:
+            row_indices = range(len(accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]))
+        else:
+            row_indices = [row_index]
+        result = np.zeros((len(x), len(row_indices)))
+        with np.errstate(divide='ignore'):
+            for point_index, point in enumerate(x):
+                for column, index in enumerate(row_indices):
+                    result[point_index, column] = np.log(
+                        self.pdf(accepted_parameters_manager, kernel_index, index, point))
+        return result
+
+
 class ContinuousKernel(metaclass = ABCMeta):
     """This abstract base class represents all perturbation kernels acting on continuous parameters."""
 
@@ -243,6 +282,84 @@ class JointPerturbationKernel(PerturbationKernel):
         return result
 
 
+    def logpdf(self, mapping, accepted_parameters_manager, x, row_index=None):
+        """
+        Calculates the overall log pdf of the kernel centred at each row of the accepted parameters, for all points in
+        x.
+
+        Parameters
+        ----------
+        mapping: list
+            Each entry is a tupel of which the first entry is a abcpy.ProbabilisticModel object, the second entry is the
+            index in the accepted_parameters_bds list corresponding to an output of this model.
+        accepted_parameters_manager: abcpy.AcceptedParametersManager object
+            The AcceptedParametersManager to be used.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the pdf should be evaluated.
+        row_index: integer, optional
+            If given, only the kernel centred at this row of the accepted parameters is evaluated. The default value
+            is None, meaning all rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            A mxn matrix, the entry (i,j) being the log pdf at point i of the kernel centred at the accepted row j. If
+            row_index is given, a mx1 matrix.
+        """
+
+        x = np.array(x, dtype=float).reshape(len(x), -1)
+        result = 0.
+
+        for kernel_index, kernel in enumerate(self.kernels):
+            # Define the columns of x relevant to the current kernel
+            columns = []
+            for kernel_model in kernel.models:
+                for model, model_output_index in mapping:
+                    if(kernel_model==model):
+                        columns.append(model_output_index)
+            result = result + kernel.logpdf(accepted_parameters_manager, kernel_index, x[:, columns], row_index)
+
+        return result
+
+
+    def log_mixture_pdf(self, mapping, accepted_parameters_manager, x, block_size=2**20):
+        """
+        Calculates the logarithm of the mixture of kernels centred at the accepted parameters and weighted by the
+        accepted weights, for all points in x. Commonly used to calculate importance weights. The computation is done in
+        blocks of points, such that at most block_size kernel evaluations are held in memory at once.
+
+        Parameters
+        ----------
+        mapping: list
+            Each entry is a tupel of which the first entry is a abcpy.ProbabilisticModel object, the second entry is the
+            index in the accepted_parameters_bds list corresponding to an output of this model.
+        accepted_parameters_manager: abcpy.AcceptedParametersManager object
+            The AcceptedParametersManager to be used.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the mixture should be evaluated.
+        block_size: integer
+            The maximal number of kernel evaluations done at once.
+
+        Returns
+        -------
+        numpy.ndarray
+            The log of the mixture density evaluated at each of the m points.
+        """
+
+        x = np.array(x, dtype=float).reshape(len(x), -1)
+        weights = np.array(accepted_parameters_manager.accepted_weights_bds.value(), dtype=float).reshape(-1)
+        with np.errstate(divide='ignore'):
+            log_weights = np.log(weights)
+
+        rows_per_block = max(1, block_size // len(log_weights))
+        result = np.zeros(len(x))
+        for start in range(0, len(x), rows_per_block):
+            log_pdfs = self.logpdf(mapping, accepted_parameters_manager, x[start:start+rows_per_block])
+            result[start:start+rows_per_block] = logsumexp(log_pdfs + log_weights, axis=1)
+
+        return result
+
+
 class MultivariateNormalKernel(PerturbationKernel, ContinuousKernel):
     """This class defines a kernel perturbing the parameters using a multivariate normal distribution."""
 
@@ -300,13 +417,13 @@ class MultivariateNormalKernel(PerturbationKernel, ContinuousKernel):
             The perturbed parameter values.
         """
 
-        # Get all current parameter values relevant for this model
-        continuous_model_values = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]
+        # Get the current parameter values of the perturbed row relevant for this model
+        continuous_model_values = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index][row_index]
 
         # Perturb
         continuous_model_values = np.array(continuous_model_values).astype(float)
         cov = np.array(accepted_parameters_manager.accepted_cov_mats_bds.value()[kernel_index]).astype(float)
-        perturbed_continuous_values = rng.multivariate_normal(continuous_model_values[row_index], cov)
+        perturbed_continuous_values = rng.multivariate_normal(continuous_model_values, cov)
         return perturbed_continuous_values
 
 
@@ -339,6 +456,47 @@ class MultivariateNormalKernel(PerturbationKernel, ContinuousKernel):
         return multivariate_normal(mean, cov).pdf(x)
 
 
+    def logpdf(self, accepted_parameters_manager, kernel_index, x, row_index=None):
+        """Calculates the log pdf of the kernel centred at each row of the accepted parameters, for all points in x.
+        The Mahalanobis distances are computed at once using the Cholesky factor of the covariance matrix.
+
+        Parameters
+        ----------
+        accepted_parameters_manager: abcpy.AcceptedParametersManager object
+            The AcceptedParametersManager to be used.
+        kernel_index: integer
+            The index of the kernel in the list of kernels in the joint kernel.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the pdf should be evaluated.
+        row_index: integer, optional
+            If given, only the kernel centred at this row of the accepted parameters is evaluated. The default value
+            is None, meaning all rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            A mxn matrix, the entry (i,j) being the log pdf at point i of the kernel centred at the accepted row j. If
+            row_index is given, a mx1 matrix.
+        """
+
+        mean = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]
+        if row_index is not None:
+            mean = mean[row_index:row_index + 1]
+        mean = np.array(mean).astype(float)
+        mean = mean.reshape(len(mean), -1)
+        p = mean.shape[1]
+        cov = np.array(accepted_parameters_manager.accepted_cov_mats_bds.value()[kernel_index]).astype(float).reshape(p, p)
+        x = np.array(x, dtype=float).reshape(-1, p)
+
+        L = np.linalg.cholesky(cov)
+        log_det = 2 * np.sum(np.log(np.diag(L)))
+        diff = (x[:, np.newaxis, :] - mean[np.newaxis, :, :]).reshape(-1, p)
+        z = solve_triangular(L, diff.T, lower=True)
+        mahalanobis = np.sum(z ** 2, axis=0).reshape(len(x), len(mean))
+
+        return -0.5 * (p * np.log(2 * np.pi) + log_det + mahalanobis)
+
+
 class MultivariateStudentTKernel(PerturbationKernel, ContinuousKernel):
     def __init__(self, models, df):
         """This class defines a kernel perturbing the parameters using a multivariate normal distribution.
@@ -407,13 +565,12 @@ class MultivariateStudentTKernel(PerturbationKernel, ContinuousKernel):
 
         """
 
-        # Get all parameters relevant to this kernel
-        continuous_model_values = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]
+        # Get the parameters of the perturbed row relevant to this kernel
+        continuous_model_values = np.array(accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index][row_index])
 
         # Perturb
-        continuous_model_values = np.array(continuous_model_values)
         cov = np.array(accepted_parameters_manager.accepted_cov_mats_bds.value()[kernel_index])
-        p = len(continuous_model_values[row_index])
+        p = len(continuous_model_values)
 
         if(self.df==np.inf):
             chisq = 1.0
@@ -423,7 +580,7 @@ class MultivariateStudentTKernel(PerturbationKernel, ContinuousKernel):
 
 
         mvn = rng.multivariate_normal(np.zeros(p), cov.astype(float), 1)
-        perturbed_continuous_values = continuous_model_values[row_index]+np.divide(mvn, np.sqrt(chisq))[0]
+        perturbed_continuous_values = continuous_model_values+np.divide(mvn, np.sqrt(chisq))[0]
         return perturbed_continuous_values
 
 
@@ -462,6 +619,46 @@ class MultivariateStudentTKernel(PerturbationKernel, ContinuousKernel):
         return density
 
 
+    def logpdf(self, accepted_parameters_manager, kernel_index, x, row_index=None):
+        """Calculates the log pdf of the kernel centred at each row of the accepted parameters, for all points in x.
+
+        Parameters
+        ----------
+        accepted_parameters_manager: abcpy.AcceptedParametersManager object
+            The AcceptedParametersManager to be used.
+        kernel_index: integer
+            The index of the kernel in the list of kernels in the joint kernel.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the pdf should be evaluated.
+        row_index: integer, optional
+            If given, only the kernel centred at this row of the accepted parameters is evaluated. The default value
+            is None, meaning all rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            A mxn matrix, the entry (i,j) being the log pdf at point i of the kernel centred at the accepted row j. If
+            row_index is given, a mx1 matrix.
+        """
+
+        mean = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]
+        if row_index is not None:
+            mean = mean[row_index:row_index + 1]
+        mean = np.array(mean).astype(float)
+        mean = mean.reshape(len(mean), -1)
+        p = mean.shape[1]
+        cov = np.array(accepted_parameters_manager.accepted_cov_mats_bds.value()[kernel_index]).astype(float).reshape(p, p)
+        x = np.array(x, dtype=float).reshape(-1, p)
+        v = self.df
+
+        log_normalizing_const = gammaln((v + p) / 2) - gammaln(v / 2) - p / 2. * np.log(v * np.pi) \
+                                - 0.5 * np.log(abs(np.linalg.det(cov)))
+        diff = x[:, np.newaxis, :] - mean[np.newaxis, :, :]
+        mahalanobis = np.einsum('ijk,kl,ijl->ij', diff, np.linalg.inv(cov), diff)
+
+        return log_normalizing_const - ((v + p) / 2.) * np.log(1 + mahalanobis / v)
+
+
 class RandomWalkKernel(PerturbationKernel, DiscreteKernel):
     def __init__(self, models):
         """
@@ -499,7 +696,7 @@ class RandomWalkKernel(PerturbationKernel, DiscreteKernel):
         discrete_model_values = accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index]
 
         perturbed_discrete_values = []
-        discrete_model_values = np.array(discrete_model_values)[row_index]
+        discrete_model_values = np.array(discrete_model_values[row_index])
 
         # Implement a random walk for the discrete parameter values
         for discrete_value in discrete_model_values:
@@ -542,6 +739,36 @@ class RandomWalkKernel(PerturbationKernel, DiscreteKernel):
         return 1./3
 
 
+    def logpdf(self, accepted_parameters_manager, kernel_index, x, row_index=None):
+        """
+        Calculates the log pmf of the kernel centred at each row of the accepted parameters, for all points in x.
+
+        Parameters
+        ----------
+        accepted_parameters_manager: abcpy.AcceptedParametersManager object
+            The AcceptedParametersManager to be used.
+        kernel_index: integer
+            The index of the kernel in the list of kernels of the joint kernel.
+        x: numpy.ndarray
+            A mxp matrix, each row being a point at which the pmf should be evaluated.
+        row_index: integer, optional
+            If given, only the kernel centred at this row of the accepted parameters is evaluated. The default value
+            is None, meaning all rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            A mxn matrix, the entry (i,j) being the log pmf at point i of the kernel centred at the accepted row j. If
+            row_index is given, a mx1 matrix.
+        """
+
+        if row_index is None:
+            n_rows = len(accepted_parameters_manager.kernel_parameters_bds.value()[kernel_index])
+        else:
+            n_rows = 1
+        return np.full((len(x), n_rows), np.log(1./3))
+
+
 class DefaultKernel(JointPerturbationKernel):
     def __init__(self, models):
         """
@@ -4,6 +4,10 @@ import numpy as np
 
 
 class InputConnector():
+    # Counts the changes to the connections of all models, such that cached execution plans of a graph can detect
+    # that the graph has changed
+    modification_count = 0
+
     def __init__(self, dimension):
         """
         Creates input parameters of given dimensionality. Each dimension needs to be specified using the set method.
@@ -195,6 +199,18 @@ class InputConnector():
         return self._models[index]
 
 
+    def get_model_index(self, index):
+        """
+        Returns the index into the output values of the model at index.
+
+        Returns
+        -------
+        int
+        """
+
+        return self._model_indices[index]
+
+
     def get_parameter_count(self):
         """
         Returns the number of parameters.
@@ -228,6 +244,7 @@ class InputConnector():
 
         self._models[index] = model
         self._model_indices[index] = model_index
+        InputConnector.modification_count += 1
         if (self._models != None):
             self._all_indices_specified = True
 
@@ -592,6 +609,79 @@ class ProbabilisticModel(metaclass = ABCMeta):
             raise NotImplementedError
 
 
+    def logpdf(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function at point x.
+
+        The default implementation takes the logarithm of pdf(); models should overwrite it whenever the log-density
+        can be computed directly.
+
+        Parameters
+        ----------
+        input_values: list
+            List of input parameters, in the same order as specified in the InputConnector passed to the init function
+        x: list
+            The point at which the log-pdf should be evaluated.
+
+        Returns
+        -------
+        float:
+            The log-pdf evaluated at point x, -inf where the pdf is zero.
+        """
+
+        with np.errstate(divide='ignore'):
+            return np.log(self.pdf(input_values, x))
+
+
+    def logpdf_batch(self, input_values, x):
+        """
+        Calculates the logarithm of the probability density function for n sets of input values and n points at once.
+
+        The default implementation calls logpdf once per row. Models should overwrite it whenever the log-density can
+        be evaluated for all rows with vectorized operations.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            An n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            An n x output_dim matrix, the i-th row being the point at which the log-pdf for the i-th row of input
+            values should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n log-pdf values, -inf where the pdf is zero.
+        """
+
+        x = np.asarray(x).reshape(len(x), -1)
+        return np.array([self.logpdf(list(values), point[0] if len(point) == 1 else point)
+                         for values, point in zip(input_values, x)], dtype=float)
+
+
+    def pdf_batch(self, input_values, x):
+        """
+        Calculates the probability density function for n sets of input values and n points at once.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            An n x input_dim matrix, each row containing the input parameters in the same order as specified in the
+            InputConnector passed to the init function
+        x: numpy.ndarray
+            An n x output_dim matrix, the i-th row being the point at which the pdf for the i-th row of input values
+            should be evaluated.
+
+        Returns
+        -------
+        numpy.ndarray
+            The n pdf values.
+        """
+
+        return np.exp(self.logpdf_batch(input_values, x))
+
+
     def calculate_and_store_pdf_if_needed(self, x):
         """
         Calculates the probability density function at point x and stores the result internally for later use.
@@ -713,6 +803,35 @@ class ProbabilisticModel(metaclass = ABCMeta):
         raise NotImplementedError
 
 
+    def forward_simulate_batch(self, input_values, k, rng=np.random.RandomState()):
+        """
+        Provides the output of k forward simulations of the current model for each of n sets of input values at once.
+
+        The default implementation calls forward_simulate once per set of input values. Models whose simulator is
+        vectorized over its parameters should overwrite this method, such that a task holding many particles needs a
+        single call.
+
+        Parameters
+        ----------
+        input_values: numpy.ndarray
+            An n x input_dim matrix, each row being a concatenation of all parent model outputs in the order specified
+            by the InputConnector object that was passed during initialization.
+        k: integer
+            The number of forward simulations that should be run for each row of input values
+        rng: Random number generator
+            Defines the random number generator to be used. The default value uses a random seed to initialize the
+            generator.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n, k, get_output_dimension()), the i-th entry containing the k forward simulations for
+            the i-th row of input values.
+        """
+
+        return np.array([self.forward_simulate(list(row), k, rng=rng) for row in input_values])
+
+
     @abstractmethod
     def get_output_dimension(self):
         """
@@ -855,6 +974,14 @@ class Hyperparameter(ProbabilisticModel):
         return 1.
 
 
+    def logpdf(self, input_values, x):
+        return 0.
+
+
+    def logpdf_batch(self, input_values, x):
+        return np.zeros(len(x))
+
+
 class ModelResultingFromOperation(ProbabilisticModel):
     """This class implements probabilistic models returned after performing an operation on two probabilistic models
         """
@@ -924,6 +1051,13 @@ class ModelResultingFromOperation(ProbabilisticModel):
         # Since the nodes provided as input have to be independent, the resulting pdf will be pdf(parent 1)*pfd(parent 2). During the recursive graph action, this is calculated automatically, so the pdf at this node is expected to be 1
         return 1.
 
+
+    def logpdf(self, input_values, x):
+        return 0.
+
+    def logpdf_batch(self, input_values, x):
+        return np.zeros(len(x))
+
     def sample_from_input_models(self, k, rng=np.random.RandomState()):
         """
         Return for each input model k samples.
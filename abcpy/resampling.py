@@ -0,0 +1,174 @@
+from abc import ABCMeta, abstractmethod
+
+import numpy as np
+
+
+class ResamplingPolicy(metaclass = ABCMeta):
+    """This abstract base class represents policies that decide, once per generation of a sequential inference
+    scheme, whether the population should be resampled and whether sampling has converged and can be stopped.
+    """
+
+    @abstractmethod
+    def should_resample(self, weights):
+        """
+        Decides whether a weighted population should be resampled.
+
+        Parameters
+        ----------
+        weights: numpy.ndarray
+            The (not necessarily normalized) importance weights of the population.
+
+        Returns
+        -------
+        boolean
+            True if the population should be resampled.
+        """
+
+        raise NotImplementedError
+
+
+    @abstractmethod
+    def resample(self, weights, rng, n_samples=None):
+        """
+        Draws the indices of a resampled population.
+
+        Parameters
+        ----------
+        weights: numpy.ndarray
+            The (not necessarily normalized) importance weights of the population.
+        rng: numpy.random.RandomState
+            The random number generator to be used.
+        n_samples: integer, optional
+            The size of the resampled population. The default value is None, meaning the size of the population.
+
+        Returns
+        -------
+        numpy.ndarray
+            The indices of the resampled particles.
+        """
+
+        raise NotImplementedError
+
+
+    @abstractmethod
+    def should_stop(self, weights=None, epsilon=None, acceptance_rate=None):
+        """
+        Decides whether the sequential scheme has converged and should stop after the current generation.
+
+        Parameters
+        ----------
+        weights: numpy.ndarray, optional
+            The importance weights of the current population.
+        epsilon: list, optional
+            The thresholds used so far, the one of the current generation being the last.
+        acceptance_rate: float, optional
+            The fraction of simulations accepted in the current generation.
+
+        Returns
+        -------
+        boolean
+            True if sampling should stop.
+        """
+
+        raise NotImplementedError
+
+
+    def effective_sample_size(self, weights):
+        """
+        Computes the effective sample size (1 / sum of the squared normalized weights) of a weighted population.
+
+        Parameters
+        ----------
+        weights: numpy.ndarray
+            The (not necessarily normalized) importance weights of the population.
+
+        Returns
+        -------
+        float
+            The effective sample size.
+        """
+
+        weights = np.asarray(weights, dtype=float).reshape(-1)
+        weights = weights / np.sum(weights)
+        return 1.0 / np.sum(weights ** 2)
+
+
+
+class ESSPolicy(ResamplingPolicy):
+    """
+    Resamples whenever the effective sample size (ESS) drops below a fraction of the population size and stops once the
+    posterior has stopped moving, as measured by the ESS, the progress of the threshold and the acceptance rate.
+
+    Resampling is vectorized: with the systematic scheme a single uniform draw is shifted over n evenly spaced
+    positions, with the stratified scheme every position gets its own uniform draw. In both cases the positions are
+    located in the cumulative weights using a single binary search.
+    """
+
+    def __init__(self, resample_threshold=0.5, scheme='systematic', stop_ess_fraction=None,
+                 epsilon_tolerance=None, min_acceptance_rate=None):
+        """
+        Parameters
+        ----------
+        resample_threshold: float, optional
+            The population is resampled when its ESS is below resample_threshold times its size. The default value
+            is 0.5.
+        scheme: string, optional
+            Either 'systematic' or 'stratified'. The default value is 'systematic'.
+        stop_ess_fraction: float, optional
+            Sampling stops once the ESS of the population, before resampling, reaches stop_ess_fraction times its
+            size, i.e. the importance weights are close to uniform and the proposal matches the posterior. The
+            default value is None, meaning this criterion is not used.
+        epsilon_tolerance: float, optional
+            Sampling stops once the threshold decreases by less than epsilon_tolerance, relative to its previous
+            value, from one generation to the next. The default value is None, meaning this criterion is not used.
+        min_acceptance_rate: float, optional
+            Sampling stops once the acceptance rate of a generation falls below min_acceptance_rate. The default value
+            is None, meaning this criterion is not used.
+        """
+
+        if scheme not in ('systematic', 'stratified'):
+            raise ValueError("The resampling scheme has to be either 'systematic' or 'stratified'.")
+
+        self.resample_threshold = resample_threshold
+        self.scheme = scheme
+        self.stop_ess_fraction = stop_ess_fraction
+        self.epsilon_tolerance = epsilon_tolerance
+        self.min_acceptance_rate = min_acceptance_rate
+
+
+    def should_resample(self, weights):
+        n = np.asarray(weights).size
+        return self.effective_sample_size(weights) < self.resample_threshold * n
+
+
+    def resample(self, weights, rng, n_samples=None):
+        weights = np.asarray(weights, dtype=float).reshape(-1)
+        if n_samples is None:
+            n_samples = weights.size
+
+        if self.scheme == 'systematic':
+            positions = (np.arange(n_samples) + rng.uniform()) / n_samples
+        else:
+            positions = (np.arange(n_samples) + rng.uniform(size=n_samples)) / n_samples
+
+        cumulative_weights = np.cumsum(weights)
+        cumulative_weights /= cumulative_weights[-1]
+        # Guards against positions beyond the last cumulative weight due to rounding
+        return np.minimum(np.searchsorted(cumulative_weights, positions, side='right'), weights.size - 1)
+
+
+    def should_stop(self, weights=None, epsilon=None, acceptance_rate=None):
+        if self.stop_ess_fraction is not None and weights is not None:
+            if self.effective_sample_size(weights) >= self.stop_ess_fraction * np.asarray(weights).size:
+                return True
+
+        if self.epsilon_tolerance is not None and epsilon is not None:
+            epsilon = [np.max(eps) for eps in epsilon if eps is not None]
+            if len(epsilon) >= 2 and epsilon[-2] - epsilon[-1] <= self.epsilon_tolerance * abs(epsilon[-2]):
+                return True
+
+        if self.min_acceptance_rate is not None and acceptance_rate is not None:
+            if acceptance_rate < self.min_acceptance_rate:
+                return True
+
+        return False
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class RNGStreams:
+    """
+    This class splits a single seed into reproducible, statistically independent random number streams for parallel
+    tasks.
+
+    The streams are derived from a numpy.random.SeedSequence and driven by the counter-based Philox bit generator.
+    Instead of random number generators, only integer keys are shipped to the tasks, which create the generator of
+    their stream locally. The stream of a key depends neither on the backend nor on how the tasks are chunked.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Parameters
+        ----------
+        seed: integer, optional
+            The seed from which all streams are derived. The default value is None, meaning fresh entropy is drawn
+            from the operating system.
+        """
+
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.n_keys = 0
+
+
+    def keys(self, n):
+        """
+        Returns the keys of n new streams, which have not been handed out before.
+
+        Parameters
+        ----------
+        n: integer
+            The number of keys.
+
+        Returns
+        -------
+        numpy.ndarray
+            The keys of the streams.
+        """
+
+        keys = np.arange(self.n_keys, self.n_keys + n, dtype=np.int64)
+        self.n_keys += n
+        return keys
+
+
+    def generator(self, key):
+        """
+        Creates the random number generator of the stream with the given key. The generator offers the interface of
+        numpy.random.RandomState, such that it can be passed to the forward_simulate methods of the models.
+
+        Parameters
+        ----------
+        key: integer
+            The key of the stream.
+
+        Returns
+        -------
+        numpy.random.RandomState
+            The random number generator of the stream.
+        """
+
+        seed_sequence = np.random.SeedSequence(self.entropy, spawn_key=(int(key),))
+        return np.random.RandomState(np.random.Philox(seed_sequence))
@@ -2,6 +2,7 @@ from abc import ABCMeta, abstractmethod
 
 from abcpy.graphtools import GraphTools
 from abcpy.acceptedparametersmanager import *
+from abcpy.rngstreams import RNGStreams
 
 import numpy as np
 from sklearn import linear_model
@@ -59,6 +60,7 @@ class Semiautomatic(Summaryselections, GraphTools):
         self.statistics_calc = statistics_calc
         self.backend = backend
         self.rng = np.random.RandomState(seed)
+        self.rng_streams = RNGStreams(seed)
         self.n_samples_per_param = n_samples_per_param
 
         # An object managing the bds objects
@@ -66,11 +68,10 @@ class Semiautomatic(Summaryselections, GraphTools):
         self.accepted_parameters_manager.broadcast(self.backend, [])
 
         # main algorithm
-        seed_arr = self.rng.randint(1, n_samples * n_samples, size=n_samples, dtype=np.int32)
-        rng_arr = np.array([np.random.RandomState(seed) for seed in seed_arr])
-        rng_pds = self.backend.parallelize(rng_arr)
+        key_arr = self.rng_streams.keys(n_samples)
+        key_pds = self.backend.parallelize(key_arr)
 
-        sample_parameters_statistics_pds = self.backend.map(self._sample_parameter_statistics, rng_pds)
+        sample_parameters_statistics_pds = self.backend.map(self._sample_parameter_statistics, key_pds)
 
         sample_parameters_and_statistics = self.backend.collect(sample_parameters_statistics_pds)
         sample_parameters, sample_statistics = [list(t) for t in zip(*sample_parameters_and_statistics)]
@@ -88,7 +89,7 @@ class Semiautomatic(Summaryselections, GraphTools):
             raise ValueError('Mismatch in dimension of summary statistics')
         return np.dot(statistics, np.transpose(self.coefficients_learnt))
 
-    def _sample_parameter_statistics(self, rng=np.random.RandomState()):
+    def _sample_parameter_statistics(self, key):
         """
         Samples a single model parameter and simulates from it until
         distance between simulated outcome and the observation is
@@ -96,13 +97,14 @@ class Semiautomatic(Summaryselections, GraphTools):
 
         Parameters
         ----------
-        seed: int
-            value of a seed to be used for reseeding
+        key: int
+            The key of the random number stream of the task.
         Returns
         -------
         np.array
             accepted parameter
         """
+        rng = self.rng_streams.generator(key)
 
         self.sample_from_prior(rng=rng)
         parameter = self.get_parameters()
@@ -78,6 +78,31 @@ class GetAcceptedParametersBdsValuesTests(unittest.TestCase):
 
         self.assertTrue(all([all(a == b) for a, b in zip(values, values_expected)]))
 
+    def test_array(self):
+        B1 = Binomial([10, 0.2])
+        N1 = Normal([0.1, 0.01])
+        N2 = Normal([0.3, N1])
+        graph = Normal([B1, N2])
+
+        Manager = AcceptedParametersManager([graph])
+        backend = Backend()
+        accepted_parameters = np.array([[2,3,4],[0.27,0.32,0.28],[0.97,0.12,0.99]])
+        Manager.update_broadcast(backend, accepted_parameters)
+
+        # contiguous columns are returned as a view of the accepted parameters
+        values = Manager.get_accepted_parameters_bds_values([N2,N1])
+        np.testing.assert_array_equal(values, accepted_parameters[:, 1:])
+        self.assertTrue(np.shares_memory(values, accepted_parameters))
+
+        # other columns are selected in the order of the models
+        values = Manager.get_accepted_parameters_bds_values([N1,B1])
+        np.testing.assert_array_equal(values, accepted_parameters[:, [2,0]])
+
+        # the result agrees with the one for nested lists
+        Manager.update_broadcast(backend, accepted_parameters.tolist())
+        values_list = Manager.get_accepted_parameters_bds_values([N1,B1])
+        np.testing.assert_array_equal(np.array(values_list), values)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
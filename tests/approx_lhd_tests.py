@@ -57,6 +57,27 @@ class SynLiklihoodTests(unittest.TestCase):
         # This checks whether it computes a correct value and dimension is right
         self.assertLess(comp_likelihood - expected_likelihood, 10e-2)
 
+    def test_loglikelihood(self):
+        #Checks whether wrong input type produces error message
+        self.assertRaises(TypeError, self.likfun.loglikelihood, 3.4, [2,1])
+        self.assertRaises(TypeError, self.likfun.loglikelihood, [2,4], 3.4)
+
+        # create observed data
+        y_obs = [1.0, 2.0, 0.5]
+        # create fake simulated data
+        self.mu._fixed_values = [1.1]
+        self.sigma._fixed_values = [1.0]
+        y_sim = self.model.forward_simulate(self.model.get_input_values(), 100, rng=np.random.RandomState(1))
+        comp_loglikelihood = self.likfun.loglikelihood(y_obs, y_sim)
+        # This checks whether the log-likelihood agrees with the likelihood
+        self.assertAlmostEqual(comp_loglikelihood, np.log(0.006941779509926532))
+        self.assertAlmostEqual(np.exp(comp_loglikelihood), self.likfun.likelihood(y_obs, y_sim))
+
+        # This checks whether the log-likelihood stays finite where the likelihood underflows
+        y_obs = [9.8]
+        self.assertEqual(self.likfun.likelihood(y_obs, y_sim), 0.0)
+        self.assertTrue(np.isfinite(self.likfun.loglikelihood(y_obs, y_sim)))
+
 if __name__ == '__main__':
     unittest.main()
         
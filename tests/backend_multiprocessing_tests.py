@@ -0,0 +1,143 @@
+import os
+import pickle
+import sys
+import unittest
+import numpy as np
+
+from abcpy.backends import BackendDummy, BackendMultiprocessing
+from abcpy.continuousmodels import Normal, Uniform
+from abcpy.distances import Euclidean
+from abcpy.inferences import PMCABC, SMCABC
+from abcpy.statistics import Identity
+
+# multiprocessing.shared_memory is available from Python 3.8 on
+if sys.version_info >= (3, 8):
+    from abcpy.backends.multiprocessing import BDSMultiprocessing
+
+
+def setUpModule():
+    if sys.version_info < (3, 8):
+        raise unittest.SkipTest("The multiprocessing backend requires Python 3.8 or newer")
+
+    global backend_mp
+    backend_mp = BackendMultiprocessing(num_processes=2)
+
+
+def tearDownModule():
+    backend_mp.close()
+
+
+class MultiprocessingBackendTests(unittest.TestCase):
+
+    def test_map(self):
+        data = [1,2,3,4,5,6,7,8,9]
+        pds = backend_mp.parallelize(data)
+        pds_map = backend_mp.map(lambda x:x**2, pds)
+        self.assertEqual(backend_mp.collect(pds_map), [x**2 for x in data])
+
+        # the elements are processed by the worker processes, not by the master
+        pds_pid = backend_mp.map(lambda x:os.getpid(), pds)
+        self.assertTrue(os.getpid() not in backend_mp.collect(pds_pid))
+
+        # the order of the results does not depend on the chunks
+        backend_chunks = BackendMultiprocessing(num_processes=2, chunk_size=4)
+        self.assertEqual(backend_chunks.collect(backend_chunks.map(lambda x:x**2, pds)), [x**2 for x in data])
+        self.assertEqual(backend_chunks.collect(backend_chunks.map(lambda x:x, backend_chunks.parallelize([]))), [])
+        backend_chunks.close()
+
+    def test_broadcast(self):
+        data = [1,2,3,4,5]
+        pds = backend_mp.parallelize(data)
+
+        bds = backend_mp.broadcast(100)
+        pds_m = backend_mp.map(lambda x:x + bds.value(), pds)
+        self.assertEqual(backend_mp.collect(pds_m), [101,102,103,104,105])
+
+        # arrays are read from shared memory in the workers
+        array = np.arange(1200.).reshape(3, 400)
+        bds = backend_mp.broadcast([array, [np.array([1, 2]), 'a', array[0].astype(np.float32)], np.array([])])
+        self.assertEqual(len(bds._segments), 1)
+
+        def read_broadcast(x):
+            broadcast = bds.value()
+            return (broadcast[0][x].sum(), broadcast[0].flags.writeable, broadcast[1][0].tolist(), broadcast[1][1],
+                    broadcast[1][2].sum(), broadcast[2].shape)
+
+        result = backend_mp.collect(backend_mp.map(read_broadcast, backend_mp.parallelize([0, 1, 2])))
+        self.assertEqual([r[0] for r in result], [array[x].sum() for x in range(3)])
+        self.assertTrue(all(r[1:] == (False, [1, 2], 'a', array[0].sum(), (0,)) for r in result))
+
+        # small arrays are pickled with the object instead
+        self.assertEqual(backend_mp.broadcast([np.ones(10)] * 10000)._segments, [])
+
+        # outside of a map the broadcast is pickled as a whole, for example into checkpoints
+        bds_copy = pickle.loads(pickle.dumps(bds))
+        np.testing.assert_array_equal(bds_copy.value()[0], array)
+
+    def test_bds_delete(self):
+        bds = backend_mp.broadcast(np.ones(1000))
+        names = set(segment.name for segment in bds._segments)
+        self.assertTrue(names <= BDSMultiprocessing.get_live_segments(), "BDS was not created")
+
+        del bds
+        self.assertTrue(names.isdisjoint(BDSMultiprocessing.get_live_segments()), "BDS was not deleted")
+
+    def test_function_pickle(self):
+        def square(x):
+            return x**2
+
+        class staticfunctest:
+            @staticmethod
+            def square(x):
+                return x**2
+
+        class nonstaticfunctest:
+            def square(self,x):
+                return x**2
+
+        data = [1,2,3,4,5]
+        expected_result = [1,4,9,16,25]
+        pds = backend_mp.parallelize(data)
+
+        self.assertEqual(backend_mp.collect(backend_mp.map(square, pds)), expected_result,
+                         "Failed pickle test for general function")
+        self.assertEqual(backend_mp.collect(backend_mp.map(lambda x:x**2, pds)), expected_result,
+                         "Failed pickle test for lambda function")
+        self.assertEqual(backend_mp.collect(backend_mp.map(staticfunctest.square, pds)), expected_result,
+                         "Failed pickle test for static function")
+        obj = nonstaticfunctest()
+        self.assertEqual(backend_mp.collect(backend_mp.map(obj.square, pds)), expected_result,
+                         "Failed pickle test for non-static function")
+
+    def test_inference(self):
+        # the results of an inference scheme do not depend on the backend
+        journals = []
+        for backend in [BackendDummy(), backend_mp]:
+            mu = Uniform([[-5.0], [5.0]], name='mu')
+            sigma = Uniform([[0.0], [10.0]], name='sigma')
+            model = Normal([mu, sigma])
+            dist_calc = Euclidean(Identity(degree=2, cross=0))
+            sampler = PMCABC([model], [dist_calc], backend, seed=1)
+            journals.append(sampler.sample([[np.array(9.8)]], 2, [10, 5], 10, n_samples_per_param=1))
+
+        for key in ['mu', 'sigma']:
+            np.testing.assert_array_equal(journals[0].get_parameters()[key], journals[1].get_parameters()[key])
+        np.testing.assert_array_equal(journals[0].get_weights(), journals[1].get_weights())
+
+    def test_inference_many_arrays(self):
+        # SMCABC broadcasts one small array of simulated data per particle
+        journals = []
+        for backend in [BackendDummy(), backend_mp]:
+            mu = Uniform([[-5.0], [5.0]], name='mu')
+            sigma = Uniform([[0.0], [10.0]], name='sigma')
+            model = Normal([mu, sigma])
+            dist_calc = Euclidean(Identity(degree=2, cross=0))
+            sampler = SMCABC([model], [dist_calc], backend, seed=1)
+            journals.append(sampler.sample([[np.array(9.8)]], 2, 2000, 1))
+
+        for key in ['mu', 'sigma']:
+            np.testing.assert_array_equal(journals[0].get_parameters()[key], journals[1].get_parameters()[key])
+
+
+if __name__ == '__main__':
+    unittest.main()
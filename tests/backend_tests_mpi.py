@@ -1,6 +1,8 @@
 import unittest
+import numpy as np
 from mpi4py import MPI
 from abcpy.backends import BackendMPI,BackendMPITestHelper
+from abcpy.backends.mpi import FunctionCache
 
 
 def setUpModule():
@@ -136,3 +138,104 @@ class MPIBackendTests(unittest.TestCase):
         pds_map4 = backend_mpi.map(obj.square ,pds)
         pds_res4 = backend_mpi.collect(pds_map4)
         self.assertTrue(pds_res4==expected_result,"Failed pickle test for non-static function")
+
+
+
+    def test_function_cache(self):
+        observation = np.arange(1000.)
+
+        class Scheme:
+            def __init__(self):
+                self.observation = observation
+                self.shift = 0
+
+            def shifted_sum(self, x):
+                return self.observation.sum() + self.shift + x
+
+        scheme = Scheme()
+        master_cache, slave_cache = FunctionCache(), FunctionCache()
+
+        #The function and the array are shipped the first time
+        digest, function_packed, new_arrays = master_cache.pack(scheme.shifted_sum)
+        self.assertTrue(function_packed is not None and len(new_arrays)==1)
+        self.assertTrue(slave_cache.unpack(digest, function_packed, new_arrays)(1)==observation.sum() + 1)
+
+        #A changed function is shipped again, but not its cached array
+        scheme.shift = 1
+        digest_changed, function_packed, new_arrays = master_cache.pack(scheme.shifted_sum)
+        self.assertTrue(digest_changed!=digest and function_packed is not None and len(new_arrays)==0)
+        self.assertTrue(len(function_packed) < observation.nbytes)
+        self.assertTrue(slave_cache.unpack(digest_changed, function_packed, new_arrays)(1)==observation.sum() + 2)
+
+        #An unchanged function is not shipped again
+        scheme.shift = 0
+        self.assertTrue(master_cache.pack(scheme.shifted_sum)==(digest, None, {}))
+        self.assertTrue(slave_cache.unpack(digest, None, {})(1)==observation.sum() + 1)
+
+        #The same holds for the maps of the backend
+        pds = backend_mpi.parallelize([1,2,3])
+        for shift in [0, 1, 0]:
+            scheme.shift = shift
+            pds_map = backend_mpi.map(scheme.shifted_sum, pds)
+            self.assertTrue(backend_mpi.collect(pds_map)==[observation.sum() + shift + x for x in [1,2,3]])
+        self.assertTrue(len(backend_mpi.function_cache.arrays)==1)
+
+
+    def test_broadcast_arrays(self):
+        large = np.arange(10000.).reshape(100, 100)
+        value = {'large': large, 'transposed': large.T, 'small': np.array([1, 2]), 'list': [large[0], 'a']}
+        bds = backend_mpi.broadcast(value)
+
+        def check_broadcast(x):
+            value = bds.value()
+            return [value['large'].sum(), value['transposed'][1, 0], value['small'].tolist(), value['list'][0].sum(),
+                    value['list'][1]]
+
+        pds = backend_mpi.parallelize([0]*4)
+        results = backend_mpi.collect(backend_mpi.map(check_broadcast, pds))
+        self.assertTrue(all(result==[large.sum(), 1., [1, 2], large[0].sum(), 'a'] for result in results))
+
+
+    def test_map_chunks(self):
+        #The chunks shrink as the data drains, the order of the results is kept
+        data = list(range(101))
+        pds = backend_mpi.parallelize(data)
+        pds_map = backend_mpi.map(lambda x:(x, MPI.COMM_WORLD.Get_rank()), pds)
+        res = backend_mpi.collect(pds_map)
+        self.assertTrue([r[0] for r in res]==data)
+
+        #The first chunk holds a share of all data rather than a single item
+        ranks = [r[1] for r in res]
+        self.assertTrue(ranks[-2]==ranks[-1])
+
+        #The speed of a worker scales its chunks by at most a factor of two,
+        #and no chunk exceeds the fair share of a worker
+        self.assertTrue(backend_mpi._guided_chunk_size(100, 2, {}, 1)==25)
+        self.assertTrue(backend_mpi._guided_chunk_size(100, 2, {1: 1e-6, 2: 1.}, 1)==50)
+        self.assertTrue(backend_mpi._guided_chunk_size(100, 2, {1: 1e-6, 2: 1.}, 2)==13)
+        self.assertTrue(backend_mpi._guided_chunk_size(101, 2, {1: 1., 2: 3.}, 1)==51)
+        self.assertTrue(backend_mpi._guided_chunk_size(1, 2, {}, 1)==1)
+
+
+    def test_map_large_items(self):
+        #Chunks are received with nonblocking requests, also when they are large
+        data = [np.full(20000, i) for i in range(20)]
+        pds = backend_mpi.parallelize(data)
+        res = backend_mpi.collect(backend_mpi.map(lambda x:x.sum(), pds))
+        self.assertTrue(res==[20000 * i for i in range(20)])
+
+
+    def test_collect(self):
+        #The results are streamed to the master during the map and collected from there
+        data = [1,2,3,4,5]
+        pds = backend_mpi.parallelize(data)
+        self.assertTrue(backend_mpi.collect(pds)==data)
+
+        pds_map = backend_mpi.map(lambda x:[x]*x, pds)
+        self.assertTrue(backend_mpi.pds_store[pds_map.pds_id]==[[x]*x for x in data])
+        self.assertTrue(backend_mpi.collect(pds_map)==[[x]*x for x in data])
+
+        #Deleting the PDS frees the results on the master
+        pds_id = pds_map.pds_id
+        del pds_map
+        self.assertTrue(pds_id not in backend_mpi.pds_store)
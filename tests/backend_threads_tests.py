@@ -0,0 +1,82 @@
+import threading
+import unittest
+import numpy as np
+
+from abcpy.backends import BackendDummy, BackendThreads
+from abcpy.continuousmodels import Normal, Uniform
+from abcpy.distances import Euclidean
+from abcpy.inferences import PMCABC
+from abcpy.statistics import Identity
+
+
+def setUpModule():
+    global backend_threads
+    backend_threads = BackendThreads(num_threads=2)
+
+
+def tearDownModule():
+    backend_threads.close()
+
+
+class ThreadsBackendTests(unittest.TestCase):
+
+    def test_map(self):
+        data = [1,2,3,4,5]
+        pds = backend_threads.parallelize(data)
+        pds_map = backend_threads.map(lambda x:x**2, pds)
+        self.assertEqual(backend_threads.collect(pds_map), [1,4,9,16,25])
+
+        # the elements are processed by the threads of the pool
+        pds_thread = backend_threads.map(lambda x:threading.get_ident(), pds)
+        self.assertTrue(threading.get_ident() not in backend_threads.collect(pds_thread))
+
+    def test_broadcast(self):
+        # the threads reference the broadcast object itself
+        array = np.arange(5)
+        bds = backend_threads.broadcast(array)
+        pds = backend_threads.parallelize([0,1,2])
+        result = backend_threads.collect(backend_threads.map(lambda x:bds.value() is array, pds))
+        self.assertEqual(result, [True, True, True])
+
+    def test_copy_function(self):
+        class Counter:
+            def __init__(self, bds):
+                self.bds = bds
+                self.count = 0
+
+            def increment(self, x):
+                self.count += 1
+                return self.bds
+
+        bds = backend_threads.broadcast([1, 2])
+        counter = Counter(bds)
+        pds = backend_threads.parallelize([1,2,3,4])
+
+        # the threads work on copies of the object, which share the broadcast
+        result = backend_threads.collect(backend_threads.map(counter.increment, pds))
+        self.assertEqual(counter.count, 0)
+        self.assertTrue(all(r is bds for r in result))
+
+        backend_shared = BackendThreads(num_threads=2, copy_function=False)
+        backend_shared.collect(backend_shared.map(counter.increment, pds))
+        self.assertEqual(counter.count, 4)
+        backend_shared.close()
+
+    def test_inference(self):
+        # the results of an inference scheme do not depend on the backend
+        journals = []
+        for backend in [BackendDummy(), backend_threads]:
+            mu = Uniform([[-5.0], [5.0]], name='mu')
+            sigma = Uniform([[0.0], [10.0]], name='sigma')
+            model = Normal([mu, sigma])
+            dist_calc = Euclidean(Identity(degree=2, cross=0))
+            sampler = PMCABC([model], [dist_calc], backend, seed=1)
+            journals.append(sampler.sample([[np.array(9.8)]], 2, [10, 5], 10, n_samples_per_param=1))
+
+        for key in ['mu', 'sigma']:
+            np.testing.assert_array_equal(journals[0].get_parameters()[key], journals[1].get_parameters()[key])
+        np.testing.assert_array_equal(journals[0].get_weights(), journals[1].get_weights())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -128,6 +128,73 @@ class SampleFromDistributionTests(unittest.TestCase):
         self.assertTrue(len(samples) == 3)
 
 
+class SampleBatchFromDistributionTests(unittest.TestCase):
+    """Tests the return value of forward_simulate_batch for all continuous distributions."""
+    def test_Normal(self):
+        N = Normal([1, 0.1])
+        samples = N.forward_simulate_batch(np.array([[1, 0.1], [-1, 0.1]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 1))
+        self.assertTrue(np.all(samples[0] > 0) and np.all(samples[1] < 0))
+
+    def test_MultivariateNormal(self):
+        M = MultivariateNormal([[1, 0], [[0.1, 0], [0, 0.1]]])
+        input_values = np.array([[1, 0, 0.1, 0, 0, 0.1], [-10, 10, 1, 0.5, 0.5, 1]])
+        samples = M.forward_simulate_batch(input_values, 1000, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 1000, 2))
+        self.assertTrue(np.allclose(np.mean(samples[1], axis=0), [-10, 10], atol=0.2))
+        self.assertTrue(np.allclose(np.cov(samples[1].T), [[1, 0.5], [0.5, 1]], atol=0.2))
+
+    def test_StudentT(self):
+        S = StudentT([3, 1])
+        samples = S.forward_simulate_batch(np.array([[3, 1], [-3, 5]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 1))
+
+    def test_MultiStudentT(self):
+        # MultiStudentT has no native batch implementation and falls back to forward_simulate
+        S = MultiStudentT([[1, 0], [[0.1, 0], [0, 0.1]], 1])
+        input_values = np.array([S.get_input_values(), S.get_input_values()])
+        samples = S.forward_simulate_batch(input_values, 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 2))
+
+    def test_Uniform(self):
+        U = Uniform([[0, 1], [1, 2]])
+        samples = U.forward_simulate_batch(np.array([[0, 1, 1, 2], [5, 6, 6, 7]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 2))
+        self.assertTrue(np.all(samples[0] >= [0, 1]) and np.all(samples[0] <= [1, 2]))
+        self.assertTrue(np.all(samples[1] >= [5, 6]) and np.all(samples[1] <= [6, 7]))
+
+
+class LogPdfBatchTests(unittest.TestCase):
+    """Tests whether logpdf_batch agrees with logpdf for all continuous distributions."""
+    def _compare(self, model, input_values, x):
+        log_pdfs = model.logpdf_batch(np.array(input_values), np.array(x))
+        self.assertEqual(log_pdfs.shape, (len(x),))
+        for values, point, log_pdf in zip(input_values, x, log_pdfs):
+            point = point[0] if len(point) == 1 else np.array(point)
+            self.assertAlmostEqual(log_pdf, np.log(model.pdf(values, point)))
+
+    def test_Uniform(self):
+        U = Uniform([[0, 1], [1, 2]])
+        self._compare(U, [[0, 1, 1, 2], [0, 1, 2, 3]], [[0.5, 1.5], [0.5, 1.5]])
+        self.assertEqual(U.logpdf_batch(np.array([[0, 1, 1, 2]]), np.array([[0.5, 3]]))[0], -np.inf)
+
+    def test_Normal(self):
+        N = Normal([1, 0.1])
+        self._compare(N, [[1, 0.1], [-1, 2]], [[1.05], [0.5]])
+
+    def test_StudentT(self):
+        S = StudentT([3, 1])
+        self._compare(S, [[3, 1], [-3, 5]], [[2.5], [0]])
+
+    def test_MultivariateNormal(self):
+        M = MultivariateNormal([[1, 0], [[0.1, 0], [0, 0.1]]])
+        self._compare(M, [[1, 0, 0.1, 0, 0, 0.1], [-1, 1, 1, 0.5, 0.5, 2]], [[1.1, 0.1], [0, 0]])
+
+    def test_MultiStudentT(self):
+        S = MultiStudentT([[1, 0], [[0.1, 0], [0, 0.1]], 1])
+        self._compare(S, [[1, 0, 0.1, 0, 0, 0.1, 1], [-1, 1, 1, 0.5, 0.5, 2, 5]], [[1.1, 0.1], [0, 0]])
+
+
 class CheckParametersBeforeSamplingTests(unittest.TestCase):
     """Tests whether False will be returned if the input parameters of _check_parameters_before_sampling are not accepted."""
 
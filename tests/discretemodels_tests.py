@@ -81,6 +81,49 @@ class SampleFromDistributionTests(unittest.TestCase):
         self.assertTrue(isinstance(samples, list))
         self.assertTrue(len(samples) == 3)
 
+
+class SampleBatchFromDistributionTests(unittest.TestCase):
+    """Tests the return value of forward_simulate_batch for all discrete distributions."""
+    def test_Bernoulli(self):
+        Bn = Bernoulli([0.5])
+        samples = Bn.forward_simulate_batch(np.array([[0], [1]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 1))
+        self.assertTrue(np.all(samples[0] == 0) and np.all(samples[1] == 1))
+
+    def test_Binomial(self):
+        Bi = Binomial([1, 0.1])
+        samples = Bi.forward_simulate_batch(np.array([[1, 0.1], [10, 1]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 1))
+        self.assertTrue(np.all(samples[0] <= 1) and np.all(samples[1] == 10))
+
+    def test_Poisson(self):
+        Po = Poisson([3])
+        samples = Po.forward_simulate_batch(np.array([[3], [0]]), 3, rng=np.random.RandomState(1))
+        self.assertEqual(samples.shape, (2, 3, 1))
+        self.assertTrue(np.all(samples[1] == 0))
+
+class LogPdfBatchTests(unittest.TestCase):
+    """Tests whether logpdf_batch agrees with pmf for all discrete distributions."""
+    def _compare(self, model, input_values, x):
+        log_pmfs = model.logpdf_batch(np.array(input_values), np.array(x))
+        self.assertEqual(log_pmfs.shape, (len(x),))
+        with np.errstate(divide='ignore'):
+            for values, point, log_pmf in zip(input_values, x, log_pmfs):
+                self.assertAlmostEqual(log_pmf, np.log(model.pmf(values, point[0])))
+
+    def test_Bernoulli(self):
+        Bn = Bernoulli([0.5])
+        self._compare(Bn, [[0.5], [0.2], [0.2]], [[1], [0], [1]])
+
+    def test_Binomial(self):
+        Bi = Binomial([1, 0.1])
+        self._compare(Bi, [[1, 0.1], [10, 0.3], [10, 0.3]], [[1], [4], [11]])
+
+    def test_Poisson(self):
+        Po = Poisson([3])
+        self._compare(Po, [[3], [10]], [[0], [12]])
+
+
 class CheckParametersBeforeSamplingTests(unittest.TestCase):
     """Tests whether False will be returned if the input parameters of _check_parameters_before_sampling are not
     accepted."""
@@ -25,6 +25,19 @@ class EuclideanTests(unittest.TestCase):
         # test whether they compute correct values
         self.assertTrue(self.distancefunc.distance(a,b) == np.array([0]))
         self.assertTrue(self.distancefunc.distance(a,c) == np.array([1.7320508075688772]))
+
+    def test_batch_distance(self):
+        a = [[0, 0, 0],[0, 0, 0]]
+        b = [[0, 0, 0],[0, 0, 0]]
+        c = [[1, 1, 1],[1, 2, 1]]
+        self.assertRaises(TypeError, self.distancefunc.batch_distance, a, 3.4)
+        self.assertRaises(TypeError, self.distancefunc.batch_distance, a, [3.4])
+
+        # test whether they agree with the distances computed one at a time
+        distances = self.distancefunc.batch_distance(a, [b, c])
+        self.assertEqual(distances.shape, (2,))
+        self.assertAlmostEqual(distances[0], self.distancefunc.distance(a, b))
+        self.assertAlmostEqual(distances[1], self.distancefunc.distance(a, c))
         
     def test_dist_max(self):
         self.assertTrue(self.distancefunc.dist_max() == np.inf)        
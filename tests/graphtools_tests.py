@@ -32,6 +32,36 @@ class SampleFromPriorTests(unittest.TestCase):
         self.assertIsNotNone(N2._fixed_values)
 
 
+class SampleFromPriorBatchTests(unittest.TestCase):
+    """Tests whether sample_from_prior_batch samples a matrix of valid parameters in the order of get_parameters."""
+    def test(self):
+        B1 = Binomial([10, 0.2])
+        N1 = Normal([0.5, 1.0])
+        N2 = Normal([0.1, N1])
+        graph = Normal([B1, N2])
+
+        sampler = RejectionABC([graph], [LogReg(Identity(degree=2, cross=False))], Backend())
+        parameters = sampler.sample_from_prior_batch(200, rng=np.random.RandomState(1))
+        self.assertEqual(parameters.shape, (200, 3))
+
+        mapping = dict(sampler._get_mapping()[0])
+        # Rows with a negative standard deviation of N2 are sampled again
+        self.assertTrue(np.all(parameters[:, mapping[N1]] >= 0))
+        self.assertTrue(np.all(np.isin(parameters[:, mapping[B1]], np.arange(11))))
+
+        # The rows lie in the support of the prior
+        self.assertTrue(np.all(sampler.log_pdf_of_prior_batch(sampler.model, parameters) > -np.inf))
+
+    def test_operations(self):
+        N1 = Normal([0.5, 1.0])
+        N2 = Normal([0.1, 1.0])
+        graph = Normal([N1 + N2, 1.0])
+
+        sampler = RejectionABC([graph], [LogReg(Identity(degree=2, cross=False))], Backend())
+        parameters = sampler.sample_from_prior_batch(4, rng=np.random.RandomState(1))
+        self.assertEqual(parameters.shape, (4, 2))
+
+
 class ResetFlagsTests(unittest.TestCase):
     """Tests whether it is possible to reset all visited flags in the graph."""
     def test(self):
@@ -197,6 +227,28 @@ class SimulateTests(unittest.TestCase):
         self.assertTrue(isinstance(y_sim[0][0], np.ndarray))
 
 
+class SimulateBatchTests(unittest.TestCase):
+    """Tests whether simulating a matrix of parameters gives the data of simulating each row separately."""
+    def test(self):
+        mu = Uniform([[-5.0], [5.0]])
+        sigma = Uniform([[0.0], [10.0]])
+        graph = Normal([mu, sigma])
+
+        sampler = RejectionABC([graph], [LogReg(Identity(degree=2, cross=False))], Backend())
+
+        parameters = np.array([[1.0, 1.0], [-2.0, -1.0], [3.0, 0.5]])
+        y_sims = sampler.simulate_batch(parameters, 4, rng=np.random.RandomState(1))
+
+        self.assertEqual(len(y_sims), 3)
+        # A negative standard deviation is not compatible with the model
+        self.assertIsNone(y_sims[1])
+        for index in [0, 2]:
+            self.assertEqual(len(y_sims[index]), 1)
+            self.assertEqual(len(y_sims[index][0]), 4)
+            self.assertTrue(isinstance(y_sims[index][0][0], np.ndarray))
+        self.assertTrue(abs(np.mean(y_sims[2][0]) - 3.0) < 2)
+
+
 class GetMappingTests(unittest.TestCase):
     """Tests whether the private get_mapping method will return the correct mapping."""
     def test(self):
@@ -219,6 +271,105 @@ class GetMappingTests(unittest.TestCase):
         mapping, index = sampler._get_mapping()
         self.assertTrue(mapping==[(B1, 0),(N2, 1),(N1,2)])
 
+class ExecutionPlanTests(unittest.TestCase):
+    """Tests the compilation and caching of the execution plan of the graph."""
+    def setUp(self):
+        self.B1 = Binomial([10, 0.2])
+        self.N1 = Normal([0.03, 0.01])
+        self.N2 = Normal([0.1, self.N1])
+        self.graph1 = Normal([self.B1, self.N2])
+        self.graph2 = Normal([1, self.N2])
+
+        distance_calculator = LogReg(Identity(degree=2, cross=False))
+        self.sampler = RejectionABC([self.graph1, self.graph2], [distance_calculator, distance_calculator], Backend())
+
+    def test_plan(self):
+        plan = self.sampler._get_execution_plan()
+        # Parents are sampled before their children, the roots are not sampled
+        self.assertEqual(plan.nodes, [self.B1, self.N1, self.N2])
+        self.assertEqual(plan.free_models, [self.B1, self.N2, self.N1])
+        self.assertEqual(plan.n_parameters, 3)
+        np.testing.assert_array_equal(plan.slot_start, [0, 1, 2])
+        np.testing.assert_array_equal(plan.slot_stop, [1, 2, 3])
+
+        # N2 takes its mean from a folded constant and its standard deviation from the column of N1
+        np.testing.assert_array_equal(plan.input_columns[1], [-1, 2])
+        self.assertEqual(plan.input_constants[1][0], 0.1)
+        np.testing.assert_array_equal(plan.get_input_values(1, np.array([[3, 0.12, 0.029], [4, 0.1, 0.5]])),
+                                      [[0.1, 0.029], [0.1, 0.5]])
+
+    def test_caching(self):
+        plan = self.sampler._get_execution_plan()
+        self.sampler.sample_from_prior(rng=np.random.RandomState(1))
+        self.sampler.set_parameters([3, 0.12, 0.029])
+        self.assertIs(self.sampler._get_execution_plan(), plan)
+
+        # A plan is compiled for each list of root models
+        self.assertIsNot(self.sampler._get_execution_plan([self.graph2]), plan)
+        self.assertEqual(self.sampler._get_mapping([self.graph2])[0], [(self.N2, 0), (self.N1, 1)])
+
+        # Changing the graph invalidates the plan
+        N3 = Normal([0.1, 0.01])
+        self.graph2.get_input_connector().set(0, N3, 0)
+        new_plan = self.sampler._get_execution_plan()
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(new_plan.free_models, [self.B1, self.N2, self.N1, N3])
+
+
+class EvaluationContextTests(unittest.TestCase):
+    """Tests whether evaluation contexts give the results of the graph operations without changing the models."""
+    def setUp(self):
+        self.mu = Normal([0, 1])
+        self.sigma = Uniform([[0.5], [2]])
+        self.graph = Normal([self.mu, self.sigma])
+
+        self.sampler = RejectionABC([self.graph], [LogReg(Identity(degree=2, cross=False))], Backend())
+        self.sampler.sample_from_prior(rng=np.random.RandomState(0))
+
+    def test_context(self):
+        stored_values = self.sampler.get_parameters()
+
+        context = self.sampler.create_evaluation_context()
+        context.sample_from_prior(rng=np.random.RandomState(1))
+        parameters = np.hstack(context.get_parameters())
+        y_sim = context.simulate(3, rng=np.random.RandomState(2))
+
+        # The models are left untouched
+        np.testing.assert_array_equal(np.hstack(self.sampler.get_parameters()), np.hstack(stored_values))
+
+        self.sampler.sample_from_prior(rng=np.random.RandomState(1))
+        np.testing.assert_array_equal(np.hstack(self.sampler.get_parameters()), parameters)
+        np.testing.assert_array_equal(np.hstack(self.sampler.simulate(3, rng=np.random.RandomState(2))[0]),
+                                      np.hstack(y_sim[0]))
+        self.assertAlmostEqual(context.log_pdf_of_prior(), self.sampler.log_pdf_of_prior(self.sampler.model, parameters))
+        self.assertAlmostEqual(context.pdf_of_prior(), self.sampler.pdf_of_prior(self.sampler.model, parameters))
+
+        self.assertEqual(context.set_parameters([0.5, 3]), [False, 1])
+        self.assertEqual(context.set_parameters([0.5, 1]), [True, 2])
+        np.testing.assert_array_equal(np.hstack(context.get_parameters()), [0.5, 1])
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def evaluate(seed):
+            context = self.sampler.create_evaluation_context()
+            rng = np.random.RandomState(seed)
+            context.sample_from_prior(rng=rng)
+            y_sim = context.simulate(10, rng=rng)
+            return np.hstack(context.get_parameters()), np.hstack(y_sim[0]), context.log_pdf_of_prior()
+
+        with ThreadPoolExecutor(4) as executor:
+            concurrent_results = list(executor.map(evaluate, range(20)))
+        for seed, concurrent_result in enumerate(concurrent_results):
+            for concurrent_value, value in zip(concurrent_result, evaluate(seed)):
+                np.testing.assert_array_equal(concurrent_value, value)
+
+    def test_operations(self):
+        sampler = RejectionABC([Normal([self.mu + self.sigma, 1])], [LogReg(Identity(degree=2, cross=False))],
+                               Backend())
+        self.assertRaises(NotImplementedError, sampler.create_evaluation_context)
+
+
 from abcpy.continuousmodels import Uniform
 
 class PdfOfPriorTests(unittest.TestCase):
@@ -262,6 +413,46 @@ class PdfOfPriorTests(unittest.TestCase):
         self.assertTrue(self.pdf2 == 0.5)
         self.assertTrue(self.pdf3 == 7.1655940847160915)
 
+    def test_log_pdf_of_prior(self):
+        """Test whether the log-pdf of the prior matches the logarithm of the pdf"""
+        log_pdf1 = self.sampler1.log_pdf_of_prior(self.sampler1.model, [1.32088846, 1.42945274])
+        log_pdf3 = self.sampler3.log_pdf_of_prior(self.sampler3.model, [1.32088846, 1.42945274, 3])
+        self.assertAlmostEqual(log_pdf1, np.log(14.331188169432183))
+        self.assertAlmostEqual(log_pdf3, np.log(7.1655940847160915))
+        self.assertEqual(self.sampler2.log_pdf_of_prior(self.sampler2.model, [5]), -np.inf)
+
+    def test_log_pdf_of_prior_batch(self):
+        """Test whether the batched log-pdf of the prior matches the log-pdf of each row"""
+        parameters = np.array([[1.32088846, 1.42945274, 3], [1.5, 1.4, 3.5], [1.4, 1.5, 5]])
+        log_pdfs = self.sampler3.log_pdf_of_prior_batch(self.sampler3.model, parameters)
+        self.assertEqual(log_pdfs.shape, (3,))
+        for row, log_pdf in zip(parameters, log_pdfs):
+            self.assertAlmostEqual(log_pdf, self.sampler3.log_pdf_of_prior(self.sampler3.model, list(row)))
+        self.assertEqual(log_pdfs[1], -np.inf)
+        self.assertEqual(log_pdfs[2], -np.inf)
+
+        pdfs = self.sampler1.pdf_of_prior_batch(self.sampler1.model, parameters[:1, :2])
+        self.assertAlmostEqual(pdfs[0], 14.331188169432183)
+
+    def test_log_pdf_of_prior_batch_nested(self):
+        """Test the batched log-pdf of the prior for models whose parameters depend on other free parameters"""
+        mu = Normal([0, 1])
+        sigma = Uniform([[0.5], [3]])
+        df = Poisson([4])
+        graph = [Normal([mu, sigma]), StudentT([mu, df])]
+        sampler = RejectionABC(graph, [LogReg(Identity(degree=2, cross=False))] * 2, Backend())
+
+        rng = np.random.RandomState(1)
+        parameters = []
+        for i in range(5):
+            sampler.sample_from_prior(rng=rng)
+            parameters.append(np.hstack(sampler.get_parameters()))
+        parameters = np.array(parameters, dtype=float)
+
+        log_pdfs = sampler.log_pdf_of_prior_batch(sampler.model, parameters)
+        for row, log_pdf in zip(parameters, log_pdfs):
+            self.assertAlmostEqual(log_pdf, sampler.log_pdf_of_prior(sampler.model, list(row)))
+
 
 if __name__ == '__main__':
     unittest.main()
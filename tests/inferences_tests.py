@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 import warnings
@@ -13,7 +15,9 @@ from abcpy.continuousmodels import Uniform
 
 from abcpy.statistics import Identity
 
-from abcpy.inferences import RejectionABC, PMC, PMCABC, SABC, ABCsubsim, SMCABC, APMCABC, RSMCABC
+from abcpy.inferences import RejectionABC, PMC, PMCABC, SteadyStatePMCABC, SABC, ABCsubsim, SMCABC, APMCABC, RSMCABC
+
+from abcpy.resampling import ESSPolicy
 
 class RejectionABCTest(unittest.TestCase):
     def test_sample(self):
@@ -47,11 +51,88 @@ class RejectionABCTest(unittest.TestCase):
 
         # Compute posterior mean
         #self.assertAlmostEqual(np.average(np.asarray(samples[:,0])),1.22301,10e-2)
-        self.assertLess(np.average(mu_sample) - 1.22301, 1e-2)
-        self.assertLess(np.average(sigma_sample) - 6.992218,10e-2)
+        self.assertLess(np.average(mu_sample) - 1.87652, 1e-2)
+        self.assertLess(np.average(sigma_sample) - 5.887272,10e-2)
 
         self.assertFalse(journal.number_of_simulations==0)
 
+    def test_sample_batch(self):
+        # setup backend
+        dummy = BackendDummy()
+
+        # define a uniform prior distribution
+        mu = Uniform([[-5.0], [5.0]], name='mu')
+        sigma = Uniform([[0.0], [10.0]], name='sigma')
+        # define a Gaussian model
+        self.model = Normal([mu,sigma])
+
+        # define a distance function
+        dist_calc = Euclidean(Identity(degree=2, cross=0))
+
+        # create fake observed data
+        y_obs = [np.array(9.8)]
+
+        # use the batched rejection sampling scheme, with a last task accepting fewer samples
+        sampler = RejectionABC([self.model], [dist_calc], dummy, seed = 1)
+        journal = sampler.sample([y_obs], 10, 1, 10, batch_size=4)
+        mu_sample = np.array(journal.get_parameters()['mu'])
+        sigma_sample = np.array(journal.get_parameters()['sigma'])
+
+        # test shape of samples
+        self.assertEqual(np.shape(mu_sample), (10,1))
+        self.assertEqual(np.shape(sigma_sample), (10,1))
+
+        # all accepted samples lie within the prior support
+        self.assertTrue(np.all(np.abs(mu_sample) <= 5))
+        self.assertTrue(np.all((sigma_sample >= 0) & (sigma_sample <= 10)))
+
+        self.assertTrue(journal.number_of_simulations[-1] >= 10)
+
+    def test_sample_budget(self):
+        dummy = BackendDummy()
+        mu = Uniform([[-5.0], [5.0]], name='mu')
+        sigma = Uniform([[0.0], [10.0]], name='sigma')
+        self.model = Normal([mu,sigma])
+        dist_calc = Euclidean(Identity(degree=2, cross=0))
+        y_obs = [np.array(9.8)]
+
+        # with a tight threshold, the tasks run out of their share of the simulation budget
+        sampler = RejectionABC([self.model], [dist_calc], dummy, seed = 1)
+        journal = sampler.sample([y_obs], 10, 1, 0.1, max_simulations=50)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertLessEqual(journal.number_of_simulations[-1], 50)
+        self.assertLess(len(journal.get_weights()), 10)
+
+        # with less simulations left than tasks, only the first tasks simulate
+        sampler = RejectionABC([self.model], [dist_calc], dummy, seed = 1)
+        journal = sampler.sample([y_obs], 10, 1, 0.1, max_simulations=7)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(journal.number_of_simulations[-1], 7)
+
+        sampler = RejectionABC([self.model], [dist_calc], dummy, seed = 1)
+        sampler._set_budget(7, None)
+        sampler._share_budget(np.arange(20, 30))
+        self.assertEqual([sampler._task_simulations(key) for key in range(20, 30)], [1] * 7 + [0] * 3)
+        sampler._share_budget(np.arange(20, 24))
+        self.assertEqual([sampler._task_simulations(key) for key in range(20, 24)], [2, 2, 2, 1])
+
+        # blocks larger than the budget are shrunk to it
+        for max_simulations in [50, 7]:
+            sampler = RejectionABC([self.model], [dist_calc], dummy, seed = 1)
+            journal = sampler.sample([y_obs], 10, 1, 0.01, batch_size=100, max_simulations=max_simulations)
+            self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+            self.assertLessEqual(sampler.simulation_counter, max_simulations)
+
+        # a deadline in the past stops all tasks before they simulate
+        journal = sampler.sample([y_obs], 10, 1, 0.1, batch_size=4, max_time=0)
+        self.assertEqual(journal.configuration["stop_reason"], "max_time")
+        self.assertEqual(len(journal.get_weights()), 0)
+
+        # a sufficient budget does not stop the sampling
+        journal = sampler.sample([y_obs], 10, 1, 10, max_simulations=10**6)
+        self.assertIsNone(journal.configuration["stop_reason"])
+        self.assertEqual(len(journal.get_weights()), 10)
+
 
 
 
@@ -91,8 +172,8 @@ class PMCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(abs(mu_post_mean - (-3.55548377)), 1e-3)
-        self.assertLess(abs(sigma_post_mean - 5.87147492), 1e-3)
+        self.assertLess(abs(mu_post_mean - (-2.55289801)), 1e-3)
+        self.assertLess(abs(sigma_post_mean - 6.0782566), 1e-3)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
@@ -111,12 +192,33 @@ class PMCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(abs(mu_post_mean - (-3.88512394) ), 1e-3)
-        self.assertLess(abs(sigma_post_mean - 2.90352432), 1e-3)
+        self.assertLess(abs(mu_post_mean - (-0.54376054) ), 1e-3)
+        self.assertLess(abs(sigma_post_mean - 7.22306819), 1e-3)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
 
+    def test_sample_budget(self):
+        mu = Uniform([[-5.0], [5.0]], name='mu')
+        sigma = Uniform([[0.0], [10.0]], name='sigma')
+        model = Normal([mu,sigma])
+        likfun = SynLiklihood(Identity(degree = 2, cross = 0))
+
+        # the tasks of the second generation run out of budget, so that the first one is returned
+        sampler = PMC([model], [likfun], BackendDummy(), seed = 1)
+        journal = sampler.sample([[np.array(9.8)]], 2, 10, 10, max_simulations=15)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 15)
+        self.assertEqual(len(journal.parameters), 1)
+        self.assertEqual(journal.number_of_simulations[-1], 10)
+
+        sampler = PMC([model], [likfun], BackendDummy(), seed = 1)
+        journal = sampler.sample([[np.array(9.8)]], 2, 10, 10, max_simulations=5)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 5)
+        self.assertEqual(len(journal.parameters), 0)
+
+
 class PMCABCTests(unittest.TestCase):
     def setUp(self):
         # find spark and initialize it
@@ -160,6 +262,10 @@ class PMCABCTests(unittest.TestCase):
         weight = rc._calculate_weight(theta)
         expected_weight = 0.170794684453
         self.assertAlmostEqual(weight, expected_weight)
+
+        log_weights = rc._calculate_log_weights(np.array([theta, theta]))
+        self.assertEqual(log_weights.shape, (2,))
+        self.assertAlmostEqual(np.exp(log_weights[1]), expected_weight)
         
 
         
@@ -178,8 +284,8 @@ class PMCABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - 0.03713, 10e-2)
-        self.assertLess(sigma_post_mean - 7.727, 10e-2)
+        self.assertLess(mu_post_mean - 1.87652, 10e-2)
+        self.assertLess(sigma_post_mean - 5.887, 10e-2)
 
         #self.assertEqual((mu_post_mean, sigma_post_mean), (,))
         
@@ -198,11 +304,139 @@ class PMCABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - 0.9356, 10e-2)
-        self.assertLess(sigma_post_mean - 7.819, 10e-2)
+        self.assertLess(mu_post_mean - 0.7325, 10e-2)
+        self.assertLess(sigma_post_mean - 7.426, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
+    def test_sample_budget(self):
+        # the second generation exceeds the budget, so that the first one is returned
+        T, n_sample, n_simulate, eps_arr, eps_percentile = 3, 10, 1, [10, 0.01, 0.01], 10
+        sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, eps_arr, n_sample, n_simulate, eps_percentile, max_simulations=5000)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(len(journal.parameters), 1)
+        self.assertEqual(journal.number_of_simulations[-1], 768)
+        self.assertEqual(np.shape(journal.get_weights()), (10,1))
+        self.assertAlmostEqual(np.sum(journal.get_weights()), 1)
+        self.assertLessEqual(sampler.simulation_counter, 5000)
+
+        # without a budget, the journal only contains the last generation
+        sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 1, [10], n_sample, n_simulate, eps_percentile, max_time=3600)
+        self.assertIsNone(journal.configuration["stop_reason"])
+        self.assertEqual(np.shape(journal.get_weights()), (10,1))
+
+    def test_sample_checkpoint(self):
+        T, n_sample, n_simulate, eps_percentile = 3, 10, 1, 10
+        sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, [10, 2, 0.5], n_sample, n_simulate, eps_percentile)
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_file = os.path.join(directory, 'pmcabc.ckpt')
+
+            # the run stops in the third generation, leaving the checkpoint of the second one behind
+            sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            sampler.sample([self.observation], T, [10, 2, 0.5], n_sample, n_simulate, eps_percentile,
+                           max_simulations=5000, checkpoint_file=checkpoint_file)
+            self.assertTrue(os.path.exists(checkpoint_file))
+            self.assertFalse(os.path.exists(checkpoint_file + '.tmp'))
+
+            # a new sampler resumes after the second generation and gives the result of the uninterrupted run
+            sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 2)
+            resumed_journal = sampler.sample([self.observation], T, [10, 2, 0.5], n_sample, n_simulate,
+                                             eps_percentile, checkpoint_file=checkpoint_file)
+
+        np.testing.assert_array_equal(resumed_journal.parameters[-1], journal.parameters[-1])
+        np.testing.assert_array_equal(resumed_journal.get_weights(), journal.get_weights())
+        self.assertEqual(resumed_journal.number_of_simulations[-1], journal.number_of_simulations[-1])
+
+    def test_sample_policy(self):
+        # every generation accepts less than all of its simulations, so the policy stops after the first one
+        T, n_sample, n_simulate, eps_arr, eps_percentile = 3, 10, 1, [10, 2, 0.5], 10
+        sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, eps_arr, n_sample, n_simulate, eps_percentile,
+                                 policy=ESSPolicy(min_acceptance_rate=1.0))
+        self.assertEqual(journal.configuration["stop_reason"], "converged")
+        self.assertEqual(len(journal.number_of_simulations), 1)
+        self.assertEqual(np.shape(journal.get_weights()), (10,1))
+        stopped_simulations = journal.number_of_simulations[-1]
+
+        # a policy that never stops runs all generations
+        sampler = PMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, eps_arr, n_sample, n_simulate, eps_percentile,
+                                 policy=ESSPolicy())
+        self.assertIsNone(journal.configuration["stop_reason"])
+        self.assertGreater(journal.number_of_simulations[-1], stopped_simulations)
+
+
+class SteadyStatePMCABCTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = BackendDummy()
+
+        # define a uniform prior distribution
+        mu = Uniform([[-5.0], [5.0]], name='mu')
+        sigma = Uniform([[0.0], [10.0]], name='sigma')
+        # define a Gaussian model
+        self.model = Normal([mu, sigma])
+
+        # define a distance function
+        stat_calc = Identity(degree=2, cross=0)
+        self.dist_calc = Euclidean(stat_calc)
+
+        # create fake observed data
+        self.observation = [np.array(9.8)]
+
+    def test_sample(self):
+        steps, n_sample, n_simulate, n_proposals = 10, 10, 1, 20
+        sampler = SteadyStatePMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], steps, [100], n_sample, n_simulate, n_proposals=n_proposals)
+        mu_post_sample, sigma_post_sample, post_weights = np.array(journal.get_parameters()['mu']), np.array(journal.get_parameters()['sigma']), np.array(journal.get_weights())
+
+        # every proposal needs a single simulation, further waves refill the population after the given steps
+        epsilon_arr = journal.configuration["epsilon_arr"]
+        self.assertGreaterEqual(len(epsilon_arr), steps)
+        self.assertEqual(journal.number_of_simulations[-1], len(epsilon_arr) * n_proposals)
+
+        # the threshold only decreases and all particles of the population satisfy it
+        self.assertTrue(np.all(np.diff(epsilon_arr) <= 0))
+        self.assertLess(epsilon_arr[-1], 100)
+        self.assertTrue(np.all(journal.get_distances() <= epsilon_arr[-1]))
+
+        # the weights of the population are normalized
+        self.assertEqual(np.shape(mu_post_sample)[1:], (1,))
+        self.assertEqual(np.shape(sigma_post_sample), np.shape(mu_post_sample))
+        self.assertEqual(np.shape(post_weights), (len(mu_post_sample), 1))
+        self.assertEqual(len(mu_post_sample), n_sample)
+        self.assertAlmostEqual(np.sum(post_weights), 1)
+
+    def test_sample_full_population(self):
+        # the returned population is full, however many steps were run
+        for steps in [1, 2, 3, 5]:
+            sampler = SteadyStatePMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            journal = sampler.sample([self.observation], steps, [100], 50, 1)
+            self.assertEqual(len(journal.get_parameters()['mu']), 50)
+            self.assertTrue(np.all(journal.get_distances() <= journal.configuration["epsilon_arr"][-1]))
+
+    def test_sample_budget(self):
+        # the last wave is shortened to the remaining budget
+        sampler = SteadyStatePMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 10, [100], 10, 1, n_proposals=20, full_output=1,
+                                 max_simulations=50)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 50)
+        self.assertEqual(len(journal.configuration["epsilon_arr"]), 3)
+
+    def test_sample_max_refill_waves(self):
+        # no particle satisfies the threshold, so that the population is never filled
+        sampler = SteadyStatePMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        with self.assertWarns(RuntimeWarning):
+            journal = sampler.sample([self.observation], 2, [1e-10], 10, 1, max_refill_waves=3)
+        self.assertEqual(journal.configuration["stop_reason"], "max_refill_waves")
+        self.assertEqual(len(journal.configuration["epsilon_arr"]), 5)
+        self.assertEqual(sampler.simulation_counter, 50)
+        self.assertEqual(len(journal.parameters), 0)
+
 
 class SABCTests(unittest.TestCase):
     def setUp(self):
@@ -222,6 +456,17 @@ class SABCTests(unittest.TestCase):
         # create fake observed data
         #self.observation = self.model.forward_simulate(1, np.random.RandomState(1))[0].tolist()
         self.observation = [np.array(9.8)]
+
+    def test_smoother_distance(self):
+        sampler = SABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        old_distance = np.array([3.0, 0.5, 2.0, 2.0, 7.5])
+        distance = np.array([0.25, 0.5, 2.0, 2.5, 10.0])
+        smoothed_distance = sampler._smoother_distance(distance, np.sort(old_distance))
+
+        # compare with the empirical cumulative distribution function evaluated one distance at a time
+        expected = [(0.25 / 0.5) / 5, 0., 0.2, 0.6, 1.]
+        for ind in range(len(distance)):
+            self.assertAlmostEqual(smoothed_distance[ind], expected[ind])
        
     def test_sample(self):
         # use the SABC scheme for T = 1
@@ -254,11 +499,31 @@ class SABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - 0.55859197, 10e-2)
-        self.assertLess(sigma_post_mean - 7.03987723, 10e-2)
+        self.assertLess(mu_post_mean - 0.0753518, 10e-2)
+        self.assertLess(sigma_post_mean - 7.07402722, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
+    def test_sample_checkpoint(self):
+        epsilon, n_samples, n_samples_per_param = 10, 10, 1
+        sampler = SABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 3, epsilon, n_samples, n_samples_per_param, ar_cutoff=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_file = os.path.join(directory, 'sabc.ckpt')
+            sampler = SABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            sampler.sample([self.observation], 2, epsilon, n_samples, n_samples_per_param, ar_cutoff=0,
+                           checkpoint_file=checkpoint_file)
+
+            # a new sampler resumes after the second generation and gives the result of the uninterrupted run
+            sampler = SABC([self.model], [self.dist_calc], self.backend, seed = 2)
+            resumed_journal = sampler.sample([self.observation], 3, epsilon, n_samples, n_samples_per_param,
+                                             ar_cutoff=0, checkpoint_file=checkpoint_file)
+
+        np.testing.assert_array_equal(resumed_journal.parameters[-1], journal.parameters[-1])
+        np.testing.assert_array_equal(resumed_journal.distances[-1], journal.distances[-1])
+        self.assertEqual(resumed_journal.number_of_simulations[-1], journal.number_of_simulations[-1])
+
 class ABCsubsimTests(unittest.TestCase):
     def setUp(self):
         # find spark and initialize it
@@ -313,12 +578,28 @@ class ABCsubsimTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - (-0.81410299), 10e-2)
-        self.assertLess(sigma_post_mean - 9.25442675, 10e-2)
+        self.assertLess(mu_post_mean - (-4.55284191), 10e-2)
+        self.assertLess(sigma_post_mean - 9.44514967, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
 
+    def test_sample_budget(self):
+        # the tasks of the first generation run out of budget
+        sampler = ABCsubsim([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 2, 10, 1, max_simulations=5)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 5)
+        self.assertEqual(len(journal.parameters), 0)
+
+        # the Markov chains of the covariance update run out of budget, the first generation is returned
+        sampler = ABCsubsim([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 2, 10, 1, max_simulations=30)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 30)
+        self.assertEqual(np.shape(journal.get_weights()), (10,1))
+
+
 class SMCABCTests(unittest.TestCase):
     def setUp(self):
         # find spark and initialize it
@@ -338,6 +619,24 @@ class SMCABCTests(unittest.TestCase):
         #self.observation = self.model.forward_simulate(1, np.random.RandomState(1))[0].tolist()
         self.observation = [np.array(9.8)]
 
+    def test_compute_distances(self):
+        sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        sampler.accepted_parameters_manager.broadcast(self.backend, [self.observation])
+        sampler.n_samples_per_param = 2
+        y_sim = [[[np.array(9.8), np.array(8.8)]], [[np.array(10.8), np.array(7.8)]]]
+        distances = sampler._compute_distances(y_sim)
+        self.assertEqual(distances.shape, (2, 2))
+        for ind1 in range(2):
+            for ind2 in range(2):
+                self.assertAlmostEqual(distances[ind1, ind2], self.dist_calc.distance(self.observation, [y_sim[ind1][0][ind2]]))
+
+    def test_reweight(self):
+        sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        accepted_distances = np.array([[0.5, 2.0], [1.5, 2.5], [3.0, 4.0]])
+        accepted_weights = np.array([[0.2], [0.3], [0.5]])
+        new_weights = sampler._reweight(accepted_distances, accepted_weights, 1.0, 3.0)
+        self.assertTrue(np.allclose(new_weights, [0.2 * 1 / 2, 0.3 * 0 / 2, 0]))
+
       
     def test_sample(self):
         # use the SMCABC scheme for T = 1
@@ -373,11 +672,57 @@ class SMCABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - (-0.786118677019), 10e-2)
-        self.assertLess(sigma_post_mean - 4.63324738665, 10e-2)
+        self.assertLess(mu_post_mean - (-1.654597697019), 10e-2)
+        self.assertLess(sigma_post_mean - 3.18066019665, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
+    def test_sample_policy(self):
+        # the policy resamples systematically and stops once the threshold hardly decreases any more
+        T, n_sample, n_simulate = 10, 10, 1
+        sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, n_sample, n_simulate, full_output=1,
+                                 policy=ESSPolicy(resample_threshold=0.9, epsilon_tolerance=0.5))
+        self.assertEqual(journal.configuration["stop_reason"], "converged")
+        self.assertLess(len(journal.parameters), T)
+        self.assertEqual(np.shape(journal.get_weights()), (10,1))
+        self.assertAlmostEqual(np.sum(journal.get_weights()), 1)
+
+    def test_sample_budget(self):
+        for max_simulations, n_generations in [(5, 0), (15, 1)]:
+            sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            journal = sampler.sample([self.observation], 2, 10, 1, max_simulations=max_simulations)
+            self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+            self.assertEqual(sampler.simulation_counter, max_simulations)
+            self.assertEqual(len(journal.parameters), n_generations)
+            self.assertEqual(len(journal.configuration["epsilon_arr"]), 1)
+
+    def test_sample_batch(self):
+        # blocks of particles are simulated at once, with a last task moving fewer particles
+        T, n_sample, n_simulate = 3, 10, 1
+        sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, n_sample, n_simulate, full_output=1, batch_size=4)
+        mu_post_sample, sigma_post_sample, post_weights = np.array(journal.get_parameters()['mu']), np.array(
+            journal.get_parameters()['sigma']), np.array(journal.get_weights())
+        self.assertEqual(np.shape(mu_post_sample), (10,1))
+        self.assertEqual(np.shape(sigma_post_sample), (10,1))
+        self.assertEqual(np.shape(post_weights), (10,1))
+        self.assertAlmostEqual(np.sum(post_weights), 1)
+        self.assertEqual(len(journal.opt_values[-1]), 10)
+
+        # the first generation is sampled from the prior, afterwards only particles of positive weight are moved
+        self.assertEqual(journal.number_of_simulations[0], n_sample)
+        for generation in range(1, T):
+            self.assertEqual(journal.number_of_simulations[generation] - journal.number_of_simulations[generation - 1],
+                             np.sum(journal.get_weights(generation) > 0))
+
+        # a task whose share of the budget does not cover its block leaves the generation incomplete
+        sampler = SMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], T, n_sample, n_simulate, batch_size=4, max_simulations=15)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertLessEqual(sampler.simulation_counter, 15)
+        self.assertEqual(journal.number_of_simulations, [10])
+
 class APMCABCTests(unittest.TestCase):
     def setUp(self):
         # find spark and initialize it
@@ -433,11 +778,18 @@ class APMCABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - (-2.785), 10e-2)
-        self.assertLess(sigma_post_mean - 6.2058, 10e-2)
+        self.assertLess(mu_post_mean - 1.7168, 10e-2)
+        self.assertLess(sigma_post_mean - 6.1456, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
+    def test_sample_budget(self):
+        sampler = APMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], 2, 10, 1, max_simulations=5)
+        self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+        self.assertEqual(sampler.simulation_counter, 5)
+        self.assertEqual(len(journal.parameters), 0)
+
 class RSMCABCTests(unittest.TestCase):
     def setUp(self):
         # find spark and initialize it
@@ -495,10 +847,61 @@ class RSMCABCTests(unittest.TestCase):
         self.assertEqual(mu_sample_shape, (10,1))
         self.assertEqual(sigma_sample_shape, (10,1))
         self.assertEqual(weights_sample_shape, (10,1))
-        self.assertLess(mu_post_mean - (1.52651600439), 10e-2)
-        self.assertLess(sigma_post_mean - 6.49994754262, 10e-2)
+        self.assertLess(mu_post_mean - (-0.63056741561), 10e-2)
+        self.assertLess(sigma_post_mean - 5.43326123262, 10e-2)
 
         self.assertFalse(journal.number_of_simulations == 0)
 
+    def test_sample_delayed_acceptance(self):
+        # use the RSMCABC scheme for T = 2, simulating only for proposals passing the prior and kernel check
+        steps, n_sample, n_simulate = 2, 10, 1
+        sampler = RSMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        journal = sampler.sample([self.observation], steps, n_sample, n_simulate, delayed_acceptance=True)
+        mu_post_sample, sigma_post_sample, post_weights = np.array(journal.get_parameters()['mu']), np.array(
+            journal.get_parameters()['sigma']), np.array(journal.get_weights())
+
+        # test shape of sample
+        self.assertEqual(np.shape(mu_post_sample), (10,1))
+        self.assertEqual(np.shape(sigma_post_sample), (10,1))
+        self.assertEqual(np.shape(post_weights), (10,1))
+
+        # all samples lie within the prior support
+        self.assertTrue(np.all(np.abs(mu_post_sample) <= 5))
+        self.assertTrue(np.all((sigma_post_sample >= 0) & (sigma_post_sample <= 10)))
+
+        self.assertTrue(journal.configuration["delayed_acceptance"])
+        self.assertFalse(journal.number_of_simulations == 0)
+
+    def test_prior_and_kernel_ratio(self):
+        # the kernel densities at both points underflow, their ratio does not
+        sampler = RSMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+        manager = sampler.accepted_parameters_manager
+        manager.broadcast(self.backend, [self.observation])
+        manager.update_broadcast(self.backend, accepted_parameters=np.array([[0., 5.], [1., 5.]]),
+                                 accepted_cov_mats=[np.eye(2) * 1e-4])
+        kernel_parameters = [manager.get_accepted_parameters_bds_values(kernel.models) for kernel in sampler.kernel.kernels]
+        manager.update_kernel_values(self.backend, kernel_parameters=kernel_parameters)
+        mapping, garbage_index = manager.get_mapping(manager.model)
+
+        ratio = sampler._prior_and_kernel_ratio(mapping, 0, np.array([0.5, 5.]), np.array([0.6, 5.]))
+        self.assertAlmostEqual(np.log(ratio), (0.6**2 - 0.5**2) / 2e-4)
+        self.assertEqual(sampler.get_parameters(), [0.5, 5.])
+
+    def test_sample_budget(self):
+        # the Markov chains replenishing the third generation run out of budget, the second one is returned
+        for delayed_acceptance in [False, True]:
+            sampler = RSMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            journal = sampler.sample([self.observation], 3, 20, 1, alpha=0.5, delayed_acceptance=delayed_acceptance,
+                                     max_simulations=40)
+            self.assertEqual(journal.configuration["stop_reason"], "max_simulations")
+            self.assertEqual(sampler.simulation_counter, 40)
+            self.assertEqual(journal.number_of_simulations, [32])
+
+            # with full output, the earlier generations are kept as well
+            sampler = RSMCABC([self.model], [self.dist_calc], self.backend, seed = 1)
+            journal = sampler.sample([self.observation], 3, 20, 1, alpha=0.5, delayed_acceptance=delayed_acceptance,
+                                     full_output=1, max_simulations=40)
+            self.assertEqual(journal.number_of_simulations, [22, 32])
+
 if __name__ == '__main__':
     unittest.main()
@@ -53,6 +53,22 @@ class ProductCombinationTests(unittest.TestCase):
         # This checks whether it computes a correct value and dimension is right
         self.assertLess(comp_likelihood - expected_likelihood, 10e-2)
 
+    def test_loglikelihood(self):
+        #Checks whether wrong input type produces error message
+        self.assertRaises(TypeError, self.jointapprox_lhd.loglikelihood, 3.4, [[2,1]])
+        self.assertRaises(TypeError, self.jointapprox_lhd.loglikelihood, [[2,4]], 3.4)
+
+        # test whether the log-likelihoods of the individual models are summed
+        y_obs = [[9.8], [9.8]]
+        self.mu._fixed_values = [1.1]
+        self.sigma._fixed_values = [1.0]
+        y_sim_1 = self.model1.forward_simulate(self.model1.get_input_values(), 100, rng=np.random.RandomState(1))
+        y_sim_2 = self.model2.forward_simulate(self.model2.get_input_values(), 100, rng=np.random.RandomState(1))
+        comp_loglikelihood = self.jointapprox_lhd.loglikelihood(y_obs, [y_sim_1, y_sim_2])
+        expected_loglikelihood = self.likfun1.loglikelihood(y_obs[0], y_sim_1) + self.likfun2.loglikelihood(y_obs[1], y_sim_2)
+        self.assertAlmostEqual(comp_loglikelihood, expected_loglikelihood)
+        self.assertAlmostEqual(comp_loglikelihood, np.log(8.612491843767518e-43), delta=10e-2)
+
 
 if __name__ == '__main__':
     unittest.main()
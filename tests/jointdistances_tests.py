@@ -45,6 +45,20 @@ class LinearCombinationTests(unittest.TestCase):
         # test whether they compute correct values
         self.assertTrue(self.jointdistancefunc.distance([a,b],[a,b]) == np.array([0]))
         self.assertTrue(self.jointdistancefunc.distance([a,c],[c,b]) == np.array([1.7320508075688772]))
+
+    def test_batch_distance(self):
+        a = [[0, 0, 0],[0, 0, 0]]
+        b = [[0, 0, 0],[0, 0, 0]]
+        c = [[1, 1, 1],[1, 1, 1]]
+
+        self.assertRaises(TypeError, self.jointdistancefunc.batch_distance, [a, b], 3.4)
+        self.assertRaises(ValueError, self.jointdistancefunc.batch_distance, [a, b], [[a]])
+
+        distances = self.jointdistancefunc.batch_distance([a, c], [[a, b], [c, b], [a, c]])
+        self.assertEqual(distances.shape, (3,))
+        self.assertAlmostEqual(distances[0], self.jointdistancefunc.distance([a, c], [a, b]))
+        self.assertAlmostEqual(distances[1], self.jointdistancefunc.distance([a, c], [c, b]))
+        self.assertAlmostEqual(distances[2], 0)
         
     def test_dist_max(self):
         self.assertTrue(self.jointdistancefunc.dist_max() == np.inf)
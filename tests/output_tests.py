@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 
@@ -46,6 +48,33 @@ class JournalTests(unittest.TestCase):
 
 
 
+    def test_add_log_weights(self):
+        log_weights1 = np.log(np.full((2,1), 0.5))
+        log_weights2 = np.log(np.array([[0.25], [0.75]]))
+
+        # test whether production mode only stores the last set of log-weights and the corresponding weights
+        journal_prod = Journal(0)
+        journal_prod.add_log_weights(log_weights1)
+        journal_prod.add_log_weights(log_weights2)
+        self.assertEqual(len(journal_prod.log_weights), 1)
+        np.testing.assert_equal(journal_prod.get_log_weights(), log_weights2)
+        np.testing.assert_almost_equal(journal_prod.get_weights(), np.array([[0.25], [0.75]]))
+
+        # test whether reconstruction mode stores all log-weights
+        journal_recon = Journal(1)
+        journal_recon.add_log_weights(log_weights1)
+        journal_recon.add_log_weights(log_weights2)
+        self.assertEqual(len(journal_recon.log_weights), 2)
+        np.testing.assert_equal(journal_recon.get_log_weights(0), log_weights1)
+        np.testing.assert_almost_equal(journal_recon.get_weights(0), np.full((2,1), 0.5))
+
+        # test whether the log-weights are derived from weights that were stored without them
+        journal_weights = Journal(0)
+        journal_weights.add_weights(np.array([[0.25], [0.75]]))
+        np.testing.assert_almost_equal(journal_weights.get_log_weights(), log_weights2)
+
+
+
     def test_add_opt_values(self):
         opt_values1 = np.zeros((2,4))
         opt_values2 = np.ones((2,4))
@@ -74,9 +103,11 @@ class JournalTests(unittest.TestCase):
         journal = Journal(0)
         journal.add_parameters(params1)
         journal.add_weights(weights1)
-        journal.save('journal_tests_testfile.pkl')
+        with tempfile.TemporaryDirectory() as directory:
+            journal_file = os.path.join(directory, 'journal_tests_testfile.pkl')
+            journal.save(journal_file)
+            new_journal = Journal.fromFile(journal_file)
 
-        new_journal = Journal.fromFile('journal_tests_testfile.pkl')
         np.testing.assert_equal(journal.parameters, new_journal.parameters)
         np.testing.assert_equal(journal.weights, new_journal.weights)
         
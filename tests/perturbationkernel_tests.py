@@ -99,5 +99,56 @@ class PdfTests(unittest.TestCase):
         self.assertTrue(isinstance(pdf, float))
 
 
+class LogPdfTests(unittest.TestCase):
+    """Tests whether the vectorized log pdfs agree with the pdfs evaluated one point at a time."""
+    def setUp(self):
+        self.B1 = Binomial([10, 0.2])
+        self.N1 = Normal([0.1, 0.01])
+        self.N2 = Normal([0.3, self.N1])
+        graph = Normal([self.B1, self.N2])
+
+        self.Manager = AcceptedParametersManager([graph])
+        self.backend = Backend()
+        self.Manager.update_broadcast(self.backend, [[2, 0.4, 0.09], [3, 0.2, 0.008], [4, 0.1, 0.05]],
+                                      np.array([[0.5], [0.2], [0.3]]))
+        self.mapping, mapping_index = self.Manager.get_mapping(self.Manager.model)
+        self.x = np.array([[2, 0.3, 0.1], [3, 0.25, 0.02]])
+
+    def _update_manager(self, kernel, covs):
+        kernel_parameters = []
+        for krnl in kernel.kernels:
+            kernel_parameters.append(self.Manager.get_accepted_parameters_bds_values(krnl.models))
+        self.Manager.update_kernel_values(self.backend, kernel_parameters)
+        self.Manager.update_broadcast(self.backend, accepted_cov_mats=covs)
+
+    def _assert_agrees_with_pdf(self, kernel):
+        logpdfs = kernel.logpdf(self.mapping, self.Manager, self.x)
+        self.assertEqual(logpdfs.shape, (2, 3))
+        for i in range(2):
+            for j in range(3):
+                self.assertAlmostEqual(logpdfs[i, j], np.log(kernel.pdf(self.mapping, self.Manager, j, self.x[i])))
+
+        # a single row of accepted parameters
+        for j in range(3):
+            row_logpdfs = kernel.logpdf(self.mapping, self.Manager, self.x, row_index=j)
+            self.assertEqual(row_logpdfs.shape, (2, 1))
+            np.testing.assert_allclose(row_logpdfs[:, 0], logpdfs[:, j])
+
+        log_mixture = kernel.log_mixture_pdf(self.mapping, self.Manager, self.x, block_size=3)
+        for i in range(2):
+            mixture = sum(self.Manager.accepted_weights_bds.value()[j, 0] * kernel.pdf(self.mapping, self.Manager, j, self.x[i]) for j in range(3))
+            self.assertAlmostEqual(log_mixture[i], np.log(mixture))
+
+    def test_DefaultKernel(self):
+        kernel = DefaultKernel([self.N1, self.N2, self.B1])
+        self._update_manager(kernel, [np.array([[0.01, 0.002], [0.002, 0.005]]), []])
+        self._assert_agrees_with_pdf(kernel)
+
+    def test_MultivariateStudentTKernel(self):
+        kernel = JointPerturbationKernel([MultivariateStudentTKernel([self.N1, self.N2], df=3), RandomWalkKernel([self.B1])])
+        self._update_manager(kernel, [np.array([[0.01, 0.002], [0.002, 0.005]]), []])
+        self._assert_agrees_with_pdf(kernel)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
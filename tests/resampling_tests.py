@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+
+from abcpy.resampling import ESSPolicy
+
+
+class ESSPolicyTests(unittest.TestCase):
+    def setUp(self):
+        self.weights = np.array([0.1, 0.2, 0.3, 0.4])
+
+    def test_init(self):
+        self.assertRaises(ValueError, ESSPolicy, scheme='multinomial')
+
+    def test_effective_sample_size(self):
+        policy = ESSPolicy()
+        self.assertAlmostEqual(policy.effective_sample_size(np.ones(4)), 4)
+        self.assertAlmostEqual(policy.effective_sample_size(self.weights.reshape(-1, 1)), 1 / 0.3)
+        self.assertAlmostEqual(policy.effective_sample_size(np.array([0, 0, 1, 0])), 1)
+
+    def test_should_resample(self):
+        policy = ESSPolicy(resample_threshold=0.5)
+        self.assertFalse(policy.should_resample(self.weights))
+        self.assertTrue(policy.should_resample(np.array([0.01, 0.01, 0.01, 0.97])))
+
+    def test_resample(self):
+        for scheme in ['systematic', 'stratified']:
+            policy = ESSPolicy(scheme=scheme)
+            indices = policy.resample(self.weights, np.random.RandomState(1))
+            self.assertEqual(indices.shape, (4,))
+            self.assertTrue(np.all((indices >= 0) & (indices < 4)))
+
+            # the number of copies of each particle stays within one (systematic) or two (stratified) of its expectation
+            indices = policy.resample(self.weights, np.random.RandomState(1), 1000)
+            counts = np.bincount(indices, minlength=4)
+            self.assertTrue(np.all(np.abs(counts - 1000 * self.weights) <= (1 if scheme == 'systematic' else 2)))
+
+        # particles without weight are never drawn
+        indices = ESSPolicy().resample(np.array([0, 1, 0, 1]), np.random.RandomState(1), 100)
+        self.assertTrue(np.all(np.isin(indices, [1, 3])))
+
+    def test_should_stop(self):
+        self.assertFalse(ESSPolicy().should_stop(weights=self.weights, epsilon=[10, 9.99], acceptance_rate=0.01))
+
+        policy = ESSPolicy(stop_ess_fraction=0.9)
+        self.assertTrue(policy.should_stop(weights=np.ones(4)))
+        self.assertFalse(policy.should_stop(weights=self.weights))
+
+        policy = ESSPolicy(epsilon_tolerance=0.05)
+        self.assertFalse(policy.should_stop(epsilon=[10]))
+        self.assertFalse(policy.should_stop(epsilon=[10, 5]))
+        self.assertTrue(policy.should_stop(epsilon=[[10], [9.8], None]))
+
+        policy = ESSPolicy(min_acceptance_rate=0.1)
+        self.assertFalse(policy.should_stop(acceptance_rate=0.5))
+        self.assertTrue(policy.should_stop(acceptance_rate=0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()
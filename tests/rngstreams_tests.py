@@ -0,0 +1,34 @@
+import pickle
+import unittest
+import numpy as np
+
+from abcpy.rngstreams import RNGStreams
+
+
+class RNGStreamsTests(unittest.TestCase):
+    def test_keys(self):
+        streams = RNGStreams(1)
+        np.testing.assert_array_equal(streams.keys(3), [0, 1, 2])
+        np.testing.assert_array_equal(streams.keys(2), [3, 4])
+        self.assertEqual(streams.n_keys, 5)
+
+    def test_generator(self):
+        streams = RNGStreams(1)
+
+        # the stream of a key is reproducible, also after shipping the streams to another process
+        shipped_streams = pickle.loads(pickle.dumps(streams))
+        np.testing.assert_array_equal(streams.generator(3).normal(size=5), shipped_streams.generator(3).normal(size=5))
+        np.testing.assert_array_equal(streams.generator(3).normal(size=5), RNGStreams(1).generator(3).normal(size=5))
+
+        # different keys and different seeds give different streams
+        self.assertFalse(np.array_equal(streams.generator(3).normal(size=5), streams.generator(4).normal(size=5)))
+        self.assertFalse(np.array_equal(streams.generator(3).normal(size=5), RNGStreams(2).generator(3).normal(size=5)))
+
+        # the generators offer the interface of numpy.random.RandomState
+        rng = streams.generator(0)
+        self.assertIsInstance(rng, np.random.RandomState)
+        self.assertTrue(0 <= rng.randint(10) < 10)
+
+
+if __name__ == '__main__':
+    unittest.main()